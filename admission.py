@@ -0,0 +1,101 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# 부하 차단(admission control)
+#
+# DB가 느려지면 mod_wsgi 스레드(threads=5)가 모두 연결 풀이나 쿼리에서 멈추고, Apache는 요청을
+# 쌓아 두기만 하다가 DB가 필요 없는 '/'나 '/logout'까지 응답하지 못하게 됩니다.
+# DB를 쓰는 요청은 프로세스당 동시에 max_concurrent개까지만 받아들이고, 자리가 없으면 기다리지 않고
+# 바로 503(Retry-After)으로 돌려보내 남은 스레드가 다른 요청을 처리할 수 있게 합니다.
+# 또한 사용자별 토큰 버킷으로 한 사용자가 (예: 검색을 연달아 보내) 처리 용량을 독차지하지 못하게 합니다.
+
+
+class AdmissionController:
+    """
+    동시에 실행 중인 DB 요청 수를 max_concurrent개로 제한합니다.
+    자리가 없으면 wait초까지만 기다리고(기본 0: 기다리지 않음) 거절합니다. max_concurrent=0이면 제한하지 않습니다.
+    """
+
+    def __init__(self, max_concurrent, wait=0.0):
+        self.max_concurrent = max_concurrent
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(max_concurrent) if max_concurrent > 0 else None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._admitted = 0
+        self._rejected = 0
+
+    def try_acquire(self):
+        """자리를 얻으면 True를 반환합니다. True를 받았다면 요청이 끝날 때 release()를 호출해야 합니다."""
+        if self._slots is None:
+            admitted = True
+        elif self.wait > 0:
+            admitted = self._slots.acquire(timeout=self.wait)
+        else:
+            admitted = self._slots.acquire(blocking=False)
+        with self._lock:
+            if admitted:
+                self._admitted += 1
+                self._in_flight += 1
+            else:
+                self._rejected += 1
+        return admitted
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_concurrent': self.max_concurrent,
+                'in_flight': self._in_flight,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+            }
+
+
+class TokenBucketLimiter:
+    """
+    키(사용자)별 토큰 버킷입니다. 초당 rate개씩 채워져 최대 burst개까지 쌓이고, 요청마다 cost개를 씁니다.
+    최근에 사용한 max_keys개의 키만 기억합니다(오래된 키는 가득 찬 버킷과 같습니다). rate=0이면 제한하지 않습니다.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict() # key -> (tokens, updated_at)
+        self._limited = 0
+
+    def take(self, key, cost=1):
+        """
+        토큰 cost개를 쓸 수 있으면 쓰고 0을 반환합니다.
+        부족하면 토큰을 쓰지 않고, 다시 시도할 수 있을 때까지의 초(1 이상 정수)를 반환합니다.
+        """
+        if self.rate <= 0:
+            return 0
+        cost = min(cost, self.burst) # burst보다 비싼 요청도 가득 찬 버킷이면 허용합니다.
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0
+            else:
+                self._limited += 1
+                retry_after = max(1, math.ceil((cost - tokens) / self.rate))
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self):
+        with self._lock:
+            return {'keys': len(self._buckets), 'limited': self._limited}
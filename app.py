@@ -1,19 +1,58 @@
+import time
+_import_started = time.perf_counter() # create_app()의 시작 시간 보고에 사용합니다.
+import hmac
+import ipaddress
+import itertools
+import logging
 import os
-from flask import Flask, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
+import tempfile
+import threading
+from flask import Flask, render_template, stream_template, stream_with_context, request, redirect, url_for, session, flash, g, jsonify, make_response
+from flask import has_app_context
+from flask import before_render_template, template_rendered
 import pymysql.cursors
-from dotenv import load_dotenv, find_dotenv
+from pymysql.constants import CLIENT, ER
+from dotenv import load_dotenv
+from jinja2 import FileSystemBytecodeCache
 import calendar
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from db_pool import ConnectionPool
+from db_router import ReplicaRouter, parse_replicas
+from db_shards import ShardMap, ShardMoving, MAIN_SHARD, SHARDED_TABLES, parse_shards, shard_version_key
+from admission import AdmissionController, TokenBucketLimiter
+from profiler import RequestProfiler
+from pagination import Page, StreamedPage, fetch_keyset_page, clamp_page_size
+from search import create_backend
+from cache import ReadThroughCache, VersionCounter, default_version_path
+from http_cache import template_build_id, make_etag, is_not_modified, set_validators
+from assets import AssetManifest
+from compression import GzipMiddleware
+from log_config import setup_logging
+from passwords import PasswordHasher, HasherBusy
+from metrics import MetricsRegistry, MultiprocessExporter, QUERY_COUNT_BUCKETS
+from export import EXPORTS, FORMATS, CHUNKERS, read_batches
+import importer
+import board_summary
+import diary_year
+import user_summary
+from importer import InvalidRecord, validate_todo, validate_diary, read_records, import_records
 
 # .env 파일의 절대 경로를 명시하여 환경 변수를 로드합니다.
-# Apache/mod_wsgi 환경에서 .env 로딩 문제가 발생할 경우를 대비합니다.
-dotenv_path = find_dotenv('/var/www/html/your_flask_app/.env')
-if os.path.exists(dotenv_path):
+# Apache/mod_wsgi 환경에서는 작업 디렉터리가 프로젝트 폴더가 아니므로 app.py 옆의 .env를 읽습니다.
+# (디렉터리를 거슬러 올라가며 찾는 find_dotenv는 사용하지 않습니다. DOTENV_PATH로 바꿀 수 있습니다.)
+dotenv_path = os.getenv('DOTENV_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.env')
+dotenv_loaded = os.path.exists(dotenv_path)
+if dotenv_loaded:
     load_dotenv(dotenv_path)
-    print("DEBUG: .env variables loaded from explicit path.") # 디버깅용 로그
+
+# 로그 레벨은 .env의 LOG_LEVEL / LOG_LEVELS로 정하므로 .env를 읽은 뒤에 설정합니다.
+setup_logging()
+logger = logging.getLogger(__name__)
+if dotenv_loaded:
+    logger.debug(".env variables loaded from explicit path.")
 else:
-    print(f"WARNING: .env file not found at {dotenv_path}. Environment variables might not be loaded.") # 디버깅용 로그
+    logger.warning(".env file not found at %s. Environment variables might not be loaded.", dotenv_path)
 
 # Flask 애플리케이션 인스턴스 생성
 app = Flask(__name__)
@@ -24,53 +63,808 @@ app = Flask(__name__)
 flask_secret_key = os.getenv('FLASK_SECRET_KEY')
 if not flask_secret_key:
     flask_secret_key = os.urandom(24).hex() # 임시 키 생성
-    print(f"WARNING: FLASK_SECRET_KEY not found in .env. Using newly generated key for this run: {flask_secret_key}") # 디버깅용 로그
-    print("Please add 'FLASK_SECRET_KEY={}' to your .env file for persistent security.".format(flask_secret_key)) # 디버깅용 로그
+    logger.warning("FLASK_SECRET_KEY not found in .env. Using newly generated key for this run: %s", flask_secret_key)
+    logger.warning("Please add 'FLASK_SECRET_KEY=%s' to your .env file for persistent security.", flask_secret_key)
 
 app.secret_key = flask_secret_key
-print(f"DEBUG: Flask secret key loaded: {'exists' if app.secret_key else 'NOT FOUND'}") # 디버깅용 로그
+logger.debug("Flask secret key loaded: %s", 'exists' if app.secret_key else 'NOT FOUND')
 
 
 # 데이터베이스 연결 설정
 # 환경 변수가 설정되지 않았을 경우 사용할 기본값(폴백)을 지정합니다.
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', '10.10.8.4'),
+    'port': int(os.getenv('DB_PORT', '3306')),
     'user': os.getenv('DB_USER', 'flask_user'),
     'password': os.getenv('DB_PASSWORD', 'P@ssw0rd'),
     'db': os.getenv('DB_NAME', 'flask_auth_db'),
     'charset': 'utf8mb4',
-    'cursorclass': pymysql.cursors.DictCursor
+    'cursorclass': pymysql.cursors.DictCursor,
+    # UPDATE의 rowcount가 "변경된 행"이 아니라 "조건에 맞은 행" 수가 되도록 합니다.
+    # 같은 값으로 UPDATE해도 1이 나오므로 rowcount == 0 을 "없음/권한 없음"으로 판단할 수 있습니다.
+    'client_flag': CLIENT.FOUND_ROWS,
 }
 
 
+# 요청/DB/템플릿 계측. 값은 /metrics 에서 Prometheus 텍스트 형식으로 확인합니다.
+# 프로세스마다 METRICS_DIR(기본값: 시스템 임시 디렉터리)에 스냅숏을 기록하고 /metrics가 이를 합칩니다.
+metrics_registry = MetricsRegistry()
+REQUEST_LATENCY = metrics_registry.histogram(
+    'app_request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method'))
+REQUEST_COUNT = metrics_registry.counter(
+    'app_requests_total', 'Requests by endpoint and status', ('endpoint', 'method', 'status'))
+REQUEST_DB_QUERIES = metrics_registry.histogram(
+    'app_request_db_queries', 'DB queries executed per request', ('endpoint',), QUERY_COUNT_BUCKETS)
+REQUEST_DB_TIME = metrics_registry.histogram(
+    'app_request_db_seconds', 'Time spent executing DB queries per request', ('endpoint',))
+DB_POOL_WAIT = metrics_registry.histogram(
+    'app_db_pool_wait_seconds', 'Time spent waiting for a free pooled DB connection')
+TEMPLATE_RENDER = metrics_registry.histogram(
+    'app_template_render_seconds', 'Template render time', ('template',))
+metrics_exporter = MultiprocessExporter(
+    metrics_registry,
+    directory=os.getenv('METRICS_DIR'),
+    interval=float(os.getenv('METRICS_FLUSH_INTERVAL', '5')),
+)
+# /metrics에 접근할 수 있는 주소/대역 (쉼표 구분). 기본값은 같은 서버(loopback)뿐이며, 다른 서버의
+# Prometheus가 수집한다면 METRICS_ALLOW=10.10.8.0/24 처럼 추가합니다. 비워 두면 /metrics를 끕니다.
+METRICS_ALLOW = [ipaddress.ip_network(item.strip(), strict=False)
+                 for item in os.getenv('METRICS_ALLOW', '127.0.0.1,::1').split(',') if item.strip()]
+# 설정하면 /metrics 요청에 'Authorization: Bearer <METRICS_TOKEN>' 헤더도 필요합니다.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+# 선택한 요청만 cProfile/스택 샘플러로 프로파일링합니다. (profiler.py 참고)
+# PROFILE_SECRET이 있어야 X-Profile 헤더 토큰을 받으며, PROFILE_SAMPLE_RATE(0~1)는 기본 0(표본 없음)입니다.
+# 결과는 분당 PROFILE_MAX_PER_MINUTE개(프로세스마다), PROFILE_DIR 전체 PROFILE_MAX_MB까지만 남깁니다.
+request_profiler = RequestProfiler(
+    os.getenv('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'your_flask_app_profiles'),
+    secret=os.getenv('PROFILE_SECRET'),
+    sample_rate=float(os.getenv('PROFILE_SAMPLE_RATE', '0')),
+    endpoints=[name.strip() for name in os.getenv('PROFILE_ENDPOINTS', '').split(',') if name.strip()],
+    max_per_minute=int(os.getenv('PROFILE_MAX_PER_MINUTE', '6')),
+    max_bytes=int(os.getenv('PROFILE_MAX_MB', '100')) * 1024 * 1024,
+    toggle_path=os.getenv('PROFILE_TOGGLE_FILE'),
+)
+
+
+def record_pool_wait(seconds):
+    metrics_registry.observe(DB_POOL_WAIT, (), seconds)
+
+
+def record_query(seconds, query=None, args=None):
+    """현재 요청의 DB 쿼리 수와 시간을 누적합니다. 요청 밖(CLI 등)에서 실행된 쿼리는 건너뜁니다."""
+    if has_app_context() and 'request_started' in g:
+        g.db_queries += 1
+        g.db_time += seconds
+        if 'profile' in g:
+            g.profile.queries.append((seconds, query))
+
+
+def record_commit():
+    """현재 요청이 주 DB에 쓰기를 커밋했음을 기록합니다. (read-your-writes 고정에 사용)"""
+    if has_app_context() and 'request_started' in g:
+        g.db_committed = True
+
+
+class QueryBudgetExceeded(Exception):
+    """라우트가 선언한 DB 쿼리 수(query_budget)를 넘었을 때 발생합니다. (QUERY_BUDGET_ENFORCE=1일 때)"""
+
+
+# 엔드포인트 이름 -> 한 요청에서 허용하는 DB 쿼리(왕복) 수
+QUERY_BUDGETS = {}
+# 1이면 예산을 넘은 요청을 예외로 실패시킵니다(테스트/벤치마크용). 0이면 경고 로그만 남깁니다.
+QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', '0') == '1'
+
+
+def query_budget(limit):
+    """라우트가 한 요청에서 실행할 수 있는 최대 DB 쿼리 수를 선언합니다. @app.route 아래에 붙입니다."""
+    def decorator(view):
+        QUERY_BUDGETS[view.__name__] = limit
+        return view
+    return decorator
+
+
+# 부하 차단: 쿼리 예산이 1 이상인 라우트를 'DB를 쓰는 요청'으로 보고, 프로세스당 동시에 실행하는 수를
+# ADMISSION_MAX_DB_REQUESTS개로 제한합니다. 기본값은 mod_wsgi 스레드 수(5)보다 하나 적게 두어
+# DB가 멈춰도 스레드 하나는 '/', '/logout', 정적 파일 같은 DB가 필요 없는 요청을 처리할 수 있게 합니다.
+# 0이면 제한하지 않습니다. 자리가 없으면 ADMISSION_WAIT초까지만 기다린 뒤 503으로 응답합니다.
+db_admission = AdmissionController(
+    max_concurrent=int(os.getenv('ADMISSION_MAX_DB_REQUESTS', '4')),
+    wait=float(os.getenv('ADMISSION_WAIT', '0')),
+)
+# 503 응답의 Retry-After(초)
+ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '2'))
+
+# 사용자(로그인 전에는 IP)별 토큰 버킷: 초당 USER_RATE_LIMIT개씩 채워져 USER_RATE_BURST개까지 쌓입니다.
+# DB를 쓰는 요청마다 토큰을 쓰며(기본 1개, rate_cost로 변경), 부족하면 429로 응답합니다. 0이면 제한하지 않습니다.
+user_limiter = TokenBucketLimiter(
+    rate=float(os.getenv('USER_RATE_LIMIT', '5')),
+    burst=float(os.getenv('USER_RATE_BURST', '20')),
+)
+
+# 엔드포인트 이름 -> 요청 한 번에 쓰는 토큰 수 (숫자 또는 현재 요청을 보고 계산하는 함수).
+# 0이면 그 요청은 DB를 쓰지 않는 것으로 보고 토큰 버킷과 동시 실행 제한 없이 받아들입니다.
+RATE_COSTS = {}
+
+
+def rate_cost(cost):
+    """DB를 많이 쓰는 라우트가 사용자 토큰 버킷에서 쓸 토큰 수를 선언합니다. @app.route 아래에 붙입니다."""
+    def decorator(view):
+        RATE_COSTS[view.__name__] = cost
+        return view
+    return decorator
+
+
+# 요청마다 새 연결을 맺지 않도록 프로세스 단위의 연결 풀을 사용합니다.
+# 기본 크기는 mod_wsgi 데몬의 스레드 수(threads=5)에 맞춥니다.
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    max_size=int(os.getenv('DB_POOL_SIZE', '5')),
+    timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+    recycle=int(os.getenv('DB_POOL_RECYCLE', '3600')),
+    ping_interval=int(os.getenv('DB_POOL_PING_INTERVAL', '30')),
+    on_acquire=record_pool_wait,
+    on_query=record_query,
+    on_commit=record_commit,
+)
+
+# 읽기 전용 라우트의 조회를 보낼 복제 DB 목록 ('host:port,host2:port'). 비워 두면 모두 주 DB를 사용합니다.
+# 로컬에서는 MariaDB 두 개를 띄워 DB_PORT=3306 DB_REPLICAS=127.0.0.1:3307 처럼 시험할 수 있습니다.
+DB_REPLICAS = parse_replicas(os.getenv('DB_REPLICAS', ''), DB_CONFIG['port'])
+# 쓰기를 한 세션은 이 시간(초) 동안 읽기도 주 DB에서 하여 자신이 쓴 내용을 바로 보게 합니다.
+READ_YOUR_WRITES_SECONDS = int(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+# 복제 DB에서 읽은 값을 캐시하거나 ETag로 재사용하는 최대 시간(초). 복제 지연으로 인한 오래된 값이
+# 이 시간보다 오래 남지 않도록 합니다.
+REPLICA_STALENESS_SECONDS = int(os.getenv('REPLICA_STALENESS_SECONDS', '10'))
+
+db_router = ReplicaRouter(
+    db_pool,
+    [(f"{host}:{port}", ConnectionPool(
+        dict(DB_CONFIG, host=host, port=port,
+             connect_timeout=int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', '2'))),
+        max_size=int(os.getenv('DB_REPLICA_POOL_SIZE', os.getenv('DB_POOL_SIZE', '5'))),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        recycle=int(os.getenv('DB_POOL_RECYCLE', '3600')),
+        ping_interval=int(os.getenv('DB_POOL_PING_INTERVAL', '30')),
+        on_acquire=record_pool_wait,
+        on_query=record_query,
+    )) for host, port in DB_REPLICAS],
+    eject_seconds=float(os.getenv('DB_REPLICA_EJECT_SECONDS', '30')),
+    acquire_timeout=float(os.getenv('DB_REPLICA_ACQUIRE_TIMEOUT', '0.5')),
+)
+
+# 일기/To-Do를 사용자별로 나누어 둘 샤드 DB 목록 ('s1=host:port/db,s2=host2:port'). 비워 두면 모두 주 DB를 사용합니다.
+# 로컬에서는 MariaDB를 여러 개 띄워 DB_SHARDS=s1=127.0.0.1:3307,s2=127.0.0.1:3308 처럼 시험할 수 있습니다.
+DB_SHARDS = parse_shards(os.getenv('DB_SHARDS', ''), DB_CONFIG['port'])
+# 새 사용자를 배치할 샤드 이름 목록 (쉼표 구분). 비워 두면 주 DB('main')와 DB_SHARDS 전체에 나누어 둡니다.
+DB_SHARD_PLACEMENT = [name.strip() for name in os.getenv('DB_SHARD_PLACEMENT', '').split(',') if name.strip()]
+
+shard_map = ShardMap(
+    db_pool,
+    [(name, ConnectionPool(
+        dict(DB_CONFIG, host=host, port=port, db=db or DB_CONFIG['db']),
+        max_size=int(os.getenv('DB_SHARD_POOL_SIZE', os.getenv('DB_POOL_SIZE', '5'))),
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', '5')),
+        recycle=int(os.getenv('DB_POOL_RECYCLE', '3600')),
+        ping_interval=int(os.getenv('DB_POOL_PING_INTERVAL', '30')),
+        on_acquire=record_pool_wait,
+        on_query=record_query,
+    )) for name, host, port, db in DB_SHARDS],
+    placement=DB_SHARD_PLACEMENT,
+)
+
+# 비밀번호 해싱은 요청 스레드 대신 크기가 제한된 프로세스 풀에서 실행합니다.
+# PASSWORD_HASH_METHOD를 바꾸면(예: 'scrypt:65536:8:1', 'pbkdf2:sha256:1000000') 기존 해시는
+# 사용자가 다음에 로그인할 때 새 설정으로 다시 저장됩니다.
+password_hasher = PasswordHasher(
+    method=os.getenv('PASSWORD_HASH_METHOD', 'scrypt'),
+    salt_length=int(os.getenv('PASSWORD_SALT_LENGTH', '16')),
+    workers=int(os.getenv('HASH_WORKERS', '2')),
+    max_queue=int(os.getenv('HASH_QUEUE_MAX', '8')),
+    timeout=float(os.getenv('HASH_TIMEOUT', '10')),
+    mp_context=os.getenv('HASH_MP_CONTEXT', 'forkserver'),
+    python_executable=os.getenv('HASH_PYTHON'),
+)
+
+# To-Do 항목이 가질 수 있는 상태 (todos.status ENUM과 동일)
+TODO_STATUSES = ['미완료', '진행중', '완료', '기간연장']
+# 끝난 일로 보는 상태 (마감일이 지나도 '기한 지남'으로 세지 않습니다)
+TODO_DONE_STATUS = '완료'
+# 마감일을 재조정할 때의 상태 변화: 완료 -> 미완료(다시 할 일로), 기간연장은 유지, 미완료/진행중 -> 진행중
+RESCHEDULE_STATUS_SQL = "CASE status WHEN '완료' THEN '미완료' WHEN '기간연장' THEN '기간연장' ELSE '진행중' END"
+# 일괄 처리 요청 한 번에 다룰 수 있는 최대 To-Do 항목 수
+TODO_BULK_MAX = 500
+
+# 게시판 목록 한 페이지에 표시할 게시글 수 (?size= 로 변경 가능, 최대 100)
+BOARD_PAGE_SIZE = int(os.getenv('BOARD_PAGE_SIZE', '20'))
+# 목록에서는 본문 전체 대신 앞부분만 보여줍니다. (템플릿에서 truncate(100) 적용)
+# board_summary.excerpt 컬럼 길이(migrations/0005_board_summary.sql)와 같아야 합니다.
+BOARD_EXCERPT_CHARS = 120
+
+# 게시글 상세 페이지 한 번에 표시할 댓글 수 (?comments_size= 로 변경 가능, 최대 100)
+COMMENT_PAGE_SIZE = int(os.getenv('COMMENT_PAGE_SIZE', '50'))
+# 1로 설정하면 게시글 상세 페이지를 스트리밍으로 응답하여 댓글을 읽는 동안 본문을 먼저 보냅니다.
+STREAM_VIEW_POST = os.getenv('STREAM_VIEW_POST', '0') == '1'
+
+# 내보내기(다운로드) 시 서버 측 커서에서 한 번에 읽을 행 수
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '500'))
+
+# 가져오기(업로드) 시 한 번에 저장할 행 수, 파일 하나에서 읽을 최대 행 수와 최대 크기(바이트)
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '10000'))
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))
+# DB가 거절한 행이 이 개수에 이르면 나머지 행은 가져오지 않습니다 (쿼리 예산 계산에도 사용)
+IMPORT_MAX_DB_ERRORS = int(os.getenv('IMPORT_MAX_DB_ERRORS', '10'))
+
+# 캐시 버전 파일은 모든 mod_wsgi 데몬 프로세스가 공유하며, 쓰기 경로에서 버전을 올려 무효화합니다.
+# 샤드(DB_SHARDS)를 쓸 때는 db_shards.py가 사용자를 옮긴 뒤 이 파일로 웹 프로세스에 알리므로 반드시 지정하세요.
+# 기본 경로(임시 디렉터리)는 Apache의 PrivateTmp 때문에 명령줄과 웹 프로세스가 서로 다른 파일을 볼 수 있습니다.
+# (예: CACHE_VERSION_FILE=/var/lib/your_flask_app/cache.versions, www-data와 관리자가 쓸 수 있는 곳)
+CACHE_VERSION_FILE = os.getenv('CACHE_VERSION_FILE', '')
+if shard_map.sharded and not CACHE_VERSION_FILE:
+    raise RuntimeError("DB_SHARDS를 사용하려면 CACHE_VERSION_FILE에 웹 프로세스와 db_shards.py가 함께 쓰는 경로를 지정해야 합니다.")
+cache_versions = VersionCounter(CACHE_VERSION_FILE or default_version_path('cache'))
+
+# 게시글 본문/댓글 목록 읽기 캐시
+post_cache = ReadThroughCache(
+    cache_versions,
+    max_entries=int(os.getenv('POST_CACHE_MAX_ENTRIES', '1024')),
+    ttl=int(os.getenv('POST_CACHE_TTL', '300')),
+)
+
+# 사용자/월별 일기 작성 여부 비트맵 캐시 (bit n-1 = n일에 일기 있음)
+# 사용자/연도별 비트맵(bit n = 그해 n+1번째 날, diary_year.py)도 같은 캐시에 둡니다.
+diary_cache = ReadThroughCache(
+    cache_versions,
+    max_entries=int(os.getenv('DIARY_CACHE_MAX_ENTRIES', '4096')),
+    ttl=int(os.getenv('DIARY_CACHE_TTL', '3600')),
+)
+
+# 사용자/날짜별 메인 페이지 요약 캐시 (user_summary.py). 쓰기 경로가 update_dashboard()로 갱신합니다.
+dashboard_cache = ReadThroughCache(
+    cache_versions,
+    max_entries=int(os.getenv('DASHBOARD_CACHE_MAX_ENTRIES', '4096')),
+    ttl=int(os.getenv('DASHBOARD_CACHE_TTL', '3600')),
+)
+
+# 템플릿이나 정적 파일이 바뀌면 기존 ETag가 모두 무효가 되도록 ETag에 포함합니다.
+TEMPLATE_BUILD = template_build_id(os.path.join(app.root_path, 'templates'), os.path.join(app.root_path, 'static'))
+
+# 지문(내용 해시)이 붙은 정적 파일 목록. 템플릿에서는 asset_url('css/common.css')로 참조합니다.
+asset_manifest = AssetManifest(os.path.join(app.root_path, 'static'))
+
+# 일정 크기(GZIP_MIN_SIZE 바이트) 이상인 HTML 응답은 gzip으로 압축합니다.
+app.wsgi_app = GzipMiddleware(app.wsgi_app, min_size=int(os.getenv('GZIP_MIN_SIZE', '1024')))
+
+# 게시글 검색 백엔드 ('ngram': board_ngrams 테이블, 'memory': 로컬 테스트용 메모리 색인)
+search_index = create_backend(os.getenv('SEARCH_BACKEND', 'ngram'))
+
+
 def get_db_connection():
-    """데이터베이스 연결을 설정하고 반환합니다."""
-    print("DEBUG: Attempting to get DB connection...") # 디버깅용 로그
+    """
+    현재 요청에서 사용할 풀 연결을 반환합니다.
+    같은 요청 안에서는 하나의 연결을 재사용하며, conn.close()는 연결을 풀에 반납합니다.
+    """
+    conn = g.get('db_conn')
+    if conn is not None and not conn.released:
+        return conn
+    logger.debug("Attempting to get DB connection...")
     try:
-        conn = pymysql.connect(**DB_CONFIG)
-        print("DEBUG: DB connection successful!") # 디버깅용 로그
+        conn = db_pool.acquire()
+        g.db_conn = conn
+        logger.debug("DB connection successful!")
         return conn
     except pymysql.Error as e:
-        print(f"DEBUG: DB connection failed in get_db_connection: {e}") # 디버깅용 로그
+        logger.error("DB connection failed in get_db_connection: %s", e)
         flash('데이터베이스 연결 오류가 발생했습니다. 잠시 후 다시 시도해주세요.', 'error')
         raise
 
+
+def reads_from_replica():
+    """이 요청의 읽기를 복제 DB로 보낼지 여부. 복제 DB가 없거나 최근에 쓰기를 한 세션이면 False입니다."""
+    return bool(db_router.replicas) and session.get('primary_until', 0) <= time.time()
+
+
+def get_read_connection():
+    """
+    읽기 전용 조회에 사용할 연결을 반환합니다. 복제 DB가 설정되어 있으면 복제 DB에서 빌려오고,
+    최근에 쓰기를 한 세션이거나 사용할 수 있는 복제 DB가 없으면 get_db_connection()과 같습니다.
+    이 연결로는 쓰기를 하지 마세요.
+    """
+    if not reads_from_replica():
+        return get_db_connection()
+    conn = g.get('db_read_conn')
+    if conn is not None and not conn.released:
+        return conn
+    conn = db_router.acquire_read()
+    if conn is None:
+        return get_db_connection()
+    g.db_read_conn = conn
+    return conn
+
+
+def read_cache_ttl():
+    """복제 DB에서 읽은 값은 REPLICA_STALENESS_SECONDS 동안만 캐시합니다. (None이면 캐시 기본값)"""
+    return REPLICA_STALENESS_SECONDS if reads_from_replica() else None
+
+
+def get_user_connection():
+    """
+    현재 사용자의 일기/To-Do(diaries, todos)를 읽고 쓸 연결을 반환합니다. 사용자가 주 DB에 있으면
+    get_db_connection()과 같고, 다른 샤드에 있으면 그 샤드의 연결을 요청 동안 재사용합니다.
+    @user_shard_route가 붙은 라우트에서만 사용하세요. 다른 테이블은 이 연결로 읽지 마세요.
+    """
+    shard = g.get('user_shard', MAIN_SHARD)
+    if shard == MAIN_SHARD:
+        return get_db_connection()
+    if shard is None:
+        raise ShardMoving(f"user {session.get('id')}")
+    conn = g.get('shard_conn')
+    if conn is not None and not conn.released:
+        return conn
+    try:
+        conn = shard_map.pool(shard).acquire()
+    except pymysql.Error as e:
+        logger.error("DB connection failed in get_user_connection (%s): %s", shard, e)
+        flash('데이터베이스 연결 오류가 발생했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        raise
+    g.shard_conn = conn
+    return conn
+
+
+def get_user_read_connection():
+    """일기/To-Do 조회용 연결. 주 DB에 있는 사용자는 get_read_connection()처럼 복제 DB를 쓸 수 있습니다."""
+    if g.get('user_shard', MAIN_SHARD) == MAIN_SHARD:
+        return get_read_connection()
+    return get_user_connection()
+
+
+def release_connections():
+    """이 요청에서 빌린 주 DB/복제 DB/샤드 연결을 풀에 반납합니다. 다시 필요하면 새로 빌려옵니다."""
+    for name in ('db_conn', 'db_read_conn', 'shard_conn'):
+        conn = g.get(name)
+        if conn is not None:
+            conn.close()
+
+
+@app.teardown_appcontext
+def release_db_connection(exc):
+    """요청이 끝날 때 반납되지 않은 연결을 풀로 돌려놓습니다."""
+    for name in ('db_conn', 'db_read_conn', 'shard_conn'):
+        conn = g.pop(name, None)
+        if conn is not None:
+            conn.close()
+
+
+@app.before_request
+def start_request_metrics():
+    g.request_started = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+    g.template_time = 0.0
+
+
+def overloaded(status, retry_after, message):
+    """요청을 처리하지 않고 돌려보내는 503/429 응답을 만듭니다."""
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        response = jsonify(error=message)
+    else:
+        response = app.response_class(message, mimetype='text/plain')
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.before_request
+def admit_request():
+    """DB를 쓰는 요청에 사용자 토큰 버킷과 프로세스 동시 실행 제한을 적용합니다."""
+    if QUERY_BUDGETS.get(request.endpoint, 0) == 0:
+        return None # DB가 필요 없는 요청은 항상 받아들입니다.
+    cost = RATE_COSTS.get(request.endpoint, 1)
+    if callable(cost):
+        cost = cost()
+    if cost == 0:
+        return None # 이번 요청은 DB를 쓰지 않습니다 (예: 로그인 전의 메인 페이지).
+    retry_after = user_limiter.take(session.get('id') or request.remote_addr, cost)
+    if retry_after:
+        return overloaded(429, retry_after, '요청이 너무 많습니다. 잠시 후 다시 시도해주세요.')
+    if not db_admission.try_acquire():
+        logger.warning("DB 요청 동시 실행 한도(%s) 초과로 거절: %s", db_admission.max_concurrent, request.endpoint)
+        return overloaded(503, ADMISSION_RETRY_AFTER, '서버가 바쁩니다. 잠시 후 다시 시도해주세요.')
+    g.admitted = True
+    return None
+
+
+# 엔드포인트 이름 -> 사용자가 다른 샤드로 옮겨지는 중일 때 503으로 거절할지 여부
+USER_SHARD_ENDPOINTS = {}
+
+
+def user_shard_route(required=True):
+    """
+    일기/To-Do를 get_user_connection()으로 읽고 쓰는 라우트에 붙입니다. @app.route 아래에 붙입니다.
+    required=False인 라우트는 이동 중에도 실행되며, 그동안 get_user_connection()이 ShardMoving을 발생시킵니다.
+    """
+    def decorator(view):
+        USER_SHARD_ENDPOINTS[view.__name__] = required
+        return view
+    return decorator
+
+
+@app.before_request
+def resolve_user_shard():
+    """
+    로그인한 사용자의 일기/To-Do가 있는 샤드를 g.user_shard에 둡니다. 세션에 기록한 값을 쓰며,
+    db_shards.py가 사용자를 옮겨 샤드 버전이 바뀐 경우에만 users 테이블을 다시 읽습니다.
+    """
+    if not shard_map.sharded or request.endpoint not in USER_SHARD_ENDPOINTS or 'loggedin' not in session:
+        return None
+    user_id = session['id']
+    version = cache_versions.get(shard_version_key(user_id))
+    cached = session.get('shard')
+    if not cached or cached[0] != user_id or cached[1] != version:
+        # 버전을 읽은 뒤에 조회하므로, 그 사이에 옮겨지면 버전이 달라져 다음 요청이 다시 읽습니다.
+        try:
+            with get_db_connection().cursor() as cursor:
+                cursor.execute("SELECT shard, shard_moving_to FROM users WHERE id = %s", (user_id,))
+                row = cursor.fetchone() or {'shard': MAIN_SHARD, 'shard_moving_to': None}
+        except Exception as e:
+            logger.exception("사용자 %s 의 샤드 조회 실패: %s", user_id, e)
+            return overloaded(503, ADMISSION_RETRY_AFTER, '서버가 바쁩니다. 잠시 후 다시 시도해주세요.')
+        cached = [user_id, version, None if row['shard_moving_to'] else row['shard']]
+        session['shard'] = cached
+        g.query_allowance = 1 # 라우트가 아닌 샤드 조회이므로 쿼리 예산에서 뺍니다.
+    g.user_shard = cached[2]
+    if g.user_shard is None and USER_SHARD_ENDPOINTS[request.endpoint]:
+        return overloaded(503, ADMISSION_RETRY_AFTER, '데이터를 다른 서버로 옮기는 중입니다. 잠시 후 다시 시도해주세요.')
+    return None
+
+
+def lock_user_shard():
+    """
+    일기/To-Do 쓰기 트랜잭션에서 첫 쓰기 전에 호출합니다. 주 DB의 users 행을 FOR UPDATE로 잠그고, 이 요청이
+    쓰려는 샤드(g.user_shard)가 아직 사용자의 샤드인지 확인합니다. 옮기는 중이거나 이미 옮겨졌으면 ShardMoving을
+    발생시킵니다. db_shards.move_user()도 같은 행을 잠근 뒤에 이동을 표시하므로, 확인을 통과한 쓰기는 이동이
+    시작되기 전에 끝납니다. 주 DB에 있는 사용자는 잠금이 쓰기와 같은 트랜잭션이라 커밋하면 풀리므로, 커밋마다
+    다시 호출하세요. 다른 샤드에 있는 사용자는 샤드 쓰기를 커밋한 직후 release_user_shard_lock()으로 풉니다.
+    """
+    if not shard_map.sharded:
+        return
+    user_id = session['id']
+    with get_db_connection().cursor() as cursor:
+        cursor.execute("SELECT shard, shard_moving_to FROM users WHERE id = %s FOR UPDATE", (user_id,))
+        row = cursor.fetchone()
+    g.query_allowance = g.get('query_allowance', 0) + 1 # 라우트가 아닌 샤드 확인이므로 쿼리 예산에서 뺍니다.
+    g.user_shard_locked = True
+    if row is None or row['shard_moving_to'] or row['shard'] != g.get('user_shard', MAIN_SHARD):
+        session.pop('shard', None) # 다음 요청이 users 테이블을 다시 읽게 합니다.
+        raise ShardMoving(f"user {user_id}")
+
+
+def release_user_shard_lock():
+    """
+    lock_user_shard()가 주 DB에 잡은 users 행 잠금을 풉니다. 샤드 쓰기를 커밋한 뒤(또는 실패한 뒤)에 호출하며,
+    잠그지 않았거나 사용자가 주 DB에 있으면(잠금이 쓰기와 함께 커밋됨) 아무것도 하지 않습니다.
+    잠금 때문에 그 사용자의 다른 쓰기, 로그인 시 비밀번호 해시 갱신, move_user()가 기다리지 않게 합니다.
+    """
+    if not g.pop('user_shard_locked', False) or g.get('user_shard', MAIN_SHARD) == MAIN_SHARD:
+        return
+    conn = g.get('db_conn')
+    if conn is not None and not conn.released:
+        conn.rollback() # 잠금을 위한 SELECT만 실행한 트랜잭션입니다.
+
+
+@app.errorhandler(ShardMoving)
+def shard_moving(e):
+    return overloaded(503, ADMISSION_RETRY_AFTER, '데이터를 다른 서버로 옮기는 중입니다. 잠시 후 다시 시도해주세요.')
+
+
+@app.before_request
+def start_profile():
+    """X-Profile 헤더, 켜기 파일, 표본 비율 중 하나에 해당하는 요청의 프로파일링을 시작합니다."""
+    if request.endpoint in (None, 'asset', 'metrics'):
+        return
+    profile = request_profiler.start(request.endpoint, request.headers.get('X-Profile'))
+    if profile is not None:
+        g.profile = profile
+
+
+@app.after_request
+def add_profile_header(response):
+    if 'profile' in g:
+        response.headers['X-Profile-Id'] = g.profile.name # PROFILE_DIR에 이 이름으로 결과가 남습니다.
+    return response
+
+
+@app.teardown_request
+def finish_profile(exc):
+    """프로파일링을 끝내고 결과를 기록합니다. 스트리밍 응답은 본문 전송이 끝난 뒤에 기록됩니다."""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    try:
+        request_profiler.finish(profile, {
+            'endpoint': request.endpoint,
+            'method': request.method,
+            'path': request.path, # 쿼리 문자열(검색어 등)은 남기지 않고 이름만 기록합니다.
+            'args': sorted(request.args.keys()),
+            'status': 500 if exc is not None else g.get('response_status', 500),
+            'db_queries': g.get('db_queries', 0),
+            'db_seconds': g.get('db_time', 0.0),
+            'template_seconds': g.get('template_time', 0.0),
+        })
+    except Exception as e:
+        logger.exception("프로파일 결과를 기록하지 못했습니다: %s", e)
+
+
+@app.teardown_request
+def release_admission(exc):
+    # 스트리밍 응답은 Flask 버전에 따라 본문 전송이 끝난 뒤에 여기로 옵니다. 내보내기처럼 오래 걸릴 수 있는
+    # 응답은 본문을 보내기 전에 뷰에서 직접 자리를 돌려줍니다.
+    if g.pop('admitted', False):
+        db_admission.release()
+
+
+@app.after_request
+def remember_response_status(response):
+    g.response_status = response.status_code
+    return response
+
+
+@app.after_request
+def stick_to_primary(response):
+    """쓰기를 커밋한 세션은 READ_YOUR_WRITES_SECONDS 동안 읽기도 주 DB에서 하도록 표시합니다."""
+    if g.get('db_committed') and db_router.replicas:
+        session['primary_until'] = time.time() + READ_YOUR_WRITES_SECONDS
+    return response
+
+
+@app.after_request
+def check_query_budget(response):
+    """
+    선언한 쿼리 예산을 넘은 요청을 알립니다. 스트리밍 응답은 본문을 만들기 전까지의 쿼리만 셉니다.
+    """
+    limit = QUERY_BUDGETS.get(request.endpoint)
+    if limit is not None and g.get('db_queries', 0) > limit + g.get('query_allowance', 0):
+        message = f"{request.endpoint}: DB 쿼리 {g.db_queries}회 실행 (예산 {limit}회)"
+        if QUERY_BUDGET_ENFORCE:
+            raise QueryBudgetExceeded(message)
+        logger.warning("쿼리 예산 초과 - %s", message)
+    return response
+
+
+@app.teardown_request
+def record_request_metrics(exc):
+    """요청 지연 시간과 DB 사용량을 기록합니다. 스트리밍 응답은 본문 전송이 끝난 뒤에 기록됩니다."""
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    endpoint = request.endpoint or 'unmatched' # 404 등은 URL 대신 하나로 묶어 라벨 수를 제한합니다.
+    status = 500 if exc is not None else g.get('response_status', 500)
+    metrics_registry.observe(REQUEST_LATENCY, (endpoint, request.method), time.perf_counter() - started)
+    metrics_registry.inc(REQUEST_COUNT, (endpoint, request.method, str(status)))
+    metrics_registry.observe(REQUEST_DB_QUERIES, (endpoint,), g.db_queries)
+    metrics_registry.observe(REQUEST_DB_TIME, (endpoint,), g.db_time)
+
+
+@before_render_template.connect_via(app)
+def start_template_timer(sender, template, context, **extra):
+    g.setdefault('template_starts', []).append(time.perf_counter())
+
+
+@template_rendered.connect_via(app)
+def record_template_render(sender, template, context, **extra):
+    starts = g.get('template_starts')
+    if starts:
+        seconds = time.perf_counter() - starts.pop()
+        metrics_registry.observe(TEMPLATE_RENDER, (template.name or 'string',), seconds)
+        if not starts: # 다른 템플릿 안에서 렌더링한 템플릿은 바깥 시간에 이미 포함됩니다.
+            g.template_time = g.get('template_time', 0.0) + seconds
+
+
+def pool_connections():
+    stats = db_pool.stats()
+    return {('in_use',): stats['in_use'], ('idle',): stats['idle']}
+
+
+def replica_stat(field):
+    """복제 DB별 상태 중 하나를 {(복제 DB 이름,): 값} 형태로 반환합니다."""
+    return lambda: {(replica['name'],): int(replica[field]) for replica in db_router.stats()['replicas']}
+
+
+def cache_stat(field):
+    """post_cache/diary_cache/dashboard_cache 통계 중 하나를 {(캐시 이름,): 값} 형태로 반환합니다."""
+    return lambda: {('post',): post_cache.stats()[field], ('diary',): diary_cache.stats()[field],
+                    ('dashboard',): dashboard_cache.stats()[field]}
+
+
+metrics_registry.collector('app_db_pool_connections', 'Pooled DB connections by state', pool_connections, ('state',))
+metrics_registry.collector('app_db_pool_waits_total', 'Acquires that had to wait for a free connection',
+                           lambda: db_pool.stats()['waits'], kind='counter')
+metrics_registry.collector('app_db_pool_timeouts_total', 'Acquires that timed out',
+                           lambda: db_pool.stats()['timeouts'], kind='counter')
+metrics_registry.collector('app_db_pool_connects_total', 'New DB connections opened',
+                           lambda: db_pool.stats()['connects'], kind='counter')
+metrics_registry.collector('app_db_replica_healthy', 'Replica is in the read rotation (1) or ejected (0)',
+                           replica_stat('healthy'), ('replica',), aggregate='min') # 한 프로세스라도 빼면 0
+metrics_registry.collector('app_db_replica_ejections_total', 'Times a replica was ejected from the read rotation',
+                           replica_stat('ejections'), ('replica',), 'counter')
+metrics_registry.collector('app_db_replica_fallbacks_total', 'Reads sent to the primary because no replica was available',
+                           lambda: db_router.stats()['fallbacks'], kind='counter')
+metrics_registry.collector('app_admission_in_flight', 'DB-bound requests currently admitted',
+                           lambda: db_admission.stats()['in_flight'])
+metrics_registry.collector('app_admission_rejected_total', 'DB-bound requests shed with 503',
+                           lambda: db_admission.stats()['rejected'], kind='counter')
+metrics_registry.collector('app_rate_limited_total', 'Requests refused with 429 by the per-user token bucket',
+                           lambda: user_limiter.stats()['limited'], kind='counter')
+metrics_registry.collector('app_profiles_written_total', 'Request profiles written to PROFILE_DIR',
+                           lambda: request_profiler.stats()['written'], kind='counter')
+metrics_registry.collector('app_profiles_skipped_total', 'Profiling requests skipped by the rate limit or a busy profiler',
+                           lambda: request_profiler.stats()['skipped'], kind='counter')
+metrics_registry.collector('app_password_hash_rejected_total', 'Password hashing requests rejected while saturated',
+                           lambda: password_hasher.stats()['rejected'], kind='counter')
+metrics_registry.collector('app_cache_entries', 'Entries in the read cache', cache_stat('entries'), ('cache',))
+metrics_registry.collector('app_cache_hits_total', 'Read cache hits', cache_stat('hits'), ('cache',), 'counter')
+metrics_registry.collector('app_cache_misses_total', 'Read cache misses', cache_stat('misses'), ('cache',), 'counter')
+metrics_registry.collector('app_cache_evictions_total', 'Read cache evictions', cache_stat('evictions'), ('cache',), 'counter')
+
+
+@app.route('/metrics')
+@query_budget(0)
+def metrics():
+    """모든 mod_wsgi 프로세스의 측정값을 합쳐 Prometheus 텍스트 형식으로 반환합니다."""
+    try:
+        remote = ipaddress.ip_address(request.remote_addr or '')
+    except ValueError:
+        remote = None
+    if remote is None or not any(remote in network for network in METRICS_ALLOW):
+        return app.response_class('not found\n', status=404, mimetype='text/plain')
+    if METRICS_TOKEN and not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return app.response_class('forbidden\n', status=403, mimetype='text/plain')
+    return app.response_class(metrics_exporter.collect(), mimetype='text/plain; version=0.0.4')
+
+
+@lru_cache(maxsize=256)
+def month_grid(year, month):
+    """일요일부터 시작하는 월 달력(주 단위 날짜 목록)을 반환합니다. 결과는 메모이즈됩니다."""
+    cal = calendar.Calendar(firstweekday=6) # 일요일부터 시작
+    return tuple(tuple(week) for week in cal.monthdayscalendar(year, month))
+
+
+def month_range(year, month):
+    """해당 월의 [첫날, 다음 달 첫날) 날짜 범위를 반환합니다."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def diary_month_key(user_id, year, month):
+    return f'diary:{user_id}:{year:04d}-{month:02d}'
+
+
+def diary_year_key(user_id, year):
+    return f'diary:{user_id}:{year:04d}'
+
+
+def dashboard_key(user_id):
+    return f'dashboard:{user_id}'
+
+
+def update_dashboard(user_id, fn=None):
+    """
+    오늘 날짜의 메인 페이지 요약 캐시를 fn(summary)로 갱신합니다. 커밋 이후에 호출하세요.
+    fn은 두 번 적용해도 결과가 같아야 합니다(ReadThroughCache.update). fn이 없으면(바뀐 내용을 알 수 없거나
+    개수를 늘리는 쓰기) 무효화하여 다음 요청이 다시 읽게 합니다.
+    """
+    key = dashboard_key(user_id)
+    if fn is None:
+        dashboard_cache.invalidate(key)
+    else:
+        dashboard_cache.update((key, date.today()), key, fn)
+
+
+def mark_diary_days(user_id, days):
+    """새로 일기를 쓴 날짜들의 비트만 켜서 월/연도 비트맵 캐시를 갱신합니다. 커밋 이후에 호출하세요."""
+    today = date.today()
+    if today in days:
+        update_dashboard(user_id, lambda summary: user_summary.diary_written(summary, today, today))
+    months, years = {}, {}
+    for d in days:
+        months[(d.year, d.month)] = months.get((d.year, d.month), 0) | 1 << (d.day - 1)
+        years[d.year] = years.get(d.year, 0) | 1 << diary_year.day_index(d)
+    for (year, month), bits in months.items():
+        key = diary_month_key(user_id, year, month)
+        diary_cache.update(key, key, lambda old, bits=bits: old | bits)
+    for year, bits in years.items():
+        key = diary_year_key(user_id, year)
+        diary_cache.update(key, key, lambda old, bits=bits: old | bits)
+
+
+def todos_version_key(user_id):
+    return f'todos:{user_id}'
+
+
+def forget_moved_user(user_id):
+    """
+    db_shards.py가 사용자를 다른 샤드로 옮긴 뒤 호출합니다. To-Do id가 새로 매겨지므로 To-Do 목록과
+    요약 캐시, ETag를 무효화합니다. (일기 비트맵은 날짜만 담으므로 그대로 둡니다.)
+    """
+    cache_versions.bump(todos_version_key(user_id))
+    dashboard_cache.invalidate(dashboard_key(user_id))
+
+
+def page_etag(*version_keys, extra=()):
+    """
+    현재 사용자와 요청 URL 기준으로 페이지 ETag를 계산합니다. extra는 버전 키가 아닌 추가 구성 요소입니다.
+    복제 DB에서 읽는 요청은 버전이 같아도 REPLICA_STALENESS_SECONDS마다 ETag가 바뀌게 하여,
+    복제 지연 중에 읽은 내용이 새 버전의 ETag로 계속 재사용되지 않게 합니다.
+    """
+    if reads_from_replica():
+        extra = tuple(extra) + (int(time.time() // REPLICA_STALENESS_SECONDS),)
+    return make_etag(cache_versions, version_keys, session.get('id'), request.full_path, TEMPLATE_BUILD, *extra)
+
+
+def not_modified(etag):
+    """본문 없는 304 응답을 만듭니다."""
+    return set_validators(app.response_class(status=304), etag)
+
+@app.template_global()
+def asset_url(name):
+    """정적 파일의 지문 붙은 URL을 반환합니다."""
+    return url_for('asset', name=asset_manifest.url_path(name))
+
+
+@app.route('/assets/<path:name>')
+@query_budget(0)
+def asset(name):
+    """지문 붙은 정적 파일을 장기 캐시(immutable) 헤더와 함께 제공합니다."""
+    return asset_manifest.response(app.response_class, name)
+
 # --- 사용자 인증 관련 라우트 ---
 
 @app.route('/')
+@query_budget(2) # 일기/To-Do가 다른 샤드에 있는 사용자는 요약을 두 DB에서 나누어 읽습니다.
+@rate_cost(lambda: 1 if 'loggedin' in session else 0) # 로그인 폼만 보여줄 때는 DB를 쓰지 않습니다.
+@user_shard_route(required=False)
 def index():
     """
     메인 페이지를 렌더링합니다.
-    로그인 상태에 따라 다른 UI (인증 폼 또는 링크 메뉴)를 보여줍니다.
+    로그인 상태에 따라 다른 UI (인증 폼 또는 링크 메뉴와 요약)를 보여줍니다.
     """
     if 'loggedin' in session:
-        # 로그인 상태이면, 일기쓰기, 게시판, To-Do List 링크가 있는 메인 페이지를 보여줌
-        return render_template('main_logged_in.html', username=session['username'])
+        # 로그인 상태이면, 일기쓰기, 게시판, To-Do List 링크와 사용자 요약이 있는 메인 페이지를 보여줌
+        user_id = session['id']
+        today = date.today()
+
+        def load_summary():
+            user_conn = get_user_read_connection()
+            read_conn = get_read_connection()
+            with user_conn.cursor() as cursor:
+                if user_conn is read_conn:
+                    return user_summary.load(cursor, user_id, today, TODO_STATUSES, TODO_DONE_STATUS)
+                with read_conn.cursor() as posts_cursor:
+                    return user_summary.load(cursor, user_id, today, TODO_STATUSES, TODO_DONE_STATUS,
+                                             posts_cursor=posts_cursor)
+
+        summary = None
+        try:
+            key = dashboard_key(user_id)
+            summary = dashboard_cache.get_or_load((key, today), key, load_summary, read_cache_ttl())
+        except ShardMoving:
+            logger.info("사용자 %s 의 데이터를 옮기는 중이라 요약 없이 메인 페이지를 보여줍니다.", user_id)
+        except Exception as e:
+            # 요약을 읽지 못해도 링크 메뉴는 보여줍니다.
+            logger.exception("메인 페이지 요약을 불러오는 데 오류 발생: %s", e)
+        finally:
+            release_connections()
+        return render_template('main_logged_in.html', username=session['username'], summary=summary,
+                               today=today)
     # 로그아웃 상태이면, 로그인/회원가입 폼이 있는 기본 페이지를 보여줌
     return render_template('default.html')
 
 
 @app.route('/register', methods=['POST'])
+@query_budget(1)
 def register():
     """사용자 등록을 처리합니다."""
     username = request.form['username'].strip()
@@ -80,25 +874,34 @@ def register():
         flash('사용자 이름과 비밀번호를 비워둘 수 없습니다.', 'error')
         return redirect(url_for('index'))
 
-    hashed_password = generate_password_hash(password)
+    try:
+        hashed_password = password_hasher.hash(password)
+    except HasherBusy as e:
+        logger.warning("회원가입 요청 거절 (해싱 포화): %s", e)
+        flash('요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        return redirect(url_for('index'))
 
     conn = None
     try:
         conn = get_db_connection()
         with conn.cursor() as cursor:
-            # 사용자 이름 중복 확인
-            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-            if cursor.fetchone():
-                flash('이미 존재하는 사용자 이름입니다. 다른 이름을 선택해주세요.', 'error')
-                return redirect(url_for('index'))
-
-            # 새 사용자 삽입
-            sql = "INSERT INTO users (username, password) VALUES (%s, %s)"
-            cursor.execute(sql, (username, hashed_password))
+            # 사용자 이름 중복은 username의 UNIQUE 키가 막으므로 미리 조회하지 않습니다.
+            if shard_map.sharded:
+                sql = "INSERT INTO users (username, password, shard) VALUES (%s, %s, %s)"
+                cursor.execute(sql, (username, hashed_password, shard_map.place(username)))
+            else: # 샤드를 쓰지 않으면 0006_user_shards 마이그레이션 없이도 가입할 수 있습니다.
+                sql = "INSERT INTO users (username, password) VALUES (%s, %s)"
+                cursor.execute(sql, (username, hashed_password))
         conn.commit() # 트랜잭션 커밋
         flash('회원가입에 성공했습니다! 이제 로그인할 수 있습니다.', 'success')
+    except pymysql.err.IntegrityError as e:
+        if e.args[0] != ER.DUP_ENTRY:
+            logger.exception("데이터베이스 오류 (회원가입): %s", e)
+            flash('회원가입에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        else:
+            flash('이미 존재하는 사용자 이름입니다. 다른 이름을 선택해주세요.', 'error')
     except Exception as e:
-        print(f"데이터베이스 오류 (회원가입): {e}") # 디버깅용 로그
+        logger.exception("데이터베이스 오류 (회원가입): %s", e)
         flash('회원가입에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
@@ -106,14 +909,15 @@ def register():
     return redirect(url_for('index'))
 
 @app.route('/login', methods=['POST'])
+@query_budget(2)
 def login():
     """사용자 로그인을 처리합니다."""
     username = request.form['username'].strip()
     password = request.form['password'].strip()
-    print(f"DEBUG: 로그인 시도 사용자: {username}") # 디버깅용 로그
+    logger.debug("로그인 시도 사용자: %s", username)
 
     if not username or not password:
-        print("DEBUG: 로그인 시도: 사용자 이름 또는 비밀번호가 비어 있습니다.") # 디버깅용 로그
+        logger.debug("로그인 시도: 사용자 이름 또는 비밀번호가 비어 있습니다.")
         flash('사용자 이름과 비밀번호를 모두 입력해주세요.', 'error')
         return redirect(url_for('index'))
 
@@ -124,36 +928,70 @@ def login():
             sql = "SELECT id, username, password FROM users WHERE username = %s"
             cursor.execute(sql, (username,))
             user = cursor.fetchone()
-
-            if user and check_password_hash(user['password'], password):
-                session['loggedin'] = True
-                session['id'] = user['id']
-                session['username'] = user['username']
-                print(f"DEBUG: 사용자 {username} 로그인 성공. 대시보드로 리디렉션.") # 디버깅용 로그
-                flash(f'환영합니다, {user["username"]}님!', 'success')
-                return redirect(url_for('dashboard')) # 로그인 성공 시 대시보드로 리디렉션
-            else:
-                print(f"DEBUG: 사용자 {username} 로그인 실패: 잘못된 자격 증명.") # 디버깅용 로그
-                flash('잘못된 사용자 이름 또는 비밀번호입니다. 다시 시도해주세요.', 'error')
+        # 해시 검증은 오래 걸리므로 그동안 연결을 풀에 돌려놓습니다.
+        conn.close()
+
+        if user and password_hasher.verify(user['password'], password):
+            if password_hasher.needs_rehash(user['password']):
+                upgrade_password_hash(user, password)
+            session['loggedin'] = True
+            session['id'] = user['id']
+            session['username'] = user['username']
+            logger.debug("사용자 %s 로그인 성공. 대시보드로 리디렉션.", username)
+            flash(f'환영합니다, {user["username"]}님!', 'success')
+            return redirect(url_for('dashboard')) # 로그인 성공 시 대시보드로 리디렉션
+        else:
+            logger.info("사용자 %s 로그인 실패: 잘못된 자격 증명.", username)
+            flash('잘못된 사용자 이름 또는 비밀번호입니다. 다시 시도해주세요.', 'error')
+    except HasherBusy as e:
+        logger.warning("로그인 요청 거절 (해싱 포화): %s", e)
+        flash('로그인 요청이 많아 처리하지 못했습니다. 잠시 후 다시 시도해주세요.', 'error')
     except Exception as e:
-        print(f"DEBUG: 로그인 처리 중 일반 오류: {e}") # 디버깅용 로그
+        logger.exception("로그인 처리 중 일반 오류: %s", e)
         flash('로그인에 실패했습니다. 서버 오류입니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
             conn.close()
-            print("DEBUG: 로그인 라우트에서 DB 연결 닫음.") # 디버깅용 로그
+            logger.debug("로그인 라우트에서 DB 연결 닫음.")
     return redirect(url_for('index'))
 
+
+def upgrade_password_hash(user, password):
+    """
+    로그인에 성공한 사용자의 해시를 현재 설정(method/cost)으로 다시 저장합니다.
+    실패해도 로그인은 그대로 진행하며, 다음 로그인 때 다시 시도합니다.
+    """
+    conn = None
+    try:
+        new_hash = password_hasher.hash(password)
+        conn = get_db_connection()
+        with conn.cursor() as cursor:
+            # 그 사이 비밀번호가 바뀌었다면 덮어쓰지 않습니다.
+            cursor.execute("UPDATE users SET password = %s WHERE id = %s AND password = %s",
+                           (new_hash, user['id'], user['password']))
+        conn.commit()
+        logger.info("사용자 %s 의 비밀번호 해시를 %s 로 갱신했습니다.", user['id'], password_hasher.canonical_method)
+    except HasherBusy:
+        logger.debug("해싱 포화로 사용자 %s 의 해시 갱신을 미룹니다.", user['id'])
+    except Exception as e:
+        logger.exception("비밀번호 해시 갱신 실패: %s", e)
+    finally:
+        if conn:
+            conn.close()
+
 @app.route('/logout')
+@query_budget(0)
 def logout():
     """현재 사용자를 로그아웃합니다."""
     session.pop('loggedin', None)
     session.pop('id', None)
     session.pop('username', None)
+    session.pop('shard', None)
     flash('성공적으로 로그아웃되었습니다.', 'success')
     return redirect(url_for('index'))
 
 @app.route('/dashboard')
+@query_budget(0)
 def dashboard():
     """
     로그인한 사용자에게는 메인 페이지로 리디렉션하고,
@@ -168,41 +1006,70 @@ def dashboard():
 # --- 게시판 관련 라우트 ---
 
 @app.route('/board')
+@query_budget(2)
+@rate_cost(lambda: 5 if request.args.get('query') else 1) # n-gram 검색은 목록보다 비쌉니다.
 def board_list():
     """검색 기능을 포함한 게시글 목록을 표시합니다."""
     if 'loggedin' not in session:
         flash('게시판을 보려면 로그인해야 합니다.', 'error')
         return redirect(url_for('index'))
 
+    # 게시글이 작성/수정/삭제되지 않았다면 쿼리와 렌더링 없이 304로 응답합니다.
+    etag = page_etag('board')
+    if is_not_modified(etag):
+        return not_modified(etag)
+
     search_query = request.args.get('query', '').strip()
+    page_size = clamp_page_size(request.args.get('size'), BOARD_PAGE_SIZE)
+    size_arg = page_size if page_size != BOARD_PAGE_SIZE else None
 
     conn = None
     posts = []
+    next_url = prev_url = None
     try:
-        conn = get_db_connection()
+        conn = get_read_connection()
         with conn.cursor() as cursor:
-            sql = "SELECT b.id, b.title, b.content, b.created_at, b.updated_at, u.username " \
-                  "FROM board b JOIN users u ON b.user_id = u.id"
-            params = []
+            # 쓰기 경로가 함께 갱신하는 요약 테이블만 읽습니다. (board/users 조인, 댓글 수 집계 없음)
+            sql = "SELECT id, title, username, excerpt, comment_count, created_at, updated_at FROM board_summary"
 
             if search_query:
-                sql += " WHERE b.title LIKE %s OR b.content LIKE %s"
-                params.append(f"%{search_query}%")
-                params.append(f"%{search_query}%")
-
-            sql += " ORDER BY b.created_at DESC" # 정렬 기준은 최신순 유지
-
-            cursor.execute(sql, params) # 파라미터화된 쿼리 실행
-            posts = cursor.fetchall()
+                # n-gram 색인에서 점수순으로 한 페이지 분량의 게시글 id를 찾은 뒤 해당 글만 조회합니다.
+                page = max(request.args.get('page', 1, type=int), 1)
+                hits = search_index.search(cursor, search_query, page_size + 1, (page - 1) * page_size)
+                has_next = len(hits) > page_size
+                ranked_ids = [post_id for post_id, _ in hits[:page_size]]
+                if ranked_ids:
+                    placeholders = ", ".join(["%s"] * len(ranked_ids))
+                    cursor.execute(sql + f" WHERE id IN ({placeholders})", ranked_ids)
+                    by_id = {row['id']: row for row in cursor.fetchall()}
+                    posts = [by_id[post_id] for post_id in ranked_ids if post_id in by_id]
+                if page > 1:
+                    prev_url = url_for('board_list', query=search_query, size=size_arg, page=page - 1)
+                if has_next:
+                    next_url = url_for('board_list', query=search_query, size=size_arg, page=page + 1)
+            else:
+                # 최신순 정렬을 유지하면서 (created_at, id) 키셋으로 페이지를 나눕니다.
+                result = fetch_keyset_page(cursor, sql, [], [], 'created_at', 'id',
+                                           page_size, descending=True,
+                                           after=request.args.get('after'), before=request.args.get('before'))
+                posts = result.rows
+                if result.prev_cursor:
+                    prev_url = url_for('board_list', size=size_arg, before=result.prev_cursor)
+                if result.next_cursor:
+                    next_url = url_for('board_list', size=size_arg, after=result.next_cursor)
     except Exception as e:
-        print(f"데이터베이스 오류 (게시글 불러오기 및 검색): {e}")
+        logger.exception("데이터베이스 오류 (게시글 불러오기 및 검색): %s", e)
         flash('게시판 글을 불러오는 데 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        etag = None # 오류 화면이 브라우저에 캐시되지 않도록 합니다.
     finally:
         if conn:
             conn.close()
-    return render_template('board_list.html', posts=posts, username=session['username'], search_query=search_query)
+    return set_validators(make_response(render_template('board_list.html', posts=posts, username=session['username'],
+                                                        search_query=search_query,
+                                                        next_url=next_url, prev_url=prev_url)), etag)
 
 @app.route('/board/write', methods=['GET', 'POST'])
+@query_budget(4)
 def write_post():
     """새 게시글 작성을 처리합니다."""
     if 'loggedin' not in session:
@@ -224,53 +1091,108 @@ def write_post():
             with conn.cursor() as cursor:
                 sql = "INSERT INTO board (user_id, title, content) VALUES (%s, %s, %s)"
                 cursor.execute(sql, (user_id, title, content))
+                post_id = cursor.lastrowid
+                search_index.index_post(cursor, post_id, title, content)
+                board_summary.insert_post(cursor, post_id, BOARD_EXCERPT_CHARS)
             conn.commit()
+            search_index.commit()
+            cache_versions.bump('board')
+            update_dashboard(user_id, lambda summary: user_summary.post_written(summary, post_id, title))
             flash('게시글이 성공적으로 작성되었습니다!', 'success')
         except Exception as e:
-            print(f"데이터베이스 오류 (게시글 작성): {e}")
+            logger.exception("데이터베이스 오류 (게시글 작성): %s", e)
             flash('게시글 작성에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
         finally:
+            search_index.rollback()
             if conn:
                 conn.close()
         return redirect(url_for('board_list'))
     return render_template('write_post.html', username=session['username'])
 
 @app.route('/board/view/<int:post_id>')
+@query_budget(2)
 def view_post(post_id):
     """단일 게시글과 해당 댓글을 표시합니다."""
     if 'loggedin' not in session:
         flash('게시글을 보려면 로그인해야 합니다.', 'error')
         return redirect(url_for('index'))
 
-    conn = None
+    etag = page_etag(f'post:{post_id}', f'comments:{post_id}')
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    page_size = clamp_page_size(request.args.get('comments_size'), COMMENT_PAGE_SIZE)
+    after = request.args.get('comments_after')
+    before = request.args.get('comments_before')
+    # 이전 댓글 페이지는 역순으로 읽어 뒤집어야 하므로 스트리밍하지 않습니다.
+    stream = STREAM_VIEW_POST and not before
+
     post = None
-    comments = []
-    try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
+    conn = None
+    comments = Page([], None, None)
+    sql_comments = "SELECT c.id, c.content, c.created_at, u.username, c.user_id " \
+                   "FROM comments c JOIN users u ON c.user_id = u.id"
+
+    def load_post():
+        with get_read_connection().cursor() as cursor:
             sql_post = "SELECT b.id, b.title, b.content, b.created_at, b.updated_at, b.user_id, u.username " \
                        "FROM board b JOIN users u ON b.user_id = u.id WHERE b.id = %s"
             cursor.execute(sql_post, (post_id,))
-            post = cursor.fetchone()
+            return cursor.fetchone()
 
-            if not post:
-                flash('게시글을 찾을 수 없습니다.', 'error')
-                return redirect(url_for('board_list'))
+    def load_comments():
+        with get_read_connection().cursor() as cursor:
+            # 댓글은 (created_at, id) 키셋으로 오래된 순서대로 한 페이지씩 가져옵니다.
+            return fetch_keyset_page(cursor, sql_comments, ["c.board_id = %s"], [post_id],
+                                     'c.created_at', 'c.id', page_size, descending=False,
+                                     after=after, before=before)
+
+    try:
+        # 캐시에 모두 있으면 DB 연결 없이 응답합니다.
+        post = post_cache.get_or_load(('post', post_id), f'post:{post_id}', load_post, read_cache_ttl())
 
-            sql_comments = "SELECT c.id, c.content, c.created_at, u.username, c.user_id " \
-                           "FROM comments c JOIN users u ON c.user_id = u.id WHERE c.board_id = %s ORDER BY c.created_at ASC"
-            cursor.execute(sql_comments, (post_id,))
-            comments = cursor.fetchall()
+        if not post:
+            flash('게시글을 찾을 수 없습니다.', 'error')
+            return redirect(url_for('board_list'))
+
+        if not stream:
+            comments = post_cache.get_or_load(('comments', post_id, page_size, after, before),
+                                              f'comments:{post_id}', load_comments, read_cache_ttl())
+        else:
+            # 스트리밍할 댓글의 연결도 여기서 빌려, 얻지 못하면(PoolTimeout 등) 위와 같이 오류를 보여줍니다.
+            conn = get_read_connection()
 
     except Exception as e:
-        print(f"데이터베이스 오류 (게시글 조회): {e}")
+        logger.exception("데이터베이스 오류 (게시글 조회): %s", e)
         flash('게시글을 불러오는 데 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        etag = None # 오류 화면이 브라우저에 캐시되지 않도록 합니다.
+        stream = False
     finally:
-        if conn:
+        if not (stream and post):
+            release_connections()
+
+    if stream and post:
+        # 본문을 먼저 내보내고, 템플릿이 댓글을 순회하는 동안 서버 측 커서에서 조금씩 읽습니다.
+        # 댓글을 다 읽으면 연결을 바로 풀에 반납합니다. (스트리밍 댓글은 캐시하지 않습니다.)
+        def finish_comments():
+            if comments.error:
+                logger.error("데이터베이스 오류 (댓글 스트리밍): %s", comments.error)
             conn.close()
-    return render_template('view_post.html', post=post, comments=comments, username=session['username'])
+
+        comments = StreamedPage(conn, sql_comments, ["c.board_id = %s"], [post_id],
+                                'c.created_at', 'c.id', page_size, descending=False,
+                                after=after, on_close=finish_comments)
+        return set_validators(app.response_class(stream_template(
+            'view_post.html', post=post, comments=comments,
+            comments_size=page_size if page_size != COMMENT_PAGE_SIZE else None,
+            username=session['username'])), etag)
+    return set_validators(make_response(render_template(
+        'view_post.html', post=post, comments=comments,
+        comments_size=page_size if page_size != COMMENT_PAGE_SIZE else None,
+        username=session['username'])), etag)
 
 @app.route('/board/edit/<int:post_id>', methods=['GET', 'POST'])
+@query_budget(5)
 def edit_post(post_id):
     """기존 게시글 편집을 처리합니다."""
     if 'loggedin' not in session:
@@ -305,18 +1227,26 @@ def edit_post(post_id):
             with conn.cursor() as cursor:
                 sql = "UPDATE board SET title = %s, content = %s WHERE id = %s"
                 cursor.execute(sql, (title, content, post_id))
+                search_index.index_post(cursor, post_id, title, content)
+                board_summary.update_post(cursor, post_id, title, content, BOARD_EXCERPT_CHARS)
             conn.commit()
+            search_index.commit()
+            post_cache.invalidate(f'post:{post_id}')
+            cache_versions.bump('board')
+            update_dashboard(session['id'], lambda summary: user_summary.post_edited(summary, post_id, title))
             flash('게시글이 성공적으로 수정되었습니다!', 'success')
             return redirect(url_for('view_post', post_id=post_id))
     except Exception as e:
-        print(f"데이터베이스 오류 (게시글 수정): {e}")
+        logger.exception("데이터베이스 오류 (게시글 수정): %s", e)
         flash('게시글 수정에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
+        search_index.rollback()
         if conn:
             conn.close()
     return render_template('edit_post.html', post=post, username=session['username'])
 
 @app.route('/board/delete/<int:post_id>', methods=['POST'])
+@query_budget(2)
 def delete_post(post_id):
     """게시글 삭제를 처리합니다."""
     if 'loggedin' not in session:
@@ -327,32 +1257,36 @@ def delete_post(post_id):
     try:
         conn = get_db_connection()
         with conn.cursor() as cursor:
-            sql_check = "SELECT user_id FROM board WHERE id = %s"
-            cursor.execute(sql_check, (post_id,))
-            post_owner = cursor.fetchone()
-
-            if not post_owner:
-                flash('게시글을 찾을 수 없습니다.', 'error')
-                return redirect(url_for('board_list'))
-
-            if post_owner['user_id'] != session['id']:
+            # 작성자 조건을 붙여 한 번에 삭제하고, 지워진 행이 없을 때만 이유를 확인합니다.
+            sql_delete = "DELETE FROM board WHERE id = %s AND user_id = %s"
+            if not cursor.execute(sql_delete, (post_id, session['id'])):
+                cursor.execute("SELECT 1 FROM board WHERE id = %s", (post_id,))
+                if not cursor.fetchone():
+                    flash('게시글을 찾을 수 없습니다.', 'error')
+                    return redirect(url_for('board_list'))
                 flash('이 게시글을 삭제할 권한이 없습니다.', 'error')
                 return redirect(url_for('view_post', post_id=post_id))
-
-            sql_delete = "DELETE FROM board WHERE id = %s"
-            cursor.execute(sql_delete, (post_id,))
+            search_index.remove_post(cursor, post_id)
+            # board_summary 행은 외래 키(ON DELETE CASCADE)로 함께 지워집니다.
         conn.commit()
+        search_index.commit()
+        post_cache.invalidate(f'post:{post_id}')
+        post_cache.invalidate(f'comments:{post_id}')
+        cache_versions.bump('board')
+        update_dashboard(session['id']) # 최근 게시글 목록을 다시 채워야 하므로 다시 읽게 합니다.
         flash('게시글이 성공적으로 삭제되었습니다!', 'success')
     except Exception as e:
-        print(f"데이터베이스 오류 (게시글 삭제): {e}")
+        logger.exception("데이터베이스 오류 (게시글 삭제): %s", e)
         flash('게시글 삭제에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
+        search_index.rollback()
         if conn:
             conn.close()
     return redirect(url_for('board_list'))
 
 
 @app.route('/comment/add/<int:post_id>', methods=['POST'])
+@query_budget(2)
 def add_comment(post_id):
     """게시글에 댓글 추가를 처리합니다."""
     if 'loggedin' not in session:
@@ -370,17 +1304,18 @@ def add_comment(post_id):
     try:
         conn = get_db_connection()
         with conn.cursor() as cursor:
-            cursor.execute("SELECT id FROM board WHERE id = %s", (post_id,))
-            if not cursor.fetchone():
+            # 게시글이 있을 때만 삽입되도록 INSERT ... SELECT 한 문장으로 처리합니다.
+            sql = "INSERT INTO comments (board_id, user_id, content) SELECT id, %s, %s FROM board WHERE id = %s"
+            if not cursor.execute(sql, (user_id, content, post_id)):
                 flash('댓글을 달 게시글을 찾을 수 없습니다.', 'error')
                 return redirect(url_for('board_list'))
-
-            sql = "INSERT INTO comments (board_id, user_id, content) VALUES (%s, %s, %s)"
-            cursor.execute(sql, (post_id, user_id, content))
+            board_summary.add_comments(cursor, post_id)
         conn.commit()
+        post_cache.invalidate(f'comments:{post_id}')
+        cache_versions.bump('board') # 목록의 댓글 수가 바뀝니다.
         flash('댓글이 성공적으로 작성되었습니다!', 'success')
     except Exception as e:
-        print(f"데이터베이스 오류 (댓글 작성): {e}")
+        logger.exception("데이터베이스 오류 (댓글 작성): %s", e)
         flash('댓글 작성에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
@@ -392,6 +1327,8 @@ def add_comment(post_id):
 
 @app.route('/diary')
 @app.route('/diary/<int:year>/<int:month>')
+@query_budget(1)
+@user_shard_route()
 def diary_calendar(year=None, month=None):
     """사용자별 월 달력을 표시하고 일기 기록 여부를 나타냅니다."""
     if 'loggedin' not in session:
@@ -414,42 +1351,139 @@ def diary_calendar(year=None, month=None):
     prev_year, prev_month = prev_month_date.year, prev_month_date.month
     next_year, next_month = next_month_date.year, next_month_date.month
 
-    cal = calendar.Calendar(firstweekday=6) # 일요일부터 시작
-    month_days = cal.monthdayscalendar(year, month)
+    user_id = session['id']
+    # 오늘 날짜 표시가 바뀌므로 날짜도 ETag에 포함합니다.
+    etag = page_etag(diary_month_key(user_id, year, month), extra=(today.date(),))
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    month_days = month_grid(year, month)
+    diary_bits = 0
+
+    def load_month_bits():
+        bits = 0
+        with get_user_read_connection().cursor() as cursor:
+            # 컬럼에 함수를 씌우지 않은 범위 조건이라 (user_id, entry_date) 인덱스를 그대로 사용합니다.
+            start, end = month_range(year, month)
+            sql = "SELECT entry_date FROM diaries WHERE user_id = %s AND entry_date >= %s AND entry_date < %s"
+            cursor.execute(sql, (user_id, start, end))
+            for row in cursor.fetchall():
+                bits |= 1 << (row['entry_date'].day - 1)
+        return bits
+
+    try:
+        key = diary_month_key(user_id, year, month)
+        diary_bits = diary_cache.get_or_load(key, key, load_month_bits, read_cache_ttl())
+    except Exception as e:
+        logger.exception("일기 데이터를 불러오는 데 오류 발생: %s", e)
+        flash('일기 데이터를 불러오는 데 실패했습니다.', 'error')
+        etag = None # 오류 화면이 브라우저에 캐시되지 않도록 합니다.
+    finally:
+        release_connections()
+
+    response = make_response(render_template('diary_calendar.html',
+                                             year=year,
+                                             month=month,
+                                             month_name=datetime(year, month, 1).strftime('%B'),
+                                             month_days=month_days,
+                                             diary_days={day for day in range(1, 32) if diary_bits >> (day - 1) & 1},
+                                             prev_year=prev_year,
+                                             prev_month=prev_month,
+                                             next_year=next_year,
+                                             next_month=next_month,
+                                             current_day=today.day if today.year == year and today.month == month else None,
+                                             today=today,
+                                             username=session['username']))
+    return set_validators(response, etag)
+
+def load_diary_year(user_id, year):
+    """사용자의 연간 일기 비트맵을 캐시에서, 없으면 한 해 범위 쿼리 한 번으로 읽어 옵니다."""
+    def load_year_bits():
+        with get_user_read_connection().cursor() as cursor:
+            # (user_id, entry_date) 인덱스 범위 조건 하나로 1년치 날짜만 읽습니다.
+            sql = "SELECT entry_date FROM diaries WHERE user_id = %s AND entry_date >= %s AND entry_date < %s"
+            cursor.execute(sql, (user_id,) + diary_year.year_range(year))
+            return diary_year.bitmap(row['entry_date'] for row in cursor.fetchall())
+
+    key = diary_year_key(user_id, year)
+    return diary_cache.get_or_load(key, key, load_year_bits, read_cache_ttl())
+
+@app.route('/diary/year')
+@app.route('/diary/year/<int:year>')
+@query_budget(1)
+@user_shard_route()
+def diary_year_view(year=None):
+    """한 해 동안의 일기 작성 현황을 히트맵으로 표시합니다."""
+    if 'loggedin' not in session:
+        flash('일기장을 보려면 로그인해야 합니다.', 'error')
+        return redirect(url_for('index'))
+
+    today = date.today()
+    if year is None:
+        year = today.year
+    if not 1900 <= year <= 2100:
+        flash('유효하지 않은 연도입니다.', 'error')
+        return redirect(url_for('diary_year_view'))
 
     user_id = session['id']
-    diary_dates = set()
+    # 오늘 표시와 현재 연속 작성 일수가 날짜에 따라 바뀌므로 날짜도 ETag에 포함합니다.
+    etag = page_etag(diary_year_key(user_id, year), extra=(today,))
+    if is_not_modified(etag):
+        return not_modified(etag)
 
-    conn = None
+    bits = 0
     try:
-        conn = get_db_connection()
-        with conn.cursor() as cursor:
-            sql = "SELECT DATE_FORMAT(entry_date, '%%Y-%%m-%%d') AS entry_date_str FROM diaries WHERE user_id = %s AND YEAR(entry_date) = %s AND MONTH(entry_date) = %s"
-            cursor.execute(sql, (user_id, year, month))
-            for row in cursor.fetchall():
-                diary_dates.add(row['entry_date_str'])
+        bits = load_diary_year(user_id, year)
     except Exception as e:
-        print(f"DEBUG: 일기 데이터를 불러오는 데 오류 발생: {e}")
+        logger.exception("연간 일기 데이터를 불러오는 데 오류 발생: %s", e)
         flash('일기 데이터를 불러오는 데 실패했습니다.', 'error')
+        etag = None # 오류 화면이 브라우저에 캐시되지 않도록 합니다.
     finally:
-        if conn:
-            conn.close()
+        release_connections()
+
+    summary = diary_year.summarize(bits, year, today)
+    response = make_response(render_template('diary_year.html',
+                                             year=year,
+                                             weeks=diary_year.week_grid(year),
+                                             diary_days={i for i in range(summary['days']) if bits >> i & 1},
+                                             summary=summary,
+                                             # 칸마다 url_for를 부르지 않도록 일기 주소의 앞부분만 한 번 만듭니다.
+                                             entry_url_prefix=url_for('diary_entry', date_str='_')[:-1],
+                                             today_index=diary_year.day_index(today) if today.year == year else None,
+                                             username=session['username']))
+    return set_validators(response, etag)
+
+@app.route('/diary/year/<int:year>.json')
+@query_budget(1)
+@user_shard_route()
+def diary_year_json(year):
+    """
+    연간 일기 작성 현황을 JSON으로 반환합니다.
+    bitmap(bit n = 그해 n+1번째 날, 16진수), monthly(월별 작성 일수), current_streak/longest_streak를 포함합니다.
+    """
+    if 'loggedin' not in session:
+        return jsonify(error='로그인이 필요합니다.'), 401
+    if not 1900 <= year <= 2100:
+        return jsonify(error='유효하지 않은 연도입니다.'), 400
 
-    return render_template('diary_calendar.html',
-                           year=year,
-                           month=month,
-                           month_name=datetime(year, month, 1).strftime('%B'),
-                           month_days=month_days,
-                           diary_dates=diary_dates,
-                           prev_year=prev_year,
-                           prev_month=prev_month,
-                           next_year=next_year,
-                           next_month=next_month,
-                           current_day=today.day if today.year == year and today.month == month else None,
-                           today=today,
-                           username=session['username'])
+    today = date.today()
+    user_id = session['id']
+    etag = page_etag(diary_year_key(user_id, year), extra=(today,))
+    if is_not_modified(etag):
+        return not_modified(etag)
+
+    try:
+        bits = load_diary_year(user_id, year)
+    except Exception as e:
+        logger.exception("연간 일기 데이터를 불러오는 데 오류 발생: %s", e)
+        return jsonify(error='일기 데이터를 불러오는 데 실패했습니다.'), 500
+    finally:
+        release_connections()
+    return set_validators(jsonify(diary_year.summarize(bits, year, today)), etag)
 
 @app.route('/diary/entry/<string:date_str>', methods=['GET', 'POST'])
+@query_budget(2)
+@user_shard_route()
 def diary_entry(date_str):
     """특정 날짜의 일기를 작성/조회/수정합니다."""
     if 'loggedin' not in session:
@@ -467,7 +1501,7 @@ def diary_entry(date_str):
     diary = None
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_user_connection()
         with conn.cursor() as cursor:
             sql = "SELECT id, title, content, DATE_FORMAT(entry_date, '%%Y-%%m-%%d') AS entry_date_str FROM diaries WHERE user_id = %s AND entry_date = %s"
             cursor.execute(sql, (user_id, entry_date))
@@ -481,6 +1515,8 @@ def diary_entry(date_str):
                 flash('일기 내용은 비워둘 수 없습니다.', 'error')
                 return redirect(url_for('diary_entry', date_str=date_str))
 
+            lock_user_shard()
+            is_new_day = not diary
             with conn.cursor() as cursor:
                 if diary: # 기존 일기 수정
                     sql = "UPDATE diaries SET title = %s, content = %s WHERE id = %s AND user_id = %s"
@@ -491,14 +1527,19 @@ def diary_entry(date_str):
                     cursor.execute(sql, (user_id, entry_date, title, content))
                     flash('일기가 성공적으로 작성되었습니다!', 'success')
             conn.commit()
+            if is_new_day:
+                mark_diary_days(user_id, [entry_date])
             return redirect(url_for('diary_calendar', year=entry_date.year, month=entry_date.month))
 
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
     except Exception as e:
-        print(f"DEBUG: diary_entry에서 데이터베이스 오류: {e}")
+        logger.exception("diary_entry에서 데이터베이스 오류: %s", e)
         flash('일기 처리 중 오류가 발생했습니다.', 'error')
     finally:
         if conn:
             conn.close()
+        release_user_shard_lock()
 
     return render_template('diary_entry.html', diary=diary, date_str=date_str, username=session['username'])
 
@@ -506,6 +1547,8 @@ def diary_entry(date_str):
 # --- To-Do List 관련 라우트 ---
 
 @app.route('/todos')
+@query_budget(1)
+@user_shard_route()
 def todos_list():
     """To-Do 목록을 표시하고 필터링 옵션을 제공합니다."""
     if 'loggedin' not in session:
@@ -513,13 +1556,17 @@ def todos_list():
         return redirect(url_for('index'))
 
     user_id = session['id']
+    etag = page_etag(todos_version_key(user_id))
+    if is_not_modified(etag):
+        return not_modified(etag)
+
     status_filter = request.args.get('status', 'all').strip() # 'all' 또는 특정 상태 (예: '미완료')
     search_query = request.args.get('query', '').strip() # 검색어
 
     conn = None
     todos = []
     try:
-        conn = get_db_connection()
+        conn = get_user_read_connection()
         with conn.cursor() as cursor:
             # due_date를 YYYY-MM-DD 형식의 문자열로 가져오도록 수정
             sql = "SELECT id, task, DATE_FORMAT(due_date, '%%Y-%%m-%%d') AS due_date, status, created_at FROM todos WHERE user_id = %s"
@@ -538,21 +1585,25 @@ def todos_list():
             cursor.execute(sql, params)
             todos = cursor.fetchall()
     except Exception as e:
-        print(f"DEBUG: To-Do 목록 불러오기 오류: {e}")
+        logger.exception("To-Do 목록 불러오기 오류: %s", e)
         flash('To-Do 목록을 불러오는 데 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        etag = None # 오류 화면이 브라우저에 캐시되지 않도록 합니다.
     finally:
         if conn:
             conn.close()
 
-    return render_template('todos_list.html',
-                           todos=todos,
-                           username=session['username'],
-                           status_filter=status_filter,
-                           search_query=search_query,
-                           all_statuses=['미완료', '진행중', '완료', '기간연장'])
+    response = make_response(render_template('todos_list.html',
+                                             todos=todos,
+                                             username=session['username'],
+                                             status_filter=status_filter,
+                                             search_query=search_query,
+                                             all_statuses=TODO_STATUSES))
+    return set_validators(response, etag)
 
 
 @app.route('/todos/add', methods=['POST'])
+@query_budget(1)
+@user_shard_route()
 def add_todo():
     """새 To-Do 항목을 추가합니다."""
     if 'loggedin' not in session:
@@ -560,39 +1611,38 @@ def add_todo():
         return redirect(url_for('index'))
 
     user_id = session['id']
-    task = request.form['task'].strip()
-    due_date_str = request.form.get('due_date', '').strip()
-    status = request.form.get('status', '미완료').strip() # 기본 상태 '미완료'
-
-    if not task:
-        flash('할 일 내용을 비워둘 수 없습니다.', 'error')
+    # 일괄 가져오기(import_data)와 같은 규칙으로 검사합니다. 상태를 주지 않으면 '미완료'입니다.
+    try:
+        task, due_date, status = validate_todo(request.form, TODO_STATUSES)
+    except InvalidRecord as e:
+        flash(str(e), 'error')
         return redirect(url_for('todos_list'))
 
-    due_date = None
-    if due_date_str:
-        try:
-            due_date = datetime.strptime(due_date_str, '%Y-%m-%d').date()
-        except ValueError:
-            flash('유효하지 않은 마감일 형식입니다.', 'error')
-            return redirect(url_for('todos_list'))
-
     conn = None
     try:
-        conn = get_db_connection()
+        lock_user_shard()
+        conn = get_user_connection()
         with conn.cursor() as cursor:
             sql = "INSERT INTO todos (user_id, task, due_date, status) VALUES (%s, %s, %s, %s)"
             cursor.execute(sql, (user_id, task, due_date, status))
         conn.commit()
+        cache_versions.bump(todos_version_key(user_id))
+        update_dashboard(user_id) # 개수를 늘리는 변경은 두 번 반영될 수 있으므로 다시 읽게 합니다.
         flash('To-Do 항목이 성공적으로 추가되었습니다!', 'success')
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
     except Exception as e:
-        print(f"DEBUG: To-Do 항목 추가 오류: {e}")
+        logger.exception("To-Do 항목 추가 오류: %s", e)
         flash('To-Do 항목 추가에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
             conn.close()
+        release_user_shard_lock()
     return redirect(url_for('todos_list'))
 
 @app.route('/todos/update_status/<int:todo_id>/<string:new_status>', methods=['POST'])
+@query_budget(1)
+@user_shard_route()
 def update_todo_status(todo_id, new_status):
     """To-Do 항목의 상태를 업데이트합니다."""
     if 'loggedin' not in session:
@@ -600,36 +1650,38 @@ def update_todo_status(todo_id, new_status):
         return redirect(url_for('index'))
 
     user_id = session['id']
-    valid_statuses = ['미완료', '진행중', '완료', '기간연장'] # 모든 유효 상태 포함
-
-    if new_status not in valid_statuses:
+    if new_status not in TODO_STATUSES:
         flash('유효하지 않은 To-Do 상태입니다.', 'error')
         return redirect(url_for('todos_list'))
 
     conn = None
     try:
-        conn = get_db_connection()
+        lock_user_shard()
+        conn = get_user_connection()
         with conn.cursor() as cursor:
-            # 해당 사용자의 To-Do 항목인지 확인
-            sql_check = "SELECT id FROM todos WHERE id = %s AND user_id = %s"
-            cursor.execute(sql_check, (todo_id, user_id))
-            if not cursor.fetchone():
+            # user_id 조건이 소유권 확인을 겸합니다. 맞은 행이 없으면 없거나 권한이 없는 항목입니다.
+            sql = "UPDATE todos SET status = %s WHERE id = %s AND user_id = %s"
+            if not cursor.execute(sql, (new_status, todo_id, user_id)):
                 flash('To-Do 항목을 찾을 수 없거나 권한이 없습니다.', 'error')
                 return redirect(url_for('todos_list'))
-
-            sql = "UPDATE todos SET status = %s WHERE id = %s AND user_id = %s"
-            cursor.execute(sql, (new_status, todo_id, user_id))
         conn.commit()
+        cache_versions.bump(todos_version_key(user_id))
+        update_dashboard(user_id) # 이전 상태/마감일을 모르므로 다시 읽게 합니다.
         flash('To-Do 항목 상태가 성공적으로 업데이트되었습니다!', 'success')
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
     except Exception as e:
-        print(f"DEBUG: To-Do 상태 업데이트 오류: {e}")
+        logger.exception("To-Do 상태 업데이트 오류: %s", e)
         flash('To-Do 항목 상태 업데이트에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
             conn.close()
+        release_user_shard_lock()
     return redirect(url_for('todos_list'))
 
 @app.route('/todos/delete/<int:todo_id>', methods=['POST'])
+@query_budget(1)
+@user_shard_route()
 def delete_todo(todo_id):
     """To-Do 항목을 삭제합니다."""
     if 'loggedin' not in session:
@@ -640,31 +1692,34 @@ def delete_todo(todo_id):
 
     conn = None
     try:
-        conn = get_db_connection()
+        lock_user_shard()
+        conn = get_user_connection()
         with conn.cursor() as cursor:
-            # 해당 사용자의 To-Do 항목인지 확인
-            sql_check = "SELECT id FROM todos WHERE id = %s AND user_id = %s"
-            cursor.execute(sql_check, (todo_id, user_id))
-            if not cursor.fetchone():
+            sql = "DELETE FROM todos WHERE id = %s AND user_id = %s"
+            if not cursor.execute(sql, (todo_id, user_id)):
                 flash('To-Do 항목을 찾을 수 없거나 권한이 없습니다.', 'error')
                 return redirect(url_for('todos_list'))
-
-            sql = "DELETE FROM todos WHERE id = %s AND user_id = %s"
-            cursor.execute(sql, (todo_id, user_id))
         conn.commit()
+        cache_versions.bump(todos_version_key(user_id))
+        update_dashboard(user_id) # 이전 상태/마감일을 모르므로 다시 읽게 합니다.
         flash('To-Do 항목이 성공적으로 삭제되었습니다!', 'success')
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
     except Exception as e:
-        print(f"DEBUG: To-Do 항목 삭제 오류: {e}")
+        logger.exception("To-Do 항목 삭제 오류: %s", e)
         flash('To-Do 항목 삭제에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
     finally:
         if conn:
             conn.close()
+        release_user_shard_lock()
     return redirect(url_for('todos_list'))
 
 # --- To-Do 기간 연장 (재조정) 라우트 ---
 
 @app.route('/todos/reschedule/<int:todo_id>')
 @app.route('/todos/reschedule/<int:todo_id>/<int:year>/<int:month>')
+@query_budget(1)
+@user_shard_route()
 def reschedule_todo_calendar(todo_id, year=None, month=None):
     """
     특정 To-Do 항목의 마감일을 재조정하기 위한 달력을 표시합니다.
@@ -677,7 +1732,7 @@ def reschedule_todo_calendar(todo_id, year=None, month=None):
     todo_item = None
     conn = None
     try:
-        conn = get_db_connection()
+        conn = get_user_read_connection()
         with conn.cursor() as cursor:
             # 재조정할 To-Do 항목의 정보를 가져옵니다.
             # due_date가 None일 경우 Jinja2에서 오류 나지 않도록 DATE_FORMAT 사용
@@ -689,7 +1744,7 @@ def reschedule_todo_calendar(todo_id, year=None, month=None):
                 if conn: conn.close()
                 return redirect(url_for('todos_list'))
     except Exception as e:
-        print(f"DEBUG: Error fetching todo item for reschedule: {e}")
+        logger.exception("Error fetching todo item for reschedule: %s", e)
         flash('To-Do 항목 정보를 불러오는 데 실패했습니다.', 'error')
         if conn: conn.close()
         return redirect(url_for('todos_list'))
@@ -714,8 +1769,7 @@ def reschedule_todo_calendar(todo_id, year=None, month=None):
     prev_year, prev_month = prev_month_date.year, prev_month_date.month
     next_year, next_month = next_month_date.year, next_month_date.month
 
-    cal = calendar.Calendar(firstweekday=6) # 일요일부터 시작
-    month_days = cal.monthdayscalendar(year, month) # month_days 변수 정의 및 들여쓰기 수정됨
+    month_days = month_grid(year, month)
 
     return render_template('todos_reschedule.html',
                            todo_item=todo_item,
@@ -732,6 +1786,8 @@ def reschedule_todo_calendar(todo_id, year=None, month=None):
                            username=session['username'])
 
 @app.route('/todos/set_due_date/<int:todo_id>', methods=['POST'])
+@query_budget(1)
+@user_shard_route()
 def set_new_due_date(todo_id):
     """선택된 날짜로 To-Do 항목의 마감일을 설정합니다."""
     if 'loggedin' not in session:
@@ -754,43 +1810,361 @@ def set_new_due_date(todo_id):
 
     conn = None
     try:
-        conn = get_db_connection()
+        lock_user_shard()
+        conn = get_user_connection()
         with conn.cursor() as cursor:
-            # 해당 사용자의 To-Do 항목인지 확인
-            sql_check = "SELECT id, status FROM todos WHERE id = %s AND user_id = %s"
-            cursor.execute(sql_check, (todo_id, user_id))
-            item_data = cursor.fetchone()
-            if not item_data:
+            # 마감일과 상태(RESCHEDULE_STATUS_SQL 규칙)를 한 문장으로 변경합니다.
+            sql_update = f"UPDATE todos SET due_date = %s, status = {RESCHEDULE_STATUS_SQL} WHERE id = %s AND user_id = %s"
+            if not cursor.execute(sql_update, (new_due_date, todo_id, user_id)):
                 flash('To-Do 항목을 찾을 수 없거나 권한이 없습니다.', 'error')
                 return redirect(url_for('todos_list'))
+        conn.commit()
+        cache_versions.bump(todos_version_key(user_id))
+        update_dashboard(user_id) # 이전 상태/마감일을 모르므로 다시 읽게 합니다.
+        flash(f'할 일의 마감일이 {new_due_date_str}으로 성공적으로 재조정되었습니다!', 'success')
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
+    except Exception as e:
+        logger.exception("To-Do 마감일 설정 오류: %s", e)
+        flash('마감일 재조정에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+    finally:
+        if conn:
+            conn.close()
+        release_user_shard_lock()
+    return redirect(url_for('todos_list'))
+
+
+@app.route('/todos/bulk', methods=['POST'])
+@query_budget(2)
+@user_shard_route()
+def bulk_todos():
+    """
+    여러 To-Do 항목의 상태 변경/삭제/마감일 재조정을 한 번에 처리합니다.
+    폼(todo_ids, action, new_status, new_due_date) 또는 JSON({"ids": [...], "action": ...})을 받으며,
+    소유권 확인과 변경을 하나의 트랜잭션에서 한 번의 UPDATE/DELETE로 수행합니다.
+    JSON 요청에는 항목별 처리 결과를 JSON으로 돌려줍니다.
+    """
+    wants_json = request.is_json
+    if 'loggedin' not in session:
+        if wants_json:
+            return jsonify(error='로그인이 필요합니다.'), 401
+        flash('To-Do 항목을 변경하려면 로그인해야 합니다.', 'error')
+        return redirect(url_for('index'))
 
-            # 마감일 업데이트, 상태는 '완료'가 아니면 '진행중'으로 설정
-            # 사용자 요청에 따라 '기간연장' 상태는 유지하거나, '미완료'로 변경할 수 있습니다.
-            new_status_after_reschedule = item_data['status'] # 기본적으로 현재 상태 유지
-            if item_data['status'] == '완료':
-                new_status_after_reschedule = '미완료' # 완료된 항목을 재조정하면 미완료로 돌림
-            elif item_data['status'] == '기간연장':
-                # '기간연장' 상태를 유지하도록 합니다.
-                new_status_after_reschedule = '기간연장'
-            else: # '미완료'나 '진행중'인 경우
-                new_status_after_reschedule = '진행중'
+    def fail(message):
+        if wants_json:
+            return jsonify(error=message), 400
+        flash(message, 'error')
+        return redirect(url_for('todos_list'))
 
+    if wants_json:
+        data = request.get_json(silent=True) or {}
+        raw_ids = data.get('ids') or []
+    else:
+        data = request.form
+        raw_ids = request.form.getlist('todo_ids')
+    action = (data.get('action') or '').strip()
 
-            sql_update = "UPDATE todos SET due_date = %s, status = %s WHERE id = %s AND user_id = %s"
-            cursor.execute(sql_update, (new_due_date, new_status_after_reschedule, todo_id, user_id))
+    try:
+        todo_ids = sorted({int(todo_id) for todo_id in raw_ids})
+    except (TypeError, ValueError):
+        return fail('유효하지 않은 To-Do 항목 번호가 포함되어 있습니다.')
+    if not todo_ids:
+        return fail('처리할 To-Do 항목을 선택해주세요.')
+    if len(todo_ids) > TODO_BULK_MAX:
+        return fail(f'한 번에 최대 {TODO_BULK_MAX}개 항목까지 처리할 수 있습니다.')
+
+    user_id = session['id']
+    placeholders = ", ".join(["%s"] * len(todo_ids))
+    owned_where = f"user_id = %s AND id IN ({placeholders})"
+    owned_params = [user_id] + todo_ids
+
+    if action == 'status':
+        new_status = (data.get('new_status') or '').strip()
+        if new_status not in TODO_STATUSES:
+            return fail('유효하지 않은 To-Do 상태입니다.')
+        sql = f"UPDATE todos SET status = %s WHERE {owned_where}"
+        params = [new_status] + owned_params
+        done = 'updated'
+    elif action == 'delete':
+        sql = f"DELETE FROM todos WHERE {owned_where}"
+        params = owned_params
+        done = 'deleted'
+    elif action == 'reschedule':
+        try:
+            new_due_date = datetime.strptime((data.get('new_due_date') or '').strip(), '%Y-%m-%d').date()
+        except ValueError:
+            return fail('유효하지 않은 날짜 형식입니다.')
+        sql = f"UPDATE todos SET due_date = %s, status = {RESCHEDULE_STATUS_SQL} WHERE {owned_where}"
+        params = [new_due_date] + owned_params
+        done = 'rescheduled'
+    else:
+        return fail('유효하지 않은 일괄 처리 작업입니다.')
+
+    results = {}
+    conn = None
+    try:
+        lock_user_shard()
+        conn = get_user_connection()
+        with conn.cursor() as cursor:
+            # 항목별 결과를 알려주기 위해 본인 소유 항목을 잠그며 확인한 뒤 한 문장으로 변경합니다.
+            cursor.execute(f"SELECT id FROM todos WHERE {owned_where} FOR UPDATE", owned_params)
+            owned = {row['id'] for row in cursor.fetchall()}
+            if owned:
+                cursor.execute(sql, params)
         conn.commit()
-        flash(f'할 일의 마감일이 {new_due_date_str}으로 성공적으로 재조정되었습니다!', 'success')
+        if owned:
+            cache_versions.bump(todos_version_key(user_id))
+            update_dashboard(user_id)
+        results = {todo_id: done if todo_id in owned else 'not_found' for todo_id in todo_ids}
+    except ShardMoving:
+        raise # shard_moving()이 503으로 응답합니다.
     except Exception as e:
-        print(f"DEBUG: To-Do 마감일 설정 오류: {e}")
-        flash('마감일 재조정에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        logger.exception("To-Do 일괄 처리 오류: %s", e)
+        if wants_json:
+            return jsonify(error='일괄 처리에 실패했습니다. 잠시 후 다시 시도해주세요.'), 500
+        flash('일괄 처리에 실패했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        return redirect(url_for('todos_list'))
     finally:
         if conn:
             conn.close()
+        release_user_shard_lock()
+
+    succeeded = sum(1 for result in results.values() if result != 'not_found')
+    missing = len(results) - succeeded
+    if wants_json:
+        return jsonify(action=action, succeeded=succeeded, not_found=missing,
+                       results={str(todo_id): result for todo_id, result in results.items()})
+    flash(f'{succeeded}개의 To-Do 항목을 처리했습니다.', 'success')
+    if missing:
+        flash(f'{missing}개의 항목은 찾을 수 없거나 권한이 없습니다.', 'error')
     return redirect(url_for('todos_list'))
 
 
+# --- 데이터 내보내기 ---
+
+@app.route('/export/<string:kind>.<string:fmt>')
+@query_budget(1)
+@rate_cost(10)
+@user_shard_route(required=False)
+def export_data(kind, fmt):
+    """
+    로그인한 사용자의 일기/To-Do/게시글을 CSV 또는 JSON Lines로 내려받습니다.
+    키셋 조건으로 배치씩 나눠 읽어 바로 보내므로 기록 수와 관계없이 메모리 사용량이 일정하고,
+    배치마다 연결을 빌렸다가 곧바로 풀에 반납하므로 느린 클라이언트가 연결을 붙잡지 않습니다.
+    """
+    if 'loggedin' not in session:
+        flash('데이터를 내려받으려면 로그인해야 합니다.', 'error')
+        return redirect(url_for('index'))
+    if kind not in EXPORTS or fmt not in FORMATS:
+        flash('지원하지 않는 내보내기 형식입니다.', 'error')
+        return redirect(url_for('index'))
+
+    filename, columns, sql, keys = EXPORTS[kind]
+    user_id = session['id']
+
+    def connect():
+        # 일기/To-Do는 사용자의 샤드에서, 게시글은 주 DB(또는 복제 DB)에서 읽습니다.
+        return get_user_read_connection() if kind in SHARDED_TABLES else get_read_connection()
+
+    rows = read_batches(connect, sql, keys, user_id, EXPORT_BATCH_SIZE)
+    try:
+        # 첫 배치는 응답을 시작하기 전에 읽어, DB 오류를 평소처럼 안내할 수 있게 합니다.
+        first = list(itertools.islice(rows, 1))
+    except Exception as e:
+        logger.exception("데이터베이스 오류 (내보내기 %s): %s", kind, e)
+        flash('데이터를 내려받지 못했습니다. 잠시 후 다시 시도해주세요.', 'error')
+        return redirect(url_for('index'))
+
+    # 이후 배치는 짧은 쿼리 하나씩이라 풀 대기 시간 안에서 끝나므로, 내려받는 동안 동시 실행 자리를
+    # 붙잡고 있지 않도록 여기서 돌려줍니다.
+    if g.pop('admitted', False):
+        db_admission.release()
+
+    def generate():
+        try:
+            yield from CHUNKERS[fmt](itertools.chain(first, rows), columns)
+        except Exception as e:
+            # 이미 응답을 보내기 시작했으므로 예외를 올리지 않고 기록만 합니다. (파일이 중간에 끊깁니다.)
+            logger.exception("데이터베이스 오류 (내보내기 스트리밍 %s): %s", kind, e)
+        finally:
+            rows.close()
+
+    # stream_with_context로 응답을 보내는 동안 요청 컨텍스트(g의 연결, 쿼리 측정)를 유지합니다.
+    response = app.response_class(stream_with_context(generate()), mimetype=FORMATS[fmt])
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="{filename}-{date.today().isoformat()}.{fmt}"'
+    response.headers['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@app.route('/import/<string:kind>', methods=['POST'])
+@query_budget(importer.query_budget(IMPORT_MAX_ROWS, IMPORT_BATCH_SIZE, IMPORT_MAX_DB_ERRORS))
+@rate_cost(10)
+@user_shard_route()
+def import_data(kind):
+    """
+    CSV 또는 JSON Lines 파일(file 필드)로 To-Do/일기를 한꺼번에 가져옵니다.
+    형식은 ?format= 또는 파일 확장자(.csv, .jsonl, .ndjson)로 정합니다.
+      todos   : task, due_date(YYYY-MM-DD, 선택), status(미완료/진행중/완료/기간연장, 선택)
+      diaries : entry_date(YYYY-MM-DD), title(선택), content - 같은 날짜의 일기는 덮어씁니다.
+    잘못된 행은 건너뛰고 줄 번호와 이유를 알려 줍니다. JSON을 원하는 요청(Accept)에는 결과를 JSON으로 돌려줍니다.
+    """
+    wants_json = request.accept_mimetypes.best == 'application/json'
+    back = url_for('diary_calendar') if kind == 'diaries' else url_for('todos_list')
+    if 'loggedin' not in session:
+        if wants_json:
+            return jsonify(error='로그인이 필요합니다.'), 401
+        flash('데이터를 가져오려면 로그인해야 합니다.', 'error')
+        return redirect(url_for('index'))
+
+    def fail(message, status=400):
+        if wants_json:
+            return jsonify(error=message), status
+        flash(message, 'error')
+        return redirect(back)
+
+    if kind not in importer.INSERT_SQL:
+        return fail('지원하지 않는 가져오기 종류입니다.')
+    if request.content_length is None or request.content_length > IMPORT_MAX_BYTES:
+        return fail(f'파일은 {IMPORT_MAX_BYTES // (1024 * 1024)}MB 이하여야 합니다.', 413)
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return fail('가져올 파일을 선택해주세요.')
+    fmt = request.args.get('format') or os.path.splitext(upload.filename)[1].lstrip('.').lower()
+    fmt = 'jsonl' if fmt == 'ndjson' else fmt
+    if fmt not in importer.FORMATS:
+        return fail('CSV(.csv) 또는 JSON Lines(.jsonl) 파일만 가져올 수 있습니다.')
+
+    user_id = session['id']
+    if kind == 'todos':
+        validate = lambda record: validate_todo(record, TODO_STATUSES)
+    else:
+        validate = validate_diary
+
+    def saved(batch):
+        # 배치를 커밋할 때마다 캐시를 갱신해, 중간에 실패하더라도 이미 저장된 내용이 화면에 보이게 합니다.
+        if kind == 'todos':
+            cache_versions.bump(todos_version_key(user_id))
+            update_dashboard(user_id)
+            return
+        mark_diary_days(user_id, [entry_date for _, (entry_date, _, _) in batch])
+
+    conn = None
+    try:
+        conn = get_user_connection()
+        result = import_records(conn, kind, user_id, read_records(upload.stream, fmt), validate,
+                                batch_size=IMPORT_BATCH_SIZE, max_rows=IMPORT_MAX_ROWS,
+                                max_db_errors=IMPORT_MAX_DB_ERRORS, before_batch=lock_user_shard,
+                                after_batch=release_user_shard_lock, on_batch=saved)
+    except ShardMoving:
+        return fail('데이터를 다른 서버로 옮기는 중이라 가져오기를 멈췄습니다. 일부 행은 이미 저장되었을 수 있습니다.', 503)
+    except Exception as e:
+        logger.exception("가져오기 오류 (%s): %s", kind, e)
+        return fail('가져오기 중 오류가 발생했습니다. 일부 행은 이미 저장되었을 수 있습니다.', 500)
+    finally:
+        if conn:
+            conn.close()
+        release_user_shard_lock()
+
+    logger.info("가져오기 완료 (user %s, %s): 성공 %d, 실패 %d", user_id, kind, result.imported, result.failed)
+    if wants_json:
+        return jsonify(result.as_dict())
+    flash(f'{result.imported}개 항목을 가져왔습니다.', 'success')
+    if result.failed:
+        details = ', '.join(f'{line_no}행: {message}' for line_no, message in result.errors[:5])
+        more = f' 외 {result.failed - 5}건' if result.failed > 5 else ''
+        flash(f'{result.failed}개 행을 건너뛰었습니다. ({details}{more})', 'error')
+    if result.truncated:
+        flash(f'파일이 너무 길어 처음 {IMPORT_MAX_ROWS}행까지만 처리했습니다.', 'error')
+    if result.aborted:
+        flash(f'저장하지 못한 행이 {IMPORT_MAX_DB_ERRORS}개에 이르러 나머지 행은 가져오지 않았습니다.', 'error')
+    return redirect(back)
+
+
+# --- 시작 준비 ---
+
+# 컴파일한 템플릿 바이트코드를 저장할 디렉터리. 모든 mod_wsgi 데몬 프로세스가 함께 사용합니다.
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'your_flask_app_jinja')
+
+# 모듈 import에 걸린 시간 (create_app 시작 시간 보고용)
+IMPORT_SECONDS = time.perf_counter() - _import_started
+
+# create_app()이 채우는 시작 단계별 소요 시간(초)
+startup_report = {}
+# create_app()을 여러 스레드가 동시에 불러도 준비 작업은 한 번만 합니다.
+_startup_lock = threading.Lock()
+metrics_registry.collector('app_startup_seconds', 'Worker startup time by phase',
+                           lambda: {(name,): seconds for name, seconds in startup_report.items()}, ('phase',),
+                           aggregate='max')
+
+
+class CountingBytecodeCache(FileSystemBytecodeCache):
+    """바이트코드 캐시 적중/미적중 수를 세는 FileSystemBytecodeCache입니다."""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        super().__init__(directory)
+        self.hits = 0
+        self.misses = 0
+
+    def load_bytecode(self, bucket):
+        super().load_bytecode(bucket)
+        if bucket.code is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+
+def warm_templates():
+    """templates/ 아래 모든 .html을 미리 컴파일합니다. 컴파일 결과는 jinja 환경의 캐시에 남습니다."""
+    names = app.jinja_env.list_templates(filter_func=lambda name: name.endswith('.html'))
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names)
+
+
+def create_app():
+    """
+    mod_wsgi가 사용할 애플리케이션을 준비해 반환합니다. (wsgi.py에서 호출)
+    새 앱을 만드는 팩토리가 아닙니다. app과 설정, 연결 풀, 측정값 등록은 모듈을 import할 때 이미 만들어지며,
+    여기서는 요청을 받기 전에 정적 파일 지문 계산과 템플릿 컴파일을 끝내 두고 단계별 소요 시간을 로그로 남깁니다.
+    준비 작업은 한 번만 하고, 다시 호출하면 측정값 기록 스레드만 확인(fork된 프로세스에서 시작)한 뒤 같은 app을 반환합니다.
+    """
+    with _startup_lock:
+        if not startup_report:
+            warm_up()
+        metrics_exporter.start() # 프로세스마다 한 번만 시작합니다.
+    return app
+
+
+def warm_up():
+    """정적 파일 지문과 템플릿 바이트코드를 미리 준비하고 startup_report를 채웁니다."""
+    started = time.perf_counter()
+
+    bytecode_cache = CountingBytecodeCache(JINJA_CACHE_DIR)
+    app.jinja_env.bytecode_cache = bytecode_cache
+
+    phase = time.perf_counter()
+    asset_manifest.reload()
+    startup_report['assets'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    template_count = warm_templates()
+    startup_report['templates'] = time.perf_counter() - phase
+
+    startup_report['import'] = IMPORT_SECONDS
+    startup_report['total'] = IMPORT_SECONDS + time.perf_counter() - started
+
+    logger.info("시작 준비 완료 (pid %s): import %.1fms, 정적 파일 %.1fms, 템플릿 %d개 %.1fms "
+                "(바이트코드 캐시 적중 %d, 새로 컴파일 %d), 합계 %.1fms",
+                os.getpid(), IMPORT_SECONDS * 1000, startup_report['assets'] * 1000, template_count,
+                startup_report['templates'] * 1000, bytecode_cache.hits, bytecode_cache.misses,
+                startup_report['total'] * 1000)
+
+
 # 개발용 블록입니다. Apache/mod_wsgi로 배포 시에는 사용되지 않습니다.
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0')
+    create_app().run(debug=True, host='0.0.0.0')
 
 
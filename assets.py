@@ -0,0 +1,90 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import abort, request
+
+# 정적 파일(CSS 등) 지문(fingerprint) 처리
+#
+# 처음 사용할 때(또는 create_app()에서 미리) static/ 아래 파일의 내용 해시를 계산해 'css/common.3f2a1b9c0d4e.css' 같은 이름으로
+# 제공합니다. 내용이 바뀌면 URL이 바뀌므로 브라우저가 1년 동안 재검증 없이(immutable) 캐시할 수 있습니다.
+# gzip 버전도 미리 압축해 두고, Accept-Encoding에 따라 골라서 보냅니다.
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    def __init__(self, name, data):
+        self.name = name
+        self.data = data
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        self.gzipped = None
+        if self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self.gzipped = compressed
+
+    @property
+    def fingerprinted_name(self):
+        base, ext = os.path.splitext(self.name)
+        return f"{base}.{self.digest}{ext}"
+
+
+class AssetManifest:
+    """static 디렉터리의 파일을 읽어 지문이 붙은 URL과 미리 압축한 내용을 관리합니다."""
+
+    def __init__(self, static_dir):
+        self.static_dir = static_dir
+        self._by_name = None
+        self._by_fingerprint = None
+        self._lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self._by_name is None:
+            with self._lock:
+                if self._by_name is None:
+                    self.reload()
+
+    def reload(self):
+        by_name = {}
+        for root, _, files in os.walk(self.static_dir):
+            for filename in files:
+                if filename.endswith('.gz'):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, self.static_dir).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    by_name[name] = Asset(name, f.read())
+        self._by_fingerprint = {asset.fingerprinted_name: asset for asset in by_name.values()}
+        self._by_name = by_name
+
+    def url_path(self, name):
+        """템플릿에서 사용할 지문 붙은 파일 이름을 반환합니다."""
+        self._ensure_loaded()
+        asset = self._by_name.get(name)
+        if asset is None:
+            raise KeyError(f"정적 파일을 찾을 수 없습니다: {name}")
+        return asset.fingerprinted_name
+
+    def response(self, response_class, fingerprinted_name):
+        """지문 붙은 이름에 해당하는 파일을 장기 캐시 헤더와 함께 응답합니다."""
+        self._ensure_loaded()
+        asset = self._by_fingerprint.get(fingerprinted_name)
+        if asset is None:
+            abort(404)
+        etag = asset.digest
+        if request.if_none_match.contains_weak(etag):
+            response = response_class(status=304)
+        elif asset.gzipped is not None and request.accept_encodings.quality('gzip') > 0:
+            response = response_class(asset.gzipped, mimetype=asset.mimetype)
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = response_class(asset.data, mimetype=asset.mimetype)
+        response.set_etag(etag, weak=True) # gzip/원본 표현이 같은 ETag를 공유하므로 약한 ETag를 사용합니다.
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        return response
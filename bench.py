@@ -0,0 +1,403 @@
+"""
+라우트별 처리량/지연 시간 벤치마크
+
+운영 DB 없이 로컬 SQLite 대체 DB(bench_db.py)에 데이터를 채운 뒤, WSGI 테스트 클라이언트로
+모든 라우트를 여러 스레드에서 동시에 호출하고 라우트별 처리량(req/s)과 p50/p95/p99 지연 시간을
+JSON으로 출력합니다. 커밋마다 결과를 저장해 두고 --compare 로 이전 결과와 비교할 수 있습니다.
+
+    python bench.py --output bench-$(git rev-parse --short HEAD).json
+    python bench.py --routes board_list,view_post --requests 500 --threads 5
+    python bench.py --compare bench-old.json --output bench-new.json
+"""
+import argparse
+import csv
+import io
+import itertools
+import json
+import os
+import platform
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import bench_db
+import board_summary
+
+WORDS = ('오늘', '게시판', '일기', '할일', '회의', '점심', '프로젝트', '검색', '캐시', '서버',
+         'flask', 'mariadb', 'python', 'deploy', 'release', 'bug', 'feature', 'review')
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Dataset:
+    """벤치마크 데이터를 채우고, 라우트가 사용할 ID 목록을 보관합니다."""
+
+    def __init__(self, app_module, connect, args):
+        self.app_module = app_module
+        self.connect = connect # 인자 없이 호출하면 pymysql 호환 연결을 돌려주는 함수
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.password = 'bench-password'
+        self.user_ids = []
+        self.posts_by_user = {}
+        self.post_ids = []
+        self.todos_by_user = {}
+        self.deletable_posts = queue.Queue() # delete_post가 하나씩 가져가 삭제합니다.
+        self.deletable_todos = queue.Queue()
+        self.usernames = itertools.count(1) # register용 새 사용자 이름
+        with app_module.app.test_request_context():
+            self.asset_path = app_module.asset_url('css/common.css')
+
+    def seed(self):
+        args, rng = self.args, self.rng
+        conn = self.connect()
+        password_hash = self.app_module.password_hasher.hash(self.password)
+        now = datetime.now().replace(microsecond=0)
+        today = date.today()
+        search_index = self.app_module.search_index
+        with conn.cursor() as cursor:
+            cursor.executemany("INSERT INTO users (username, password) VALUES (%s, %s)",
+                               [(f"bench{i}", password_hash) for i in range(args.users)])
+            cursor.execute("SELECT id FROM users ORDER BY id")
+            self.user_ids = [row['id'] for row in cursor.fetchall()]
+
+            post_total = args.posts + args.requests # 삭제용 게시글을 더 만들어 둡니다.
+            for i in range(post_total):
+                user_id = rng.choice(self.user_ids)
+                title = sentence(rng, 4)
+                content = sentence(rng, rng.randint(30, 300))
+                created_at = now - timedelta(minutes=post_total - i)
+                cursor.execute("INSERT INTO board (user_id, title, content, created_at, updated_at) "
+                               "VALUES (%s, %s, %s, %s, %s)", (user_id, title, content, created_at, created_at))
+                post_id = cursor.lastrowid
+                search_index.index_post(cursor, post_id, title, content)
+                if i < args.posts:
+                    self.post_ids.append(post_id)
+                    self.posts_by_user.setdefault(user_id, []).append(post_id)
+                else:
+                    self.deletable_posts.put((user_id, post_id))
+
+            comments = []
+            for post_id in self.post_ids:
+                for _ in range(rng.randint(0, args.comments * 2)):
+                    comments.append((post_id, rng.choice(self.user_ids), sentence(rng, rng.randint(3, 30))))
+            cursor.executemany("INSERT INTO comments (board_id, user_id, content) VALUES (%s, %s, %s)", comments)
+
+            diaries, todos = [], []
+            for user_id in self.user_ids:
+                for day in rng.sample(range(365), min(args.diaries, 365)):
+                    diaries.append((user_id, today - timedelta(days=day), sentence(rng, 3), sentence(rng, 50)))
+                for _ in range(args.todos):
+                    due = today + timedelta(days=rng.randint(-30, 60)) if rng.random() < 0.8 else None
+                    todos.append((user_id, sentence(rng, 5), due, rng.choice(self.app_module.TODO_STATUSES)))
+            cursor.executemany("INSERT INTO diaries (user_id, entry_date, title, content) VALUES (%s, %s, %s, %s)", diaries)
+            cursor.executemany("INSERT INTO todos (user_id, task, due_date, status) VALUES (%s, %s, %s, %s)", todos)
+            cursor.execute("SELECT id, user_id FROM todos ORDER BY id")
+            for row in cursor.fetchall():
+                self.todos_by_user.setdefault(row['user_id'], []).append(row['id'])
+        conn.commit()
+        # 게시글/댓글을 직접 넣었으므로 목록용 요약 테이블을 한 번에 계산합니다.
+        board_summary.rebuild(conn, self.app_module.BOARD_EXCERPT_CHARS)
+        conn.close()
+
+        # 삭제용 To-Do는 사용자별 목록에서 떼어 냅니다.
+        for user_id in itertools.cycle(self.user_ids):
+            if self.deletable_todos.qsize() >= args.requests:
+                break
+            todo_ids = self.todos_by_user[user_id]
+            if len(todo_ids) > 1:
+                self.deletable_todos.put((user_id, todo_ids.pop()))
+
+
+class Worker:
+    """스레드마다 하나씩 만드는 로그인된 테스트 클라이언트입니다."""
+
+    def __init__(self, flask_app, data, index):
+        self.data = data
+        self.rng = random.Random(data.args.seed + index)
+        self.client = flask_app.test_client()
+        self.login(data.user_ids[index % len(data.user_ids)])
+
+    def login(self, user_id):
+        self.user_id = user_id
+        with self.client.session_transaction() as sess:
+            sess['loggedin'] = True
+            sess['id'] = user_id
+            sess['username'] = f"bench{user_id}"
+
+    def own_post(self):
+        posts = self.data.posts_by_user.get(self.user_id)
+        return self.rng.choice(posts) if posts else self.rng.choice(self.data.post_ids)
+
+    def own_todo(self):
+        return self.rng.choice(self.data.todos_by_user[self.user_id])
+
+    def random_day(self):
+        return (date.today() - timedelta(days=self.rng.randint(0, 364))).isoformat()
+
+
+def request_login(w):
+    client = w.client.application.test_client() # 로그인 라우트는 새 세션에서 호출합니다.
+    return client.post('/login', data={'username': f"bench{w.user_id}", 'password': w.data.password})
+
+
+def request_register(w):
+    return w.client.post('/register', data={'username': f"new{next(w.data.usernames)}",
+                                             'password': w.data.password})
+
+
+def request_delete_post(w):
+    user_id, post_id = w.data.deletable_posts.get_nowait()
+    w.login(user_id)
+    return w.client.post(f'/board/delete/{post_id}')
+
+
+def request_delete_todo(w):
+    user_id, todo_id = w.data.deletable_todos.get_nowait()
+    w.login(user_id)
+    return w.client.post(f'/todos/delete/{todo_id}')
+
+
+def request_bulk(w):
+    ids = w.rng.sample(w.data.todos_by_user[w.user_id], min(5, len(w.data.todos_by_user[w.user_id])))
+    return w.client.post('/todos/bulk', json={'ids': ids, 'action': 'status', 'new_status': w.rng.choice(['미완료', '진행중'])})
+
+
+IMPORT_ROWS = 200 # 가져오기 요청 한 번에 올리는 행 수
+
+
+def request_import_todos(w):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['task', 'due_date', 'status'])
+    for _ in range(IMPORT_ROWS):
+        writer.writerow([sentence(w.rng, 5), w.random_day(), w.rng.choice(['미완료', '진행중', '완료'])])
+    upload = (io.BytesIO(buffer.getvalue().encode('utf-8')), 'todos.csv')
+    return w.client.post('/import/todos', data={'file': upload}, headers={'Accept': 'application/json'})
+
+
+def request_import_diaries(w):
+    # 같은 날짜가 섞여 있어 INSERT와 UPDATE(upsert)가 함께 일어납니다.
+    lines = [json.dumps({'entry_date': w.random_day(), 'title': sentence(w.rng, 3), 'content': sentence(w.rng, 50)},
+                        ensure_ascii=False) for _ in range(IMPORT_ROWS)]
+    upload = (io.BytesIO('\n'.join(lines).encode('utf-8')), 'diaries.jsonl')
+    return w.client.post('/import/diaries', data={'file': upload}, headers={'Accept': 'application/json'})
+
+
+# (이름, 요청 함수). 이름은 Flask 엔드포인트 이름과 같게 하되, 같은 엔드포인트의 다른 사용 방식은 접미사로 구분합니다.
+SCENARIOS = [
+    ('index', lambda w: w.client.get('/')),
+    ('login', request_login),
+    ('register', request_register),
+    ('dashboard', lambda w: w.client.get('/dashboard')),
+    ('board_list', lambda w: w.client.get('/board')),
+    ('board_list_search', lambda w: w.client.get('/board', query_string={'query': w.rng.choice(WORDS)})),
+    ('write_post_form', lambda w: w.client.get('/board/write')),
+    ('write_post', lambda w: w.client.post('/board/write', data={'title': sentence(w.rng, 4), 'content': sentence(w.rng, 100)})),
+    ('view_post', lambda w: w.client.get(f'/board/view/{w.rng.choice(w.data.post_ids)}')),
+    ('edit_post_form', lambda w: w.client.get(f'/board/edit/{w.own_post()}')),
+    ('edit_post', lambda w: w.client.post(f'/board/edit/{w.own_post()}', data={'title': sentence(w.rng, 4), 'content': sentence(w.rng, 100)})),
+    ('delete_post', request_delete_post),
+    ('add_comment', lambda w: w.client.post(f'/comment/add/{w.rng.choice(w.data.post_ids)}', data={'content': sentence(w.rng, 10)})),
+    ('diary_calendar', lambda w: w.client.get('/diary')),
+    ('diary_year_view', lambda w: w.client.get('/diary/year')),
+    ('diary_year_json', lambda w: w.client.get(f'/diary/year/{date.today().year}.json')),
+    ('diary_entry_form', lambda w: w.client.get(f'/diary/entry/{w.random_day()}')),
+    ('diary_entry', lambda w: w.client.post(f'/diary/entry/{w.random_day()}', data={'title': sentence(w.rng, 3), 'content': sentence(w.rng, 50)})),
+    ('todos_list', lambda w: w.client.get('/todos')),
+    ('add_todo', lambda w: w.client.post('/todos/add', data={'task': sentence(w.rng, 5), 'due_date': w.random_day()})),
+    ('update_todo_status', lambda w: w.client.post(f'/todos/update_status/{w.own_todo()}/진행중')),
+    ('delete_todo', request_delete_todo),
+    ('reschedule_todo_calendar', lambda w: w.client.get(f'/todos/reschedule/{w.own_todo()}')),
+    ('set_new_due_date', lambda w: w.client.post(f'/todos/set_due_date/{w.own_todo()}', data={'new_due_date': w.random_day()})),
+    ('bulk_todos', request_bulk),
+    ('export_data_csv', lambda w: w.client.get(f"/export/{w.rng.choice(['diaries', 'todos', 'posts'])}.csv")),
+    ('export_data_jsonl', lambda w: w.client.get(f"/export/{w.rng.choice(['diaries', 'todos', 'posts'])}.jsonl")),
+    ('import_data_todos', request_import_todos),
+    ('import_data_diaries', request_import_diaries),
+    ('asset', lambda w: w.client.get(w.data.asset_path)),
+    ('metrics', lambda w: w.client.get('/metrics')),
+    ('logout', lambda w: w.client.get('/logout')),
+]
+
+
+def run_scenario(flask_app, data, name, fn, requests, threads):
+    """한 라우트를 threads개 스레드로 requests번 호출하고 결과를 집계합니다."""
+    workers = [Worker(flask_app, data, i) for i in range(threads)]
+    remaining = itertools.count()
+    latencies = [[] for _ in range(threads)]
+    errors = [0] * threads
+    statuses = [{} for _ in range(threads)]
+
+    def loop(i):
+        w = workers[i]
+        while next(remaining) < requests:
+            start = time.perf_counter()
+            try:
+                response = fn(w)
+                response.get_data() # 스트리밍 응답도 끝까지 읽습니다.
+                status = response.status_code
+                response.close()
+            except Exception:
+                status = 'exception'
+            latencies[i].append(time.perf_counter() - start)
+            statuses[i][str(status)] = statuses[i].get(str(status), 0) + 1
+            if status == 'exception' or status >= 500:
+                errors[i] += 1
+            if name == 'logout':
+                w.login(w.user_id)
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=loop, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    values = sorted(itertools.chain.from_iterable(latencies))
+    status_counts = {}
+    for counts in statuses:
+        for status, count in counts.items():
+            status_counts[status] = status_counts.get(status, 0) + count
+    ms = lambda v: round(v * 1000, 3) if v is not None else None
+    return {
+        'requests': len(values),
+        'errors': sum(errors),
+        'statuses': status_counts,
+        'seconds': round(elapsed, 4),
+        'throughput_rps': round(len(values) / elapsed, 2) if elapsed else None,
+        'mean_ms': ms(sum(values) / len(values)) if values else None,
+        'p50_ms': ms(percentile(values, 0.50)),
+        'p95_ms': ms(percentile(values, 0.95)),
+        'p99_ms': ms(percentile(values, 0.99)),
+        'max_ms': ms(values[-1]) if values else None,
+    }
+
+
+def compare(baseline, current, out=sys.stderr):
+    """이전 결과와 비교해 라우트별 처리량/p95 변화율을 출력합니다."""
+    print(f"{'route':<28}{'rps':>10}{'Δrps':>9}{'p95 ms':>10}{'Δp95':>9}", file=out)
+    for name, result in current['routes'].items():
+        old = baseline.get('routes', {}).get(name)
+        if not old:
+            continue
+        d_rps = (result['throughput_rps'] / old['throughput_rps'] - 1) * 100 if old['throughput_rps'] else 0
+        d_p95 = (result['p95_ms'] / old['p95_ms'] - 1) * 100 if old['p95_ms'] else 0
+        print(f"{name:<28}{result['throughput_rps']:>10.1f}{d_rps:>+8.1f}%{result['p95_ms']:>10.2f}{d_p95:>+8.1f}%", file=out)
+
+
+def prepare_app(threads, db_path=None, enforce_query_budgets=False):
+    """
+    벤치마크 전용 설정으로 app을 import하고 연결 풀이 SQLite 대체 DB를 쓰도록 바꿉니다.
+    (app 모듈, SQLite 파일 경로)를 반환합니다. 이미 설정된 환경 변수는 그대로 둡니다.
+    """
+    workdir = tempfile.mkdtemp(prefix='your_flask_app_bench_')
+    os.environ.setdefault('FLASK_SECRET_KEY', 'bench')
+    os.environ.setdefault('LOG_LEVEL', 'ERROR')
+    os.environ.setdefault('CACHE_VERSION_FILE', os.path.join(workdir, 'cache.versions'))
+    os.environ.setdefault('METRICS_DIR', os.path.join(workdir, 'metrics'))
+    os.environ.setdefault('DB_POOL_SIZE', str(threads))
+    # 스레드 수만큼 동시 실행을 허용하고 사용자별 속도 제한은 끕니다. (몇 명의 사용자로 최대 처리량을 측정하므로)
+    os.environ.setdefault('ADMISSION_MAX_DB_REQUESTS', str(threads))
+    os.environ.setdefault('USER_RATE_LIMIT', '0')
+    if enforce_query_budgets:
+        os.environ['QUERY_BUDGET_ENFORCE'] = '1'
+    import app as app_module
+    app_module.create_app()
+
+    path = db_path or os.path.join(workdir, 'bench.sqlite3')
+    # DB_REPLICAS를 설정하면 복제 DB 풀도 같은 SQLite 파일을 사용합니다. (읽기 분리 경로 측정용)
+    for pool in [app_module.db_pool] + [replica.pool for replica in app_module.db_router.replicas]:
+        pool.connector = lambda **config: bench_db.connect(path, **config)
+        pool.close_all()
+    # DB_SHARDS를 설정하면 샤드마다 따로 SQLite 파일을 둡니다. (bench-이름.sqlite3, 주 DB 파일 옆)
+    for name, pool in app_module.shard_map.pools.items():
+        if pool is app_module.db_pool:
+            continue
+        shard_path = os.path.join(os.path.dirname(path), f'bench-{name}.sqlite3')
+        bench_db.create_schema(shard_path, bench_db.SHARD_SCHEMA)
+        pool.connector = lambda shard_path=shard_path, **config: bench_db.connect(shard_path, **config)
+        pool.close_all()
+    return app_module, path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--posts', type=int, default=5000)
+    parser.add_argument('--comments', type=int, default=10, help='게시글당 평균 댓글 수')
+    parser.add_argument('--diaries', type=int, default=120, help='사용자당 일기 수 (최근 1년)')
+    parser.add_argument('--todos', type=int, default=100, help='사용자당 To-Do 수')
+    parser.add_argument('--requests', type=int, default=200, help='라우트당 요청 수')
+    parser.add_argument('--threads', type=int, default=5, help='동시 요청 스레드 수 (mod_wsgi threads=5)')
+    parser.add_argument('--routes', help='쉼표로 구분한 실행할 시나리오 이름 (기본: 전체)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', help='SQLite 파일 경로 (기본: 임시 파일)')
+    parser.add_argument('--enforce-query-budgets', action='store_true',
+                        help='라우트가 선언한 DB 쿼리 예산(@query_budget)을 넘으면 요청을 실패(500)로 처리')
+    parser.add_argument('--output', help='결과 JSON 파일 (기본: 표준 출력)')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일')
+    args = parser.parse_args(argv)
+
+    app_module, path = prepare_app(args.threads, args.db, args.enforce_query_budgets)
+    bench_db.create_schema(path)
+    data = Dataset(app_module, lambda: bench_db.connect(path), args)
+    seed_started = time.perf_counter()
+    data.seed()
+    seed_seconds = time.perf_counter() - seed_started
+
+    selected = set(args.routes.split(',')) if args.routes else None
+    results = {}
+    for name, fn in SCENARIOS:
+        if selected and name not in selected:
+            continue
+        results[name] = run_scenario(app_module.app, data, name, fn, args.requests, args.threads)
+        print(f"{name:<28}{results[name]['throughput_rps']:>10.1f} req/s  p95 {results[name]['p95_ms']:.2f} ms",
+              file=sys.stderr)
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'db')},
+        'seed_seconds': round(seed_seconds, 3),
+        'routes': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    app_module.password_hasher.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+import re
+import sqlite3
+from datetime import date, datetime
+from functools import lru_cache
+
+import pymysql
+from pymysql.constants import SERVER_STATUS
+
+# 벤치마크용 로컬 DB 대체 구현
+#
+# 운영 MariaDB(10.10.8.4) 없이 앱을 돌릴 수 있도록, 앱이 사용하는 만큼의 pymysql 인터페이스
+# (connect, DictCursor/SSDictCursor, execute/executemany/fetch*, lastrowid, rowcount, commit/rollback,
+# ping, open, server_status)를 SQLite 파일 위에 구현합니다. SQL은 실행 전에 SQLite 문법으로 바꿉니다.
+#   %s -> ?, %% -> %, LEFT(x, n) -> substr(x, 1, n), DATE_FORMAT(x, fmt) -> strftime(fmt, x),
+#   FOR UPDATE 제거, LIKE ? -> LIKE ? ESCAPE '\'
+#   ON DUPLICATE KEY UPDATE c = VALUES(c) -> ON CONFLICT DO UPDATE SET c = excluded.c
+# 쓰기 트랜잭션은 BEGIN IMMEDIATE로 시작해 동시 요청끼리 순서대로 기다리게 합니다.
+#
+# 이 모듈은 bench.py 전용이며 운영 코드에서는 사용하지 않습니다.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username VARCHAR(255) NOT NULL UNIQUE,
+    password VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    shard VARCHAR(32) NOT NULL DEFAULT 'main',
+    shard_moving_to VARCHAR(32) NULL
+);
+CREATE TABLE IF NOT EXISTS board (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TRIGGER IF NOT EXISTS board_updated_at AFTER UPDATE OF title, content ON board
+BEGIN
+    UPDATE board SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TABLE IF NOT EXISTS comments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    board_id INT NOT NULL REFERENCES board(id) ON DELETE CASCADE,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS board_ngrams (
+    gram VARCHAR(2) NOT NULL,
+    board_id INT NOT NULL REFERENCES board(id) ON DELETE CASCADE,
+    weight SMALLINT NOT NULL,
+    PRIMARY KEY (gram, board_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_board_ngrams_board ON board_ngrams (board_id);
+CREATE TABLE IF NOT EXISTS diaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    entry_date DATE NOT NULL,
+    title VARCHAR(255),
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, entry_date)
+);
+CREATE TRIGGER IF NOT EXISTS diaries_updated_at AFTER UPDATE OF title, content ON diaries
+BEGIN
+    UPDATE diaries SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    task VARCHAR(500) NOT NULL,
+    due_date DATE NULL,
+    status TEXT NOT NULL DEFAULT '미완료' CHECK (status IN ('미완료', '진행중', '완료', '기간연장')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS board_summary (
+    id INT NOT NULL PRIMARY KEY REFERENCES board(id) ON DELETE CASCADE,
+    title VARCHAR(255) NOT NULL,
+    username VARCHAR(255) NOT NULL,
+    excerpt VARCHAR(120) NOT NULL,
+    comment_count INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+-- migrations/0003 ~ 0005 와 같은 인덱스
+CREATE INDEX IF NOT EXISTS idx_board_created ON board (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_board_created ON comments (board_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_todos_user_status_created ON todos (user_id, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_todos_user_created ON todos (user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_board_user ON board (user_id, id);
+CREATE INDEX IF NOT EXISTS idx_board_summary_created ON board_summary (created_at, id);
+"""
+
+# 일기/To-Do 샤드 DB의 스키마 (migrations/shard/ 와 같음, users가 없으므로 외래 키 없음)
+SHARD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS diaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL,
+    entry_date DATE NOT NULL,
+    title VARCHAR(255),
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (user_id, entry_date)
+);
+CREATE TRIGGER IF NOT EXISTS diaries_updated_at AFTER UPDATE OF title, content ON diaries
+BEGIN
+    UPDATE diaries SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.id;
+END;
+CREATE TABLE IF NOT EXISTS todos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INT NOT NULL,
+    task VARCHAR(500) NOT NULL,
+    due_date DATE NULL,
+    status TEXT NOT NULL DEFAULT '미완료' CHECK (status IN ('미완료', '진행중', '완료', '기간연장')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_todos_user_status_created ON todos (user_id, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_todos_user_created ON todos (user_id, created_at);
+"""
+
+sqlite3.register_adapter(date, lambda d: d.isoformat())
+sqlite3.register_adapter(datetime, lambda d: d.isoformat(' '))
+sqlite3.register_converter('DATE', lambda b: date.fromisoformat(b.decode()))
+sqlite3.register_converter('TIMESTAMP', lambda b: datetime.fromisoformat(b.decode()))
+
+_PLACEHOLDER = re.compile(r"%(s|%)")
+_LEFT = re.compile(r"\bLEFT\(([^,()]+),", re.IGNORECASE)
+_DATE_FORMAT = re.compile(r"\bDATE_FORMAT\(([^,()]+),\s*('[^']*')\)", re.IGNORECASE)
+_FOR_UPDATE = re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE)
+_LIKE = re.compile(r"\bLIKE \?", re.IGNORECASE)
+_UPSERT = re.compile(r"\bON DUPLICATE KEY UPDATE\b(.*)$", re.IGNORECASE | re.DOTALL)
+_VALUES_REF = re.compile(r"\bVALUES\((\w+)\)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def translate(sql):
+    """앱이 쓰는 MySQL 문법을 SQLite 문법으로 바꿉니다."""
+    sql = _PLACEHOLDER.sub(lambda m: '?' if m.group(1) == 's' else '%', sql)
+    sql = _LEFT.sub(r"substr(\1, 1,", sql)
+    sql = _DATE_FORMAT.sub(r"strftime(\2, \1)", sql)
+    sql = _FOR_UPDATE.sub('', sql)
+    sql = _UPSERT.sub(lambda m: "ON CONFLICT DO UPDATE SET" + _VALUES_REF.sub(r"excluded.\1", m.group(1)), sql)
+    return _LIKE.sub("LIKE ? ESCAPE '\\'", sql)
+
+
+def _dict_row(cursor, row):
+    return {col[0]: value for col, value in zip(cursor.description, row)}
+
+
+def _wrap_error(e):
+    if isinstance(e, sqlite3.IntegrityError):
+        return pymysql.err.IntegrityError(1062, str(e))
+    if isinstance(e, sqlite3.OperationalError):
+        return pymysql.err.OperationalError(2013, str(e))
+    return pymysql.err.ProgrammingError(1064, str(e))
+
+
+class Cursor:
+    """pymysql DictCursor/SSDictCursor와 같은 방식으로 동작하는 커서입니다."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._cursor = connection._db.cursor()
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def execute(self, query, args=None):
+        sql = translate(query)
+        try:
+            self._cursor.execute(sql, tuple(args) if args is not None else ())
+        except sqlite3.Error as e:
+            raise _wrap_error(e) from e
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+        return self.rowcount
+
+    def executemany(self, query, args):
+        # pymysql은 INSERT를 여러 행 한 문장으로 보내 실패하면 아무 행도 남지 않으므로, 세이브포인트로 같게 맞춥니다.
+        db = self.connection._db
+        if not db.in_transaction:
+            db.execute("BEGIN IMMEDIATE")
+        db.execute("SAVEPOINT executemany")
+        try:
+            self._cursor.executemany(translate(query), [tuple(a) for a in args])
+        except sqlite3.Error as e:
+            db.execute("ROLLBACK TO executemany")
+            db.execute("RELEASE executemany")
+            raise _wrap_error(e) from e
+        db.execute("RELEASE executemany")
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=None):
+        return self._cursor.fetchmany(size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def close(self):
+        self._cursor.close()
+
+
+class Connection:
+    """pymysql.connections.Connection 중 앱과 db_pool이 사용하는 부분만 구현합니다."""
+
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, detect_types=sqlite3.PARSE_DECLTYPES,
+                                   isolation_level='IMMEDIATE', check_same_thread=False, timeout=30)
+        self._db.row_factory = _dict_row
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        self.open = True
+
+    @property
+    def server_status(self):
+        return SERVER_STATUS.SERVER_STATUS_IN_TRANS if self._db.in_transaction else 0
+
+    def cursor(self, cursor=None):
+        return Cursor(self)
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise pymysql.err.InterfaceError(0, '')
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+    def close(self):
+        if self.open:
+            self.open = False
+            self._db.close()
+
+
+def connect(path, **config):
+    """pymysql.connect(**DB_CONFIG) 대신 사용합니다. DB_CONFIG의 접속 정보는 무시합니다."""
+    return Connection(path)
+
+
+def create_schema(path, schema=SCHEMA):
+    db = sqlite3.connect(path)
+    try:
+        db.executescript(schema)
+    finally:
+        db.close()
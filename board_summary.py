@@ -0,0 +1,143 @@
+"""
+게시판 목록용 요약 테이블(board_summary) 관리
+
+게시판 목록은 글마다 제목, 작성자, 본문 앞부분(excerpt), 댓글 수, 작성/수정 시각만 필요합니다.
+목록을 그릴 때마다 board/users를 조인하고 comments를 GROUP BY 하지 않도록, 쓰기 경로
+(write_post, edit_post, delete_post, add_comment)가 같은 트랜잭션 안에서 board_summary를
+함께 갱신합니다. 게시글이 삭제되면 외래 키(ON DELETE CASCADE)로 요약 행도 지워집니다.
+
+요약 테이블이 원본과 어긋났을 때(수동으로 DB를 고친 경우 등) 점검/복구합니다.
+
+    python board_summary.py verify            # 어긋난 행 출력 (있으면 종료 코드 1)
+    python board_summary.py verify --fix      # 어긋난 행만 다시 계산
+    python board_summary.py rebuild           # 전체를 id 구간별로 다시 계산
+"""
+import argparse
+import sys
+
+SUMMARY_COLUMNS = ('id', 'title', 'username', 'excerpt', 'comment_count', 'created_at', 'updated_at')
+
+# 원본(board, users, comments)에서 요약 행을 계산하는 SELECT. 첫 번째 파라미터는 excerpt 글자 수입니다.
+_SOURCE_SELECT = ("SELECT b.id, b.title, u.username, LEFT(b.content, %s) AS excerpt, "
+                  "(SELECT COUNT(*) FROM comments c WHERE c.board_id = b.id) AS comment_count, "
+                  "b.created_at, b.updated_at "
+                  "FROM board b JOIN users u ON u.id = b.user_id")
+
+_INSERT = f"INSERT INTO board_summary ({', '.join(SUMMARY_COLUMNS)}) "
+_REPLACE = f"REPLACE INTO board_summary ({', '.join(SUMMARY_COLUMNS)}) "
+
+
+def insert_post(cursor, post_id, excerpt_chars):
+    """새 게시글의 요약 행을 만듭니다. 게시글을 INSERT 한 같은 트랜잭션에서 호출합니다."""
+    cursor.execute(_INSERT + _SOURCE_SELECT + " WHERE b.id = %s", (excerpt_chars, post_id))
+
+
+def update_post(cursor, post_id, title, content, excerpt_chars):
+    """수정된 게시글의 제목/excerpt/수정 시각을 반영합니다. 게시글을 UPDATE 한 같은 트랜잭션에서 호출합니다."""
+    cursor.execute("UPDATE board_summary SET title = %s, excerpt = LEFT(%s, %s), "
+                   "updated_at = (SELECT updated_at FROM board WHERE id = %s) WHERE id = %s",
+                   (title, content, excerpt_chars, post_id, post_id))
+
+
+def add_comments(cursor, post_id, count=1):
+    """댓글 수를 count만큼 늘립니다(음수면 줄입니다). 댓글을 INSERT/DELETE 한 같은 트랜잭션에서 호출합니다."""
+    cursor.execute("UPDATE board_summary SET comment_count = comment_count + %s WHERE id = %s", (count, post_id))
+
+
+def refresh(cursor, post_ids, excerpt_chars):
+    """지정한 게시글들의 요약 행을 원본에서 다시 계산합니다. 원본이 없는 요약 행은 지웁니다."""
+    if not post_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    cursor.execute(_REPLACE + _SOURCE_SELECT + f" WHERE b.id IN ({placeholders})", [excerpt_chars] + list(post_ids))
+    cursor.execute(f"DELETE FROM board_summary WHERE id IN ({placeholders}) "
+                   "AND NOT EXISTS (SELECT 1 FROM board b WHERE b.id = board_summary.id)", list(post_ids))
+
+
+def _id_ranges(cursor, batch_size):
+    cursor.execute("SELECT MAX(id) AS max_id FROM board")
+    max_id = cursor.fetchone()['max_id'] or 0
+    for start in range(0, max_id + 1, batch_size):
+        yield start, start + batch_size
+
+
+def rebuild(conn, excerpt_chars, batch_size=1000):
+    """
+    요약 테이블 전체를 id 구간(batch_size)마다 다시 계산합니다. 구간마다 커밋하므로
+    긴 잠금 없이 운영 중에도 실행할 수 있습니다. 다시 계산한 게시글 수를 반환합니다.
+    """
+    with conn.cursor() as cursor:
+        for start, end in _id_ranges(cursor, batch_size):
+            cursor.execute(_REPLACE + _SOURCE_SELECT + " WHERE b.id >= %s AND b.id < %s", (excerpt_chars, start, end))
+            conn.commit()
+        cursor.execute("DELETE FROM board_summary WHERE NOT EXISTS "
+                       "(SELECT 1 FROM board b WHERE b.id = board_summary.id)")
+        cursor.execute("SELECT COUNT(*) AS n FROM board_summary")
+        total = cursor.fetchone()['n']
+        conn.commit()
+    return total
+
+
+def verify(conn, excerpt_chars, batch_size=1000):
+    """
+    원본에서 계산한 값과 요약 행을 비교해 [(게시글 id, 설명), ...]을 반환합니다.
+    문자열은 DB의 대소문자 무시 비교 대신 파이썬에서 그대로 비교합니다.
+    """
+    problems = []
+    source_columns = ', '.join(f"s.{column} AS s_{column}" for column in SUMMARY_COLUMNS)
+    sql = (_SOURCE_SELECT.replace("SELECT ", f"SELECT {source_columns}, ", 1)
+           + " LEFT JOIN board_summary s ON s.id = b.id WHERE b.id >= %s AND b.id < %s")
+    with conn.cursor() as cursor:
+        for start, end in _id_ranges(cursor, batch_size):
+            cursor.execute(sql, (excerpt_chars, start, end))
+            for row in cursor.fetchall():
+                if row['s_id'] is None:
+                    problems.append((row['id'], '요약 행 없음'))
+                    continue
+                diff = [column for column in SUMMARY_COLUMNS[1:] if row[column] != row[f's_{column}']]
+                if diff:
+                    problems.append((row['id'], '값 불일치: ' + ', '.join(diff)))
+        cursor.execute("SELECT s.id FROM board_summary s WHERE NOT EXISTS (SELECT 1 FROM board b WHERE b.id = s.id)")
+        problems.extend((row['id'], '원본 게시글 없음') for row in cursor.fetchall())
+    conn.rollback()
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    verify_parser = sub.add_parser('verify', help='요약 테이블과 원본 비교')
+    verify_parser.add_argument('--fix', action='store_true', help='어긋난 행을 다시 계산')
+    sub.add_parser('rebuild', help='요약 테이블 전체 다시 계산')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    from app import db_pool, BOARD_EXCERPT_CHARS, cache_versions
+
+    conn = db_pool.acquire()
+    try:
+        if args.command == 'rebuild':
+            total = rebuild(conn, BOARD_EXCERPT_CHARS, args.batch_size)
+            cache_versions.bump('board')
+            print(f"게시글 {total}개의 요약을 다시 계산했습니다.")
+            return 0
+        problems = verify(conn, BOARD_EXCERPT_CHARS, args.batch_size)
+        for post_id, message in problems:
+            print(f"{post_id}: {message}")
+        print(f"어긋난 요약 행 {len(problems)}개")
+        if problems and args.fix:
+            post_ids = sorted({post_id for post_id, _ in problems})
+            with conn.cursor() as cursor:
+                for i in range(0, len(post_ids), args.batch_size):
+                    refresh(cursor, post_ids[i:i + args.batch_size], BOARD_EXCERPT_CHARS)
+                    conn.commit()
+            cache_versions.bump('board')
+            print(f"{len(post_ids)}개를 다시 계산했습니다.")
+            return 0
+        return 1 if problems else 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# 프로세스 간 캐시 무효화를 위한 버전 카운터
+#
+# mod_wsgi는 여러 데몬 프로세스를 띄울 수 있으므로 프로세스 메모리의 캐시만 지우면
+# 다른 프로세스에는 오래된 값이 남습니다. 그래서 모든 프로세스가 같은 파일을 mmap 하여
+# 키별 버전 번호를 공유합니다. 쓰기 경로는 버전을 올리고, 캐시 항목은 저장 당시의 버전과
+# 현재 버전이 다르면 무효로 취급합니다. 키는 해시로 슬롯에 배정되므로 충돌 시에는
+# 불필요한 무효화가 일어날 뿐 오래된 값이 보이지는 않습니다.
+
+_SLOT = struct.Struct('<Q')
+
+
+class VersionCounter:
+    """파일(mmap)에 저장되는 프로세스 간 공유 버전 카운터입니다."""
+
+    def __init__(self, path, slots=4096):
+        self.path = path
+        self.slots = slots
+        size = (slots + 1) * _SLOT.size # 0번 슬롯은 파일 세대(epoch) 값입니다.
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o660)
+        try:
+            fcntl.lockf(fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self._map = mmap.mmap(fd, size)
+                if _SLOT.unpack_from(self._map, 0)[0] == 0:
+                    # 파일이 새로 만들어지면 버전이 0부터 다시 시작하므로, 세대 값을 바꿔
+                    # 재부팅 전의 버전(예: ETag에 들어간 값)과 섞이지 않게 합니다.
+                    _SLOT.pack_into(self._map, 0, int.from_bytes(os.urandom(8), 'little') or 1)
+            finally:
+                fcntl.lockf(fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        self._lock = threading.Lock() # 같은 프로세스 안의 스레드 간 lockf는 서로를 막지 못합니다.
+
+    @property
+    def epoch(self):
+        """버전 파일이 만들어질 때 정해지는 임의의 세대 값입니다."""
+        return _SLOT.unpack_from(self._map, 0)[0]
+
+    def _offset(self, key):
+        return (zlib.crc32(key.encode('utf-8')) % self.slots + 1) * _SLOT.size
+
+    def get(self, key):
+        """키의 현재 버전을 읽습니다."""
+        return _SLOT.unpack_from(self._map, self._offset(key))[0]
+
+    def bump(self, key):
+        """키의 버전을 1 올려 모든 프로세스의 관련 캐시 항목을 무효화합니다."""
+        offset = self._offset(key)
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _SLOT.size, offset)
+            try:
+                value = _SLOT.unpack_from(self._map, offset)[0] + 1
+                _SLOT.pack_into(self._map, offset, value)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _SLOT.size, offset)
+        return value
+
+
+class ReadThroughCache:
+    """
+    LRU/TTL 방식으로 최대 max_entries개의 항목을 보관하는 프로세스 내 캐시입니다.
+    항목마다 버전 키를 두어 VersionCounter로 다른 프로세스의 쓰기도 반영합니다.
+    """
+
+    def __init__(self, versions, max_entries=1024, ttl=300):
+        self.versions = versions
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key -> (value, version_key, version, expires_at)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key, version_key):
+        """유효한 캐시 값이 있으면 (True, value), 없으면 (False, None)을 반환합니다."""
+        now = time.monotonic()
+        current = self.versions.get(version_key)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, version, expires_at = entry
+                if version == current and expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return True, value
+                del self._entries[key]
+            self._misses += 1
+        return False, None
+
+    def put(self, key, version_key, version, value, ttl=None):
+        """
+        값을 저장합니다. version은 값을 읽어 오기 전에 얻은 버전이어야 합니다.
+        ttl을 주면 기본 ttl 대신 사용합니다(기본 ttl보다 길게는 두지 않습니다).
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else min(ttl, self.ttl))
+        with self._lock:
+            self._entries[key] = (value, version_key, version, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def get_or_load(self, key, version_key, loader, ttl=None):
+        """
+        캐시에 값이 없으면 loader()로 읽어 와 저장합니다.
+        loader가 None을 반환하면(예: 게시글 없음) 캐시하지 않습니다. ttl은 put()과 같습니다.
+        """
+        # 읽기 전에 버전을 먼저 얻어야, 읽는 도중 일어난 쓰기가 캐시에 남지 않습니다.
+        version = self.versions.get(version_key)
+        found, value = self.get(key, version_key)
+        if found:
+            return value
+        value = loader()
+        if value is not None:
+            self.put(key, version_key, version, value, ttl)
+        return value
+
+    def update(self, key, version_key, fn):
+        """
+        버전을 올리면서, 이 프로세스에 있는 최신 항목은 fn(value)로 갱신해 그대로 유지합니다.
+        그 사이 다른 프로세스가 버전을 올렸다면 항목을 버립니다. 커밋 이후에 호출하세요.
+
+        커밋과 이 호출 사이에 get_or_load()가 이미 커밋된 값을 읽어 이전 버전으로 저장했을 수 있으므로,
+        그 값에 fn이 한 번 더 적용됩니다. fn은 두 번 적용해도 한 번과 같아야 합니다(비트 OR, 값 설정 등).
+        개수 증가처럼 그렇지 않은 변경은 invalidate()를 사용하세요.
+        """
+        version = self.versions.bump(version_key)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and entry[2] == version - 1 and entry[3] > time.monotonic():
+                self._entries[key] = (fn(entry[0]), version_key, version, entry[3])
+
+    def invalidate(self, version_key):
+        """버전 키에 속한 항목을 모든 프로세스에서 무효화합니다. 커밋 이후에 호출하세요."""
+        self.versions.bump(version_key)
+        with self._lock:
+            self._invalidations += 1
+            stale = [key for key, entry in self._entries.items() if entry[1] == version_key]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+            }
+
+
+def default_version_path(name):
+    """버전 카운터 파일의 기본 경로(시스템 임시 디렉터리)를 반환합니다."""
+    return os.path.join(tempfile.gettempdir(), f"your_flask_app_{name}.versions")
@@ -0,0 +1,105 @@
+import gzip
+import zlib
+
+# 동적 HTML 응답 gzip 압축 WSGI 미들웨어
+#
+# 템플릿으로 렌더링한 페이지는 텍스트라 압축률이 높습니다. 클라이언트가 gzip을 받을 수 있고
+# 응답이 min_size 바이트 이상인 텍스트 응답만 압축합니다. Content-Length가 없는 스트리밍 응답은
+# 조각마다 Z_SYNC_FLUSH 하여 먼저 렌더링된 부분이 지연 없이 전달되도록 합니다.
+
+COMPRESSIBLE_TYPES = ('text/html', 'text/plain', 'text/csv', 'application/json', 'application/x-ndjson')
+
+
+def accepts_gzip(environ):
+    """Accept-Encoding 헤더가 gzip을 허용하는지 확인합니다."""
+    for part in environ.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            quality = params.replace(' ', '').lower()
+            if quality.startswith('q='):
+                try:
+                    return float(quality[2:]) > 0
+                except ValueError:
+                    return False
+            return True
+    return False
+
+
+def _header(headers, name):
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class GzipMiddleware:
+    """min_size 바이트 이상인 텍스트 응답을 gzip으로 압축하는 WSGI 미들웨어입니다."""
+
+    def __init__(self, app, min_size=1024, level=6):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+
+    def _should_compress(self, status, headers):
+        if not status.startswith('200') or _header(headers, 'content-encoding'):
+            return False
+        content_type = (_header(headers, 'content-type') or '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return False
+        length = _header(headers, 'content-length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        if environ.get('REQUEST_METHOD') == 'HEAD' or not accepts_gzip(environ):
+            return self.app(environ, start_response)
+
+        deferred = {}
+
+        def capture(status, headers, exc_info=None):
+            if not self._should_compress(status, headers):
+                return start_response(status, headers, exc_info)
+            # 압축할 응답은 본문을 받은 뒤에 헤더를 고쳐서 보냅니다.
+            deferred.update(status=status, headers=headers, exc_info=exc_info)
+            return self._no_write
+
+        body = self.app(environ, capture)
+        if not deferred:
+            return body
+
+        headers = [(k, v) for k, v in deferred['headers'] if k.lower() not in ('content-length', 'etag', 'vary')]
+        etag = _header(deferred['headers'], 'etag')
+        if etag:
+            # 압축한 표현은 원본과 바이트가 다르므로 약한 ETag로 바꿉니다.
+            headers.append(('ETag', etag if etag.startswith('W/') else 'W/' + etag))
+        vary = _header(deferred['headers'], 'vary')
+        headers.append(('Vary', f"{vary}, Accept-Encoding" if vary else 'Accept-Encoding'))
+        headers.append(('Content-Encoding', 'gzip'))
+
+        if _header(deferred['headers'], 'content-length') is not None:
+            # 길이를 아는 일반 응답은 한 번에 압축해 Content-Length를 다시 계산합니다.
+            try:
+                data = gzip.compress(b''.join(body), compresslevel=self.level, mtime=0)
+            finally:
+                if hasattr(body, 'close'):
+                    body.close()
+            headers.append(('Content-Length', str(len(data))))
+            start_response(deferred['status'], headers, deferred['exc_info'])
+            return [data]
+
+        start_response(deferred['status'], headers, deferred['exc_info'])
+        return self._stream(body)
+
+    @staticmethod
+    def _no_write(data):
+        raise RuntimeError("GzipMiddleware는 start_response()가 돌려주는 write()를 지원하지 않습니다.")
+
+    def _stream(self, body):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31) # wbits=31: gzip 형식
+        try:
+            for chunk in body:
+                if chunk:
+                    yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield compressor.flush()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
@@ -0,0 +1,260 @@
+import logging
+import threading
+import time
+from collections import deque
+
+import pymysql
+from pymysql.constants import CR, ER, SERVER_STATUS
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(pymysql.err.OperationalError):
+    """풀에서 정해진 시간 안에 연결을 얻지 못했을 때 발생합니다."""
+
+
+# 쿼리나 데이터가 아니라 DB 서버와의 연결 자체가 끊겨서 나는 오류 코드
+# (1927은 MariaDB의 ER_CONNECTION_KILLED로, pymysql 상수에는 없습니다.)
+CONNECTION_ERRORS = frozenset({
+    CR.CR_CONN_HOST_ERROR, CR.CR_SERVER_GONE_ERROR, CR.CR_SERVER_LOST, CR.CR_SERVER_LOST_EXTENDED,
+    ER.SERVER_SHUTDOWN, 1927,
+})
+
+
+def is_connection_error(error):
+    """error가 연결이 끊겨서 난 오류이면 True입니다. 교착 상태·잠금 대기·제약 위반·풀 대기 시간 초과는 False입니다."""
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True # 이미 닫힌 연결로 쿼리를 보낸 경우
+    if isinstance(error, PoolTimeout) or not isinstance(error, pymysql.err.OperationalError):
+        return False
+    return bool(error.args) and error.args[0] in CONNECTION_ERRORS
+
+
+class TimedCursor:
+    """
+    execute()/executemany()/callproc() 실행 시간을 측정해 on_query(seconds, query, args)로 알려주고,
+    연결이 끊겨 실패하면 on_connection_error(error)를 호출하는 커서 래퍼입니다. (둘 다 None일 수 있습니다.)
+    나머지 속성과 메서드는 원래 커서로 그대로 넘깁니다.
+    """
+
+    def __init__(self, cursor, on_query, on_connection_error=None):
+        self._cursor = cursor
+        self._on_query = on_query
+        self._on_connection_error = on_connection_error
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._cursor.close()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def _timed(self, method, query, args):
+        start = time.perf_counter()
+        try:
+            return method(query, args)
+        except Exception as e:
+            if self._on_connection_error is not None and is_connection_error(e):
+                self._on_connection_error(e)
+            raise
+        finally:
+            if self._on_query is not None:
+                self._on_query(time.perf_counter() - start, query, args)
+
+    def execute(self, query, args=None):
+        return self._timed(self._cursor.execute, query, args)
+
+    def executemany(self, query, args):
+        return self._timed(self._cursor.executemany, query, args)
+
+    def callproc(self, procname, args=()):
+        return self._timed(self._cursor.callproc, procname, args)
+
+
+class PooledConnection:
+    """
+    풀에서 빌려온 pymysql 연결을 감싸는 객체입니다.
+    close()를 호출하면 실제 연결을 끊지 않고 풀에 반납합니다.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def cursor(self, cursor=None):
+        raw_cursor = self._raw.cursor(cursor)
+        if self._pool.on_query is None and self._pool.on_connection_error is None:
+            return raw_cursor
+        return TimedCursor(raw_cursor, self._pool.on_query, self._pool.on_connection_error)
+
+    def commit(self):
+        self._raw.commit()
+        if self._pool.on_commit is not None:
+            self._pool.on_commit()
+
+    @property
+    def released(self):
+        return self._released
+
+    def close(self):
+        """연결을 풀에 반납합니다. 여러 번 호출해도 안전합니다."""
+        if self._released:
+            return
+        self._released = True
+        self._pool.release(self._raw, self._created_at)
+
+
+class ConnectionPool:
+    """
+    DB_CONFIG를 기반으로 하는 크기 제한이 있는 스레드 안전 연결 풀입니다.
+    mod_wsgi 데몬 프로세스의 스레드들이 연결을 공유하도록 합니다.
+
+    계측용 콜백(선택):
+      on_acquire(wait_seconds) : 연결을 빌려줄 때, 빈 연결을 기다린 시간과 함께 호출됩니다.
+      on_query(seconds, query, args) : 커서로 쿼리를 실행할 때마다 실행 시간, SQL, 파라미터와 함께 호출됩니다.
+      on_commit() : 빌려간 연결에서 commit()이 성공할 때마다 호출됩니다.
+      on_connection_error(error) : 커서로 실행한 쿼리가 연결이 끊겨 실패할 때(is_connection_error) 호출됩니다.
+    connector는 연결을 만드는 함수로, 기본값은 pymysql.connect 입니다. (벤치마크에서 대체 DB 사용)
+    """
+
+    def __init__(self, config, max_size=5, timeout=5.0, recycle=3600, ping_interval=30,
+                 on_acquire=None, on_query=None, on_commit=None, on_connection_error=None, connector=None):
+        self.config = dict(config)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.recycle = recycle # 이 시간(초)보다 오래된 연결은 새로 맺습니다.
+        self.ping_interval = ping_interval # 이 시간(초) 이상 쉬던 연결은 사용 전에 ping 합니다.
+        self.on_acquire = on_acquire
+        self.on_query = on_query
+        self.on_commit = on_commit
+        self.on_connection_error = on_connection_error
+        self.connector = connector or pymysql.connect
+
+        self._cond = threading.Condition()
+        self._idle = deque() # (raw_conn, created_at, last_used)
+        self._size = 0 # 현재 열려 있는 연결 수 (사용 중 + 대기 중)
+        self._in_use = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._connects = 0
+        self._recent_connects = deque() # 최근 60초간의 연결 생성 시각
+
+    def _connect(self):
+        raw = self.connector(**self.config)
+        now = time.monotonic()
+        with self._cond:
+            self._connects += 1
+            self._recent_connects.append(now)
+        return raw, now
+
+    def _discard(self, raw):
+        try:
+            raw.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """풀에서 연결을 하나 빌려옵니다. 시간 초과 시 PoolTimeout을 발생시킵니다."""
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        entry = None
+        with self._cond:
+            waited = False
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1 # 자리를 먼저 확보하고 연결은 락 밖에서 맺습니다.
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    logger.warning("DB 연결 풀 대기 시간 초과 (max_size=%s, timeout=%ss)", self.max_size, timeout)
+                    raise PoolTimeout(f"{timeout}초 안에 DB 연결을 얻지 못했습니다 (max_size={self.max_size}).")
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+            self._in_use += 1
+        if self.on_acquire is not None:
+            self.on_acquire(time.monotonic() - started)
+
+        try:
+            if entry is None:
+                raw, created_at = self._connect()
+            else:
+                raw, created_at, last_used = entry
+                now = time.monotonic()
+                if self.recycle and now - created_at > self.recycle:
+                    self._discard(raw)
+                    raw, created_at = self._connect()
+                elif now - last_used > self.ping_interval:
+                    try:
+                        raw.ping(reconnect=False)
+                    except Exception as e:
+                        logger.info("끊어진 풀 연결을 새 연결로 교체합니다: %s", e)
+                        self._discard(raw)
+                        raw, created_at = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        return PooledConnection(self, raw, created_at)
+
+    def release(self, raw, created_at):
+        """빌려간 연결을 반납합니다. 끊어졌거나 트랜잭션이 남은 연결은 정리합니다."""
+        keep = raw.open
+        if keep and raw.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            # 커밋되지 않은 작업이 다음 요청으로 새어 나가지 않도록 롤백합니다.
+            try:
+                raw.rollback()
+            except Exception:
+                keep = False
+        if not keep:
+            self._discard(raw)
+        with self._cond:
+            self._in_use -= 1
+            if keep:
+                self._idle.append((raw, created_at, time.monotonic()))
+            else:
+                self._size -= 1
+            self._cond.notify()
+
+    def close_all(self):
+        """대기 중인 연결을 모두 닫습니다. 사용 중인 연결은 반납될 때 다시 풀에 들어갑니다."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+        for raw, _, _ in idle:
+            self._discard(raw)
+
+    def stats(self):
+        """풀 상태(사용 중, 대기 중, 대기 횟수, 초당 연결 생성 수 등)를 반환합니다."""
+        now = time.monotonic()
+        with self._cond:
+            while self._recent_connects and now - self._recent_connects[0] > 60:
+                self._recent_connects.popleft()
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'connects': self._connects,
+                'connects_per_sec': len(self._recent_connects) / 60.0,
+            }
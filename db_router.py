@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from functools import partial
+
+from db_pool import PoolTimeout
+
+logger = logging.getLogger(__name__)
+
+# 읽기/쓰기 분리
+#
+# 쓰기와 트랜잭션은 주(primary) DB 연결 풀로, 읽기 전용 라우트의 조회는 복제(replica) DB 연결 풀로
+# 보냅니다. 복제 DB는 돌아가며(round-robin) 사용하고, 연결을 얻지 못했거나 빌려 간 연결로 실행한 쿼리가
+# 연결 오류(서버가 끊김 등)로 실패한 복제 DB는 eject_seconds 동안 순번에서 빼 두었다가 그 뒤 다시 시도합니다.
+# 모든 복제 DB를 쓸 수 없으면 acquire_read()가 None을 돌려주며, 호출하는 쪽은 주 DB를 사용합니다.
+#
+# 복제 DB가 죽으면 처음 실패한 쿼리에서 바로 순번에서 빠지므로, 대기 중이던 다른 연결이 ping이나 다음
+# 쿼리에서 하나씩 실패하기를 기다리지 않습니다. 연결 시도가 오래 걸리지 않도록 복제 DB 설정에는
+# connect_timeout을 짧게 둡니다.
+
+
+class Replica:
+    """복제 DB 하나의 연결 풀과 상태입니다."""
+
+    def __init__(self, name, pool):
+        self.name = name
+        self.pool = pool
+        self.ejected_until = 0.0 # time.monotonic() 기준. 이 시각 전에는 사용하지 않습니다.
+        self.ejections = 0
+        self.last_error = None
+
+    @property
+    def healthy(self):
+        return time.monotonic() >= self.ejected_until
+
+
+class ReplicaRouter:
+    """
+    주 DB 풀과 복제 DB 풀 목록으로 읽기 연결을 골라 줍니다.
+    복제 DB 풀의 on_connection_error는 이 라우터가 설정합니다.
+    """
+
+    def __init__(self, primary, replicas=(), eject_seconds=30.0, acquire_timeout=0.5):
+        self.primary = primary
+        self.replicas = [Replica(name, pool) for name, pool in replicas]
+        self.eject_seconds = eject_seconds
+        self.acquire_timeout = acquire_timeout # 바쁜 복제 DB를 오래 기다리지 않고 다음 것을 시도합니다.
+        self._lock = threading.Lock()
+        self._next = 0
+        self._fallbacks = 0
+        for replica in self.replicas:
+            replica.pool.on_connection_error = partial(self._connection_lost, replica)
+
+    def _candidates(self):
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.replicas), 1)
+        ordered = self.replicas[start:] + self.replicas[:start]
+        return [replica for replica in ordered if replica.healthy]
+
+    def acquire_read(self):
+        """사용할 수 있는 복제 DB의 연결을 반환합니다. 없으면 None을 반환합니다(주 DB를 사용하세요)."""
+        for replica in self._candidates():
+            try:
+                return replica.pool.acquire(timeout=self.acquire_timeout)
+            except PoolTimeout:
+                continue # 연결이 모두 사용 중일 뿐 장애는 아니므로 빼지 않습니다.
+            except Exception as e:
+                self.eject(replica, e)
+        if self.replicas:
+            with self._lock:
+                self._fallbacks += 1
+        return None
+
+    def _connection_lost(self, replica, error):
+        # 같은 장애로 여러 요청의 쿼리가 잇달아 실패해도 이미 빠져 있으면 다시 빼지 않습니다.
+        if replica.healthy:
+            self.eject(replica, error)
+
+    def eject(self, replica, error):
+        """복제 DB를 eject_seconds 동안 순번에서 빼고, 대기 중인 연결을 닫습니다."""
+        with self._lock:
+            replica.ejected_until = time.monotonic() + self.eject_seconds
+            replica.ejections += 1
+            replica.last_error = str(error)
+        replica.pool.close_all()
+        logger.warning("복제 DB %s를 %s초 동안 읽기 대상에서 제외합니다: %s", replica.name, self.eject_seconds, error)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'fallbacks': self._fallbacks,
+                'replicas': [{
+                    'name': replica.name,
+                    'healthy': replica.healthy,
+                    'ejections': replica.ejections,
+                    'last_error': replica.last_error,
+                    'in_use': replica.pool.stats()['in_use'],
+                } for replica in self.replicas],
+            }
+
+
+def parse_replicas(value, default_port=3306):
+    """'host1:3307,host2' 형식의 문자열을 [(host, port), ...]로 바꿉니다."""
+    replicas = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append((host, int(port) if port else default_port))
+    return replicas
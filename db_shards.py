@@ -0,0 +1,294 @@
+"""
+사용자별 테이블(일기, To-Do) 샤딩
+
+diaries와 todos는 모든 조회/변경이 user_id로 걸러지므로, 사용자마다 하나의 DB(샤드)에 모아 여러
+DB 서버로 나눌 수 있습니다. users, board, comments 등 나머지 테이블은 계속 주 DB에만 있습니다.
+사용자가 어느 샤드에 있는지는 주 DB의 users.shard 컬럼에 기록하며(기본값 'main' = 주 DB),
+새 사용자는 DB_SHARD_PLACEMENT의 샤드 중 사용자 이름의 해시로 고른 곳에 배치됩니다.
+웹 프로세스는 사용자의 샤드를 세션에 기억하고 샤드 버전(CACHE_VERSION_FILE)이 바뀔 때만 다시 읽으므로,
+이 명령은 웹 프로세스와 같은 CACHE_VERSION_FILE을 지정해 실행해야 합니다.
+
+샤드 DB에는 migrations/shard/ 의 스키마를 적용합니다. (python migrate.py --shard s1 apply)
+
+웹 프로세스의 일기/To-Do 쓰기는 트랜잭션마다 주 DB의 users 행을 SELECT ... FOR UPDATE로 잠그고
+shard/shard_moving_to를 확인한 뒤에 씁니다(app.lock_user_shard). 잠금은 그 쓰기가 끝날 때까지 유지됩니다.
+
+사용자 옮기기(move)는 다음 순서로 진행합니다.
+  1. 같은 users 행을 FOR UPDATE로 잠가(확인을 통과한 쓰기가 끝날 때까지 기다림) users.shard_moving_to를
+     기록하고 샤드 버전을 올립니다. 이후 그 사용자의 일기/To-Do 쓰기는 모두 거절(503)됩니다.
+  2. 대상 샤드에서 한 트랜잭션으로 그 사용자의 기존 행을 지우고 원본 행을 복사한 뒤 행 수를 확인합니다.
+     (To-Do/일기 id는 대상 샤드에서 새로 매겨집니다)
+  3. users.shard를 바꾸고 샤드 버전을 올립니다.
+  4. 원본 샤드의 행을 지웁니다.
+2까지 실패하면 대상 샤드를 롤백하고 이동 표시를 지워 원래 샤드를 계속 사용합니다.
+
+    python db_shards.py status                   # 샤드별 사용자 수와 행 수
+    python db_shards.py move 42 s1               # 사용자 42를 샤드 s1로 옮기기
+    python db_shards.py rebalance --dry-run      # 행 수가 고르게 되도록 옮길 사용자 계획 출력
+    python db_shards.py rebalance --max-users 20
+"""
+import argparse
+import sys
+import zlib
+
+# 주 DB를 가리키는 샤드 이름
+MAIN_SHARD = 'main'
+
+# 샤드로 나누는 테이블 -> 옮길 때 복사하는 컬럼 (id는 대상 샤드에서 새로 매깁니다)
+SHARDED_TABLES = {
+    'diaries': ('user_id', 'entry_date', 'title', 'content', 'created_at', 'updated_at'),
+    'todos': ('user_id', 'task', 'due_date', 'status', 'created_at'),
+}
+
+
+class ShardMoving(Exception):
+    """사용자의 행을 다른 샤드로 옮기는 중이라 지금은 일기/To-Do를 쓸 수 없습니다."""
+
+
+def parse_shards(value, default_port=3306):
+    """'s1=host1:3307,s2=host2/flask_auth_db2' 형식의 문자열을 [(이름, host, port, db 또는 None), ...]로 바꿉니다."""
+    shards = []
+    for item in (value or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        name, sep, address = item.partition('=')
+        if not sep or not name.strip() or name.strip() == MAIN_SHARD:
+            raise ValueError(f"샤드 설정 형식이 잘못되었습니다: {item} ('이름=host:port/db', 이름은 {MAIN_SHARD} 제외)")
+        address, _, db = address.strip().partition('/')
+        host, _, port = address.partition(':')
+        shards.append((name.strip(), host, int(port) if port else default_port, db or None))
+    return shards
+
+
+def shard_version_key(user_id):
+    return f'shard:{user_id}'
+
+
+class ShardMap:
+    """샤드 이름 -> 연결 풀. 'main'은 주 DB 풀이며 항상 있습니다."""
+
+    def __init__(self, main_pool, shards=(), placement=None):
+        self.pools = {MAIN_SHARD: main_pool}
+        self.pools.update(shards)
+        self.placement = list(placement or self.pools)
+        unknown = [name for name in self.placement if name not in self.pools]
+        if unknown:
+            raise ValueError(f"DB_SHARD_PLACEMENT에 알 수 없는 샤드가 있습니다: {', '.join(unknown)}")
+
+    @property
+    def sharded(self):
+        """주 DB 말고 다른 샤드가 설정되어 있으면 True. False면 모든 사용자가 주 DB를 씁니다."""
+        return len(self.pools) > 1
+
+    def place(self, username):
+        """새 사용자를 둘 샤드 이름을 고릅니다."""
+        return self.placement[zlib.crc32(username.encode('utf-8')) % len(self.placement)]
+
+    def pool(self, name):
+        try:
+            return self.pools[name]
+        except KeyError:
+            raise KeyError(f"설정되지 않은 샤드입니다: {name} (DB_SHARDS 확인)")
+
+
+def _user_shard(cursor, user_id, lock=False):
+    cursor.execute("SELECT shard, shard_moving_to FROM users WHERE id = %s" + (" FOR UPDATE" if lock else ""),
+                   (user_id,))
+    row = cursor.fetchone()
+    if row is None:
+        raise ValueError(f"사용자 {user_id}가 없습니다.")
+    return row
+
+
+def _copy_rows(source, target, table, columns, user_id, batch_size):
+    """원본 샤드에서 사용자의 행을 id 순서로 batch_size개씩 읽어 대상 샤드에 넣고, 넣은 행 수를 반환합니다."""
+    column_list = ', '.join(columns)
+    insert = f"INSERT INTO {table} ({column_list}) VALUES ({', '.join(['%s'] * len(columns))})"
+    copied, last_id = 0, 0
+    while True:
+        with source.cursor() as cursor:
+            cursor.execute(f"SELECT id, {column_list} FROM {table} WHERE user_id = %s AND id > %s "
+                           f"ORDER BY id LIMIT %s", (user_id, last_id, batch_size))
+            rows = cursor.fetchall()
+        if not rows:
+            return copied
+        with target.cursor() as cursor:
+            cursor.executemany(insert, [tuple(row[column] for column in columns) for row in rows])
+        copied += len(rows)
+        last_id = rows[-1]['id']
+
+
+def _count_rows(conn, table, user_id):
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) AS n FROM {table} WHERE user_id = %s", (user_id,))
+        return cursor.fetchone()['n']
+
+
+def move_user(shard_map, versions, user_id, target_name, batch_size=500, on_moved=None, log=print):
+    """
+    사용자의 일기/To-Do 행을 target_name 샤드로 옮깁니다. 옮긴 테이블별 행 수 dict를 반환합니다.
+    on_moved(user_id)는 users.shard를 바꾼 뒤 호출됩니다(id가 바뀐 To-Do 캐시 무효화용).
+    """
+    target_pool = shard_map.pool(target_name)
+    main = shard_map.pool(MAIN_SHARD).acquire()
+    try:
+        with main.cursor() as cursor:
+            # 쓰기 경로와 같은 행 잠금으로, 확인을 통과하고 아직 쓰는 중인 요청이 끝난 뒤에 이동을 표시합니다.
+            row = _user_shard(cursor, user_id, lock=True)
+            if row['shard_moving_to']:
+                raise ValueError(f"사용자 {user_id}는 이미 {row['shard_moving_to']}로 옮기는 중입니다. "
+                                 "이전 작업이 중단되었다면 users.shard_moving_to를 NULL로 되돌리세요.")
+            source_name = row['shard']
+            if source_name == target_name:
+                main.rollback()
+                log(f"사용자 {user_id}는 이미 {target_name}에 있습니다.")
+                return {}
+            cursor.execute("UPDATE users SET shard_moving_to = %s WHERE id = %s", (target_name, user_id))
+        main.commit()
+        versions.bump(shard_version_key(user_id))
+        log(f"사용자 {user_id}: {source_name} -> {target_name} 이동 시작")
+
+        source = shard_map.pool(source_name).acquire()
+        target = target_pool.acquire()
+        try:
+            try:
+                copied = {}
+                with target.cursor() as cursor:
+                    for table in SHARDED_TABLES:
+                        # 이전에 중단된 이동이 남긴 행을 지우고 새로 복사합니다.
+                        cursor.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+                for table, columns in SHARDED_TABLES.items():
+                    copied[table] = _copy_rows(source, target, table, columns, user_id, batch_size)
+                    expected = _count_rows(source, table, user_id)
+                    if copied[table] != expected or _count_rows(target, table, user_id) != expected:
+                        raise RuntimeError(f"{table} 행 수가 맞지 않습니다 (원본 {expected}, 복사 {copied[table]})")
+                target.commit()
+                source.rollback()
+            except Exception:
+                target.rollback()
+                source.rollback()
+                with main.cursor() as cursor:
+                    cursor.execute("UPDATE users SET shard_moving_to = NULL WHERE id = %s", (user_id,))
+                main.commit()
+                versions.bump(shard_version_key(user_id))
+                raise
+
+            with main.cursor() as cursor:
+                cursor.execute("UPDATE users SET shard = %s, shard_moving_to = NULL WHERE id = %s",
+                               (target_name, user_id))
+            main.commit()
+            versions.bump(shard_version_key(user_id))
+            if on_moved is not None:
+                on_moved(user_id)
+
+            with source.cursor() as cursor:
+                for table in SHARDED_TABLES:
+                    cursor.execute(f"DELETE FROM {table} WHERE user_id = %s", (user_id,))
+            source.commit()
+        finally:
+            source.close()
+            target.close()
+    finally:
+        main.close()
+    log(f"사용자 {user_id}: {target_name}로 옮김 " + ', '.join(f"{table} {n}행" for table, n in copied.items()))
+    return copied
+
+
+def shard_loads(shard_map):
+    """{샤드 이름: {user_id: 행 수}}. 샤드마다 테이블별 GROUP BY user_id 한 번씩 조회합니다."""
+    main = shard_map.pool(MAIN_SHARD).acquire()
+    try:
+        with main.cursor() as cursor:
+            cursor.execute("SELECT id, shard FROM users")
+            homes = {row['id']: row['shard'] for row in cursor.fetchall()}
+        main.rollback()
+    finally:
+        main.close()
+
+    loads = {name: {} for name in shard_map.pools}
+    for user_id, name in homes.items():
+        loads.setdefault(name, {})[user_id] = 0
+    for name, pool in shard_map.pools.items():
+        conn = pool.acquire()
+        try:
+            with conn.cursor() as cursor:
+                for table in SHARDED_TABLES:
+                    cursor.execute(f"SELECT user_id, COUNT(*) AS n FROM {table} GROUP BY user_id")
+                    for row in cursor.fetchall():
+                        # users.shard와 다른 샤드에 남은 행(중단된 이동)은 세지 않습니다.
+                        if homes.get(row['user_id']) == name:
+                            loads[name][row['user_id']] += row['n']
+            conn.rollback()
+        finally:
+            conn.close()
+    return loads
+
+
+def plan_rebalance(loads, targets, max_users):
+    """
+    가장 행이 많은 샤드에서 가장 적은 대상 샤드(targets)로, 두 샤드의 차이를 줄이는 사용자를 하나씩
+    옮기는 계획 [(user_id, 원본, 대상, 행 수), ...]을 만듭니다. 더 줄일 수 없거나 max_users명이면 멈춥니다.
+    """
+    loads = {name: dict(users) for name, users in loads.items()}
+    plan = []
+    while len(plan) < max_users:
+        totals = {name: sum(users.values()) for name, users in loads.items()}
+        source = max(totals, key=totals.get)
+        target = min((name for name in targets if name in loads), key=totals.get)
+        gap = totals[source] - totals[target]
+        # 옮긴 뒤 차이가 줄어드는(행 수가 gap보다 작은) 사용자 중 가장 큰 사용자를 고릅니다.
+        candidates = [(rows, user_id) for user_id, rows in loads[source].items() if 0 < rows < gap]
+        if source == target or not candidates:
+            break
+        rows, user_id = max(candidates)
+        del loads[source][user_id]
+        loads[target][user_id] = rows
+        plan.append((user_id, source, target, rows))
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='샤드별 사용자 수와 행 수')
+    move_parser = sub.add_parser('move', help='사용자 한 명 옮기기')
+    move_parser.add_argument('user_id', type=int)
+    move_parser.add_argument('target')
+    rebalance_parser = sub.add_parser('rebalance', help='행 수가 고르게 되도록 사용자 옮기기')
+    rebalance_parser.add_argument('--max-users', type=int, default=10)
+    rebalance_parser.add_argument('--dry-run', action='store_true')
+    for sub_parser in (move_parser, rebalance_parser):
+        sub_parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args(argv)
+
+    from app import shard_map, cache_versions, forget_moved_user, CACHE_VERSION_FILE
+
+    if args.command != 'status' and not CACHE_VERSION_FILE:
+        # 기본 경로는 웹 프로세스(Apache PrivateTmp)와 다른 파일일 수 있어, 옮긴 뒤에도 세션이 원래 샤드를 읽습니다.
+        print("CACHE_VERSION_FILE을 웹 프로세스와 같은 경로로 지정해야 사용자를 옮길 수 있습니다.", file=sys.stderr)
+        return 2
+
+    if args.command == 'status':
+        for name, users in shard_loads(shard_map).items():
+            print(f"{name:<12} 사용자 {len(users):>6}명  일기/To-Do {sum(users.values()):>9}행")
+        return 0
+
+    if args.command == 'move':
+        moves = [(args.user_id, args.target)]
+    else:
+        plan = plan_rebalance(shard_loads(shard_map), shard_map.placement, args.max_users)
+        for user_id, source, target, rows in plan:
+            print(f"사용자 {user_id}: {source} -> {target} ({rows}행)")
+        if args.dry_run or not plan:
+            print(f"{len(plan)}명 이동 예정" if plan else "옮길 사용자가 없습니다.")
+            return 0
+        moves = [(user_id, target) for user_id, _, target, _ in plan]
+
+    for user_id, target in moves:
+        move_user(shard_map, cache_versions, user_id, target, batch_size=args.batch_size, on_moved=forget_moved_user)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
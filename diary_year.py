@@ -0,0 +1,102 @@
+from datetime import date, timedelta
+from functools import lru_cache
+
+# 연간 일기 작성 현황 (히트맵)
+#
+# 1년 동안 어느 날에 일기를 썼는지는 날짜별 1비트, 최대 366비트 정수 하나로 나타냅니다.
+# bit n = 그해 n+1번째 날(1월 1일이 bit 0)에 일기 있음. 월별 작성 수와 연속 작성 일수(streak)는
+# 이 비트맵만으로 계산하므로, DB에서는 한 해 범위의 entry_date만 한 번 읽으면 됩니다.
+# 연속 작성 일수는 해당 연도 안에서만 셉니다(전년도 말일에서 이어지는 연속은 포함하지 않습니다).
+
+
+def year_range(year):
+    """해당 연도의 [1월 1일, 다음 해 1월 1일) 날짜 범위를 반환합니다."""
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+
+def days_in_year(year):
+    start, end = year_range(year)
+    return (end - start).days
+
+
+def day_index(d):
+    """날짜의 비트 위치(그해 1월 1일 = 0)를 반환합니다."""
+    return d.timetuple().tm_yday - 1
+
+
+def bitmap(dates):
+    """같은 연도의 날짜 목록을 비트맵 정수로 바꿉니다."""
+    bits = 0
+    for d in dates:
+        bits |= 1 << day_index(d)
+    return bits
+
+
+@lru_cache(maxsize=64)
+def _month_masks(year):
+    masks = []
+    for month in range(1, 13):
+        start = day_index(date(year, month, 1))
+        end = day_index(date(year, month + 1, 1)) if month < 12 else days_in_year(year)
+        masks.append(((1 << (end - start)) - 1) << start)
+    return tuple(masks)
+
+
+def monthly_counts(bits, year):
+    """1월부터 12월까지 월별 일기 작성 일수 목록을 반환합니다."""
+    return [bin(bits & mask).count('1') for mask in _month_masks(year)]
+
+
+def longest_streak(bits):
+    """연속으로 켜진 비트의 최대 길이를 반환합니다. (x &= x << 1 한 번마다 모든 연속 구간이 1씩 줄어듭니다)"""
+    length = 0
+    while bits:
+        bits &= bits << 1
+        length += 1
+    return length
+
+
+def current_streak(bits, year, today):
+    """
+    today까지 이어지고 있는 연속 작성 일수를 반환합니다. 오늘 아직 쓰지 않았다면 어제까지를 셉니다.
+    지난 연도는 12월 31일까지, 아직 오지 않은 연도는 0입니다.
+    """
+    if today.year < year:
+        return 0
+    end = day_index(today) if today.year == year else days_in_year(year) - 1
+    if today.year == year and not bits >> end & 1 and end > 0:
+        end -= 1 # 오늘은 아직 끝나지 않았으므로 연속이 끊긴 것으로 보지 않습니다.
+    missing = ~bits & ((1 << (end + 1)) - 1) # end 이하에서 일기가 없는 날
+    return end + 1 - missing.bit_length()
+
+
+def summarize(bits, year, today):
+    """JSON 응답과 연간 화면에 쓰는 요약 dict를 만듭니다. bitmap은 92자리 16진수 문자열입니다."""
+    return {
+        'year': year,
+        'days': days_in_year(year),
+        'bitmap': format(bits, '092x'),
+        'total': bin(bits).count('1'),
+        'monthly': monthly_counts(bits, year),
+        'current_streak': current_streak(bits, year, today),
+        'longest_streak': longest_streak(bits),
+    }
+
+
+@lru_cache(maxsize=64)
+def week_grid(year):
+    """
+    일요일부터 시작하는 주 단위 히트맵 칸 목록을 반환합니다. 결과는 메모이즈됩니다.
+    각 주는 7칸이며, 칸은 (비트 위치, 'YYYY-MM-DD') 또는 그해가 아니면 None입니다.
+    """
+    start, end = year_range(year)
+    first = start - timedelta(days=(start.weekday() + 1) % 7) # 1월 1일이 속한 주의 일요일
+    weeks = []
+    d = first
+    while d < end:
+        week = []
+        for _ in range(7):
+            week.append((day_index(d), d.isoformat()) if start <= d < end else None)
+            d += timedelta(days=1)
+        weeks.append(tuple(week))
+    return tuple(weeks)
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+# 사용자 데이터 내보내기 (CSV / JSON Lines)
+#
+# 일기·To-Do·게시글을 DictCursor + fetchall()로 읽으면 사용자의 전체 기록이 웹 스레드 메모리에
+# 한꺼번에 올라옵니다. 그렇다고 서버 측 커서 하나로 끝까지 읽으면, 느린 클라이언트가 내려받는 동안
+# 풀 연결 하나를 계속 붙잡게 됩니다. 여기서는 키셋 조건으로 batch_size 행씩 나눠 읽고, 배치마다
+# 연결을 빌렸다가 행을 보내기 전에 풀에 돌려줍니다. 그래서 메모리 사용량은 배치 하나 크기로 일정하고,
+# 클라이언트가 느려도 연결은 쿼리 하나 동안만 쓰입니다. (배치마다 따로 읽으므로 전체가 한 시점의
+# 스냅숏은 아닙니다. 내려받는 도중 추가/수정된 행은 키 순서에 따라 포함되거나 빠질 수 있습니다.)
+
+# 내보내기 종류 -> (파일 이름, 컬럼 목록, SQL, 키셋 키). SQL은 user_id 하나만 파라미터로 받고
+# ORDER BY/LIMIT 없이 WHERE까지만 씁니다. 키셋 키는 사용자 안에서 유일한 정렬 순서여야 하고 SELECT에 포함돼야 합니다.
+EXPORTS = {
+    'diaries': ('diaries', ['entry_date', 'title', 'content', 'created_at', 'updated_at'],
+                "SELECT entry_date, title, content, created_at, updated_at "
+                "FROM diaries WHERE user_id = %s", ('entry_date',)),
+    'todos': ('todos', ['task', 'due_date', 'status', 'created_at'],
+              "SELECT id, task, due_date, status, created_at "
+              "FROM todos WHERE user_id = %s", ('created_at', 'id')),
+    'posts': ('posts', ['id', 'title', 'content', 'created_at', 'updated_at'],
+              "SELECT id, title, content, created_at, updated_at "
+              "FROM board WHERE user_id = %s", ('id',)),
+}
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+# 응답 조각 하나의 대략적인 최대 크기(문자 수)
+CHUNK_CHARS = 64 * 1024
+
+
+def _plain(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _batch_sql(sql, keys, after, batch_size):
+    """마지막으로 보낸 행(after) 다음부터 batch_size 행을 읽는 SQL과 추가 파라미터를 만듭니다."""
+    params = []
+    if after is not None:
+        # (a, b) > (%s, %s) 를 인덱스가 범위 검색할 수 있는 형태로 풀어 씁니다.
+        first, *rest = keys
+        if rest:
+            sql += f" AND ({first} > %s OR ({first} = %s AND {rest[0]} > %s))"
+            params.extend([after[0], after[0], after[1]])
+        else:
+            sql += f" AND {first} > %s"
+            params.append(after[0])
+    sql += " ORDER BY " + ", ".join(keys) + " LIMIT %s"
+    params.append(batch_size)
+    return sql, params
+
+
+def read_batches(connect, sql, keys, user_id, batch_size=500):
+    """
+    키셋 조건으로 batch_size 행씩 읽어 한 행씩 돌려주는 제너레이터입니다.
+    배치마다 connect()로 연결을 빌려 쿼리 하나만 실행하고, 행을 돌려주기 전에 close()로 반납합니다.
+    """
+    after = None
+    while True:
+        conn = connect()
+        try:
+            with conn.cursor() as cursor:
+                batch_sql, params = _batch_sql(sql, keys, after, batch_size)
+                cursor.execute(batch_sql, [user_id] + params)
+                batch = list(cursor.fetchall())
+        finally:
+            conn.close()
+        yield from batch
+        if len(batch) < batch_size:
+            return
+        after = tuple(batch[-1][key] for key in keys)
+
+
+def csv_chunks(rows, columns):
+    """행들을 CSV 텍스트 조각으로 만듭니다. 엑셀에서 한글이 깨지지 않도록 BOM을 붙입니다."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_plain(row[column]) for column in columns])
+        if buffer.tell() >= CHUNK_CHARS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def jsonl_chunks(rows, columns):
+    """행들을 한 줄에 JSON 객체 하나인 JSON Lines 텍스트 조각으로 만듭니다."""
+    lines = []
+    size = 0
+    for row in rows:
+        line = json.dumps({column: _plain(row[column]) for column in columns}, ensure_ascii=False)
+        lines.append(line)
+        size += len(line) + 1
+        if size >= CHUNK_CHARS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+            size = 0
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+CHUNKERS = {'csv': csv_chunks, 'jsonl': jsonl_chunks}
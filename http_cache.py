@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+from flask import request, session
+from flask.globals import request_ctx
+
+# 조건부 GET(ETag / If-None-Match) 지원
+#
+# 페이지의 ETag는 그 페이지에 영향을 주는 데이터의 버전(쓰기 경로에서 올리는 VersionCounter 값),
+# 사용자, 요청 URL, 템플릿 버전으로 만듭니다. 따라서 쿼리 실행과 템플릿 렌더링 없이
+# 버전 몇 개만 읽어 304 Not Modified 여부를 판단할 수 있습니다.
+
+# 사용자별 페이지이므로 공유 캐시(프록시)에는 저장하지 않고, 브라우저는 매번 재검증하게 합니다.
+PRIVATE_CACHE_CONTROL = 'private, no-cache'
+# flash 메시지를 담은 응답은 한 번만 보여야 하므로 브라우저도 저장하지 않게 합니다.
+NO_STORE_CACHE_CONTROL = 'private, no-store'
+
+
+def template_build_id(*dirs):
+    """템플릿이나 정적 파일이 바뀌면 ETag도 바뀌도록 파일들의 최종 수정 시각으로 빌드 값을 만듭니다."""
+    latest = 0
+    for top in dirs:
+        for root, _, files in os.walk(top):
+            for name in files:
+                latest = max(latest, os.stat(os.path.join(root, name)).st_mtime_ns)
+    return str(latest)
+
+
+def make_etag(versions, version_keys, *parts):
+    """버전 키들의 현재 값과 추가 구성 요소로 ETag 문자열을 만듭니다."""
+    digest = hashlib.sha1(str(versions.epoch).encode())
+    for key in version_keys:
+        digest.update(f"|{key}={versions.get(key)}".encode('utf-8'))
+    for part in parts:
+        digest.update(f"|{part}".encode('utf-8'))
+    return digest.hexdigest()[:32]
+
+
+def is_not_modified(etag):
+    """
+    브라우저가 보낸 If-None-Match가 etag와 같으면 True를 반환합니다.
+    표시할 flash 메시지가 남아 있으면 페이지를 새로 그려야 하므로 False입니다.
+    """
+    if session.get('_flashes'):
+        return False
+    # 압축 미들웨어가 ETag를 약한 ETag로 바꾸므로 약한 비교를 사용합니다.
+    return request.if_none_match.contains_weak(etag)
+
+
+def shows_flashes():
+    """
+    이 응답에 flash 메시지가 들어가면 True를 반환합니다. 렌더링하며 이미 꺼낸 메시지(get_flashed_messages)와
+    스트리밍 응답이 본문을 만들 때 꺼낼, 세션에 남은 메시지를 모두 봅니다.
+    """
+    return bool(request_ctx.flashes or session.get('_flashes'))
+
+
+def set_validators(response, etag):
+    """
+    응답에 ETag와 사용자별 페이지용 Cache-Control 헤더를 설정합니다. etag가 None이면 ETag는 생략합니다.
+    flash 메시지가 들어간 응답에는 ETag를 붙이지 않습니다. 붙이면 다음 새로고침이 같은 ETag로 304를 받아
+    브라우저가 이미 본 메시지가 담긴 페이지를 다시 보여줍니다.
+    """
+    if shows_flashes():
+        response.headers['Cache-Control'] = NO_STORE_CACHE_CONTROL
+        response.vary.add('Cookie')
+        return response
+    if etag:
+        response.set_etag(etag)
+    response.headers['Cache-Control'] = PRIVATE_CACHE_CONTROL
+    response.vary.add('Cookie')
+    return response
@@ -0,0 +1,242 @@
+import codecs
+import csv
+import json
+import logging
+import math
+from datetime import datetime
+
+import pymysql
+
+logger = logging.getLogger(__name__)
+
+# To-Do / 일기 일괄 가져오기 (CSV / JSON Lines)
+#
+# 다른 도구에서 옮겨 오는 사용자는 수천 건의 기록을 한 번에 올립니다. 업로드 파일을 한 줄씩 읽어
+# 검증하고, 올바른 행만 batch_size개씩 모아 executemany 한 번(pymysql은 여러 행 INSERT 한 문장으로 보냄)과
+# 커밋 한 번으로 저장합니다. 잘못된 행은 줄 번호와 이유를 기록하고 건너뛰며 나머지 행은 계속 가져옵니다.
+# 일기는 (user_id, entry_date) UNIQUE 키로 upsert 하므로 같은 날짜의 일기는 새 내용으로 바뀝니다.
+#
+# 검증을 통과했는데도 DB가 거절하는 행이 있으면 그 배치를 반씩 나누어 다시 넣으며(같은 트랜잭션 안,
+# 실패한 문장은 아무 행도 남기지 않음) 문제가 되는 행만 찾아 건너뜁니다. 이렇게 찾은 행이
+# max_db_errors개가 되면 나머지는 가져오지 않고 멈춥니다. 따라서 한 번의 가져오기가 실행하는 쿼리 수는
+# query_budget()으로 미리 계산할 수 있습니다.
+
+# 행 하나의 값 때문에 생기는 DB 오류 (이외의 오류는 가져오기를 중단합니다)
+ROW_ERRORS = (pymysql.err.DataError, pymysql.err.IntegrityError)
+
+# 업로드 형식 (파일 확장자 또는 ?format=)
+FORMATS = ('csv', 'jsonl')
+
+# 가져오기 종류 -> 저장 SQL. 파라미터 순서는 validate_* 함수가 돌려주는 튜플의 순서와 같습니다.
+INSERT_SQL = {
+    'todos': "INSERT INTO todos (user_id, task, due_date, status) VALUES (%s, %s, %s, %s)",
+    'diaries': "INSERT INTO diaries (user_id, entry_date, title, content) VALUES (%s, %s, %s, %s) "
+               "ON DUPLICATE KEY UPDATE title = VALUES(title), content = VALUES(content)",
+}
+
+
+class InvalidRecord(ValueError):
+    """가져오기 중 한 행을 건너뛰게 만드는 검증 오류입니다. 메시지는 사용자에게 그대로 보여줍니다."""
+
+
+def parse_date(value, label):
+    """'YYYY-MM-DD' 문자열을 date로 바꿉니다. 형식이 틀리면 InvalidRecord를 발생시킵니다."""
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise InvalidRecord(f"유효하지 않은 {label} 형식입니다: {value}")
+
+
+def _text(record, name):
+    value = record.get(name)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise InvalidRecord(f"{name} 값은 문자열이어야 합니다.")
+    return value.strip()
+
+
+def validate_todo(record, statuses):
+    """
+    To-Do 한 건을 add_todo와 같은 규칙으로 검사해 (task, due_date, status)를 반환합니다.
+    task는 비어 있으면 안 되고, due_date는 비어 있거나 YYYY-MM-DD, status는 비어 있으면 '미완료'입니다.
+    """
+    task = _text(record, 'task')
+    if not task:
+        raise InvalidRecord('할 일 내용을 비워둘 수 없습니다.')
+    due_date_str = _text(record, 'due_date')
+    due_date = parse_date(due_date_str, '마감일') if due_date_str else None
+    status = _text(record, 'status') or statuses[0]
+    if status not in statuses:
+        raise InvalidRecord(f"알 수 없는 상태입니다: {status} ({'/'.join(statuses)} 중 하나)")
+    return task, due_date, status
+
+
+def validate_diary(record):
+    """일기 한 건을 diary_entry와 같은 규칙으로 검사해 (entry_date, title, content)를 반환합니다."""
+    entry_date_str = _text(record, 'entry_date')
+    if not entry_date_str:
+        raise InvalidRecord('entry_date가 없습니다.')
+    entry_date = parse_date(entry_date_str, '날짜')
+    content = _text(record, 'content')
+    if not content:
+        raise InvalidRecord('일기 내용은 비워둘 수 없습니다.')
+    return entry_date, _text(record, 'title'), content
+
+
+def _records(lines, fmt):
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        try:
+            for record in reader:
+                if None in record:
+                    yield reader.line_num, InvalidRecord('헤더보다 값이 많습니다.')
+                else:
+                    yield reader.line_num, record
+        except csv.Error as e:
+            yield reader.line_num, InvalidRecord(f"CSV 형식 오류: {e}")
+        return
+
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, InvalidRecord(f"JSON 형식 오류: {e}")
+            continue
+        if not isinstance(record, dict):
+            yield line_no, InvalidRecord('각 줄은 JSON 객체여야 합니다.')
+        else:
+            yield line_no, record
+
+
+def read_records(stream, fmt):
+    """
+    업로드 스트림(바이트)을 한 줄씩 읽어 (줄 번호, 레코드 dict 또는 InvalidRecord)를 돌려주는 제너레이터입니다.
+    CSV는 첫 줄을 헤더로 사용하며, 엑셀이 붙이는 UTF-8 BOM은 무시합니다.
+    UTF-8이 아닌 바이트를 만나면 오류 하나를 돌려주고 읽기를 멈춥니다.
+    """
+    line_no = 0
+    try:
+        for line_no, record in _records(codecs.iterdecode(stream, 'utf-8-sig'), fmt):
+            yield line_no, record
+    except UnicodeDecodeError:
+        yield line_no + 1, InvalidRecord('UTF-8로 읽을 수 없는 파일입니다. 이후 줄은 가져오지 않았습니다.')
+
+
+class ImportResult:
+    """가져오기 결과. errors에는 최대 max_errors개의 (줄 번호, 이유)만 보관합니다."""
+
+    def __init__(self, max_errors=100):
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.max_errors = max_errors
+        self.truncated = False # max_rows를 넘어 나머지 줄을 읽지 않았으면 True
+        self.aborted = False # 저장 오류가 max_db_errors개에 이르러 나머지를 가져오지 않았으면 True
+        self.db_errors = 0
+
+    def fail(self, line_no, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((line_no, message))
+
+    def as_dict(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'truncated': self.truncated,
+            'aborted': self.aborted,
+            'errors': [{'line': line_no, 'error': message} for line_no, message in self.errors],
+        }
+
+
+def query_budget(max_rows, batch_size, max_db_errors):
+    """
+    import_records()가 실행할 수 있는 최대 쿼리 수. 배치마다 한 번씩, 그리고 DB가 거절한 행 하나를 찾을 때마다
+    반으로 나눈 단계(최대 log2(batch_size)번)마다 두 번씩 더 실행합니다.
+    """
+    depth = math.ceil(math.log2(batch_size)) if batch_size > 1 else 0
+    # 나누기는 찾아낸 행(최대 max_db_errors개)과 멈춘 곳까지의 경로에서만 일어납니다.
+    return math.ceil(max_rows / batch_size) + 2 * depth * (max_db_errors + 1)
+
+
+class _TooManyErrors(Exception):
+    pass
+
+
+def import_records(conn, kind, user_id, records, validate, batch_size=500, max_rows=10000, max_db_errors=10,
+                   before_batch=None, after_batch=None, on_batch=None):
+    """
+    read_records()의 결과를 검증하며 batch_size개씩 저장하고 ImportResult를 반환합니다.
+    배치마다 커밋하므로 중간에 실패해도 앞서 저장한 배치는 남습니다. 배치 저장이 행 값 때문에 실패하면
+    같은 트랜잭션 안에서 배치를 반씩 나누어 다시 넣어 문제가 되는 행만 건너뜁니다. 저장된 배치의
+    (줄 번호, 값) 목록은 커밋 후 on_batch로 전달합니다(캐시 갱신용). before_batch()는 배치마다 트랜잭션을
+    시작하며 먼저 호출하고, 예외를 발생시키면 그 배치를 롤백하고 가져오기를 멈춥니다(샤드 이동 확인용).
+    after_batch()는 배치를 커밋한 직후에 저장된 행이 없어도 호출합니다(before_batch가 잡은 잠금을 푸는 용도).
+    """
+    sql = INSERT_SQL[kind]
+    result = ImportResult()
+    batch = []
+
+    def insert(part, saved):
+        try:
+            with conn.cursor() as cursor:
+                cursor.executemany(sql, [(user_id,) + values for _, values in part])
+            saved.extend(part)
+            return
+        except ROW_ERRORS as e:
+            if result.db_errors >= max_db_errors:
+                raise _TooManyErrors()
+            if len(part) > 1:
+                middle = len(part) // 2
+                insert(part[:middle], saved)
+                insert(part[middle:], saved)
+                return
+            line_no = part[0][0]
+            # 드라이버 메시지에는 테이블/컬럼 이름이 들어 있으므로 로그에만 남깁니다.
+            logger.warning("가져오기 행 저장 실패 (user %s, %s, %d행): %s", user_id, kind, line_no, e)
+            result.fail(line_no, '저장하지 못했습니다. 값의 길이와 형식을 확인해주세요.')
+            result.db_errors += 1
+
+    def flush():
+        saved = []
+        try:
+            if before_batch is not None:
+                before_batch()
+            insert(batch, saved)
+        except _TooManyErrors:
+            result.aborted = True
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        if after_batch is not None:
+            after_batch()
+        result.imported += len(saved)
+        batch.clear()
+        if saved and on_batch is not None:
+            on_batch(saved)
+
+    rows = 0
+    for line_no, record in records:
+        if rows == max_rows:
+            result.truncated = True
+            break
+        rows += 1
+        if isinstance(record, InvalidRecord):
+            result.fail(line_no, str(record))
+            continue
+        try:
+            batch.append((line_no, validate(record)))
+        except InvalidRecord as e:
+            result.fail(line_no, str(e))
+            continue
+        if len(batch) >= batch_size:
+            flush()
+            if result.aborted:
+                return result
+    if batch:
+        flush()
+    return result
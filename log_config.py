@@ -0,0 +1,60 @@
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+# 로깅 설정
+#
+# 요청 스레드는 로그 레코드를 큐에 넣기만 하고, 실제 stderr(mod_wsgi 에러 로그) 쓰기는
+# 별도의 리스너 스레드가 합니다. 따라서 요청 처리 중 로그 I/O 때문에 스레드가 막히지 않습니다.
+#
+# 환경 변수
+#   LOG_LEVEL  : 전체 기본 레벨 (기본값 INFO, 개발 시 DEBUG)
+#   LOG_LEVELS : 모듈별 레벨, 예) "app=DEBUG,db_pool=WARNING"
+#
+# DEBUG 레벨이 꺼져 있으면 logger.debug("...%s", x) 호출은 메시지를 만들지 않고 바로 반환합니다.
+
+LOG_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+_listener = None
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or '').split(','):
+        name, sep, level = item.strip().partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(default_level=None, module_levels=None, stream=None):
+    """
+    큐 기반 비동기 로깅을 설정합니다. 여러 번 호출해도 리스너는 하나만 실행됩니다.
+    반환값은 루트 로거입니다.
+    """
+    global _listener
+
+    root = logging.getLogger()
+    default_level = (default_level or os.getenv('LOG_LEVEL', 'INFO')).upper()
+    if module_levels is None:
+        module_levels = _parse_levels(os.getenv('LOG_LEVELS'))
+
+    if _listener is None:
+        log_queue = queue.SimpleQueue()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(logging.Formatter(LOG_FORMAT))
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+        _listener.start()
+        atexit.register(_listener.stop) # 종료 시 큐에 남은 로그를 모두 씁니다.
+
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    root.setLevel(default_level)
+    for name, level in module_levels.items():
+        logging.getLogger(name).setLevel(level)
+    return root
@@ -0,0 +1,342 @@
+import atexit
+import fcntl
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 요청/DB/템플릿 계측과 Prometheus 텍스트 출력
+#
+# mod_wsgi는 여러 데몬 프로세스를 띄우므로, 각 프로세스는 자신의 측정값 스냅숏을
+# METRICS_DIR/metrics-<pid>.json 으로 주기적으로 기록합니다. /metrics 요청을 받은 프로세스는
+# 이 파일들을 모두 읽어 카운터와 히스토그램 버킷을 더한 뒤 출력합니다. 게이지는 더하면 뜻이 없어지는 값이 많으므로
+# (예: 복제 DB 정상 여부 1이 프로세스 수만큼 더해짐) 측정값마다 aggregate로 합치는 방법을 정합니다.
+# 기본값 'pid'는 pid 라벨을 붙여 프로세스별로 따로 내보내고, 'max'/'min'/'sum'은 프로세스들의 값을 그렇게 합칩니다.
+# mod_wsgi가 데몬 프로세스를
+# 재시작하면(maximum-requests 등) 끝난 프로세스의 카운터와 히스토그램을 METRICS_DIR/_archived.json에
+# 더해 두고 파일을 지웁니다. 합계가 줄어들면 Prometheus가 카운터 초기화로 보고 rate()가 틀어지기 때문입니다.
+# (게이지는 현재 값이므로 끝난 프로세스의 값은 버립니다.)
+#
+# 측정값 갱신은 락 하나와 딕셔너리 연산뿐이라 운영 환경에서 켜 두어도 부담이 적습니다.
+
+# 요청 지연 시간(초) 버킷: 1ms ~ 10s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 요청당 DB 쿼리 수 버킷
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+QUANTILES = (0.5, 0.95, 0.99)
+# 게이지를 여러 프로세스에서 합치는 방법 (MetricsRegistry.collector의 aggregate)
+AGGREGATES = ('pid', 'max', 'min', 'sum')
+
+
+class Histogram:
+    def __init__(self, name, help_text, labelnames, buckets):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.values = {} # labels -> [bucket counts..., sum, count]
+
+    def observe(self, labels, value):
+        data = self.values.get(labels)
+        if data is None:
+            data = self.values[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[i] += 1
+                break
+        data[-2] += value
+        data[-1] += 1
+
+
+class Counter:
+    def __init__(self, name, help_text, labelnames):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {} # labels -> value
+
+    def inc(self, labels, amount=1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class MetricsRegistry:
+    """프로세스 단위 측정값 저장소입니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = [] # 스냅숏 시점에 값을 읽어 오는 측정값 (예: 연결 풀, 캐시 통계)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = self._metrics[name] = Histogram(name, help_text, labelnames, buckets)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = self._metrics[name] = Counter(name, help_text, labelnames)
+        return metric
+
+    def collector(self, name, help_text, fn, labelnames=(), kind='gauge', aggregate='pid'):
+        """
+        fn()이 돌려주는 숫자(라벨이 있으면 {라벨 값 튜플: 숫자} 딕셔너리)를 노출합니다.
+        kind는 'gauge' 또는 'counter'입니다. aggregate는 게이지를 여러 프로세스에서 합치는 방법
+        ('pid', 'max', 'min', 'sum')이며, 카운터는 항상 더합니다.
+        """
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"알 수 없는 aggregate입니다: {aggregate} (사용 가능: {', '.join(AGGREGATES)})")
+        self._collectors.append((name, help_text, fn, tuple(labelnames), kind, aggregate))
+
+    def observe(self, histogram, labels, value):
+        with self._lock:
+            histogram.observe(labels, value)
+
+    def inc(self, counter, labels, amount=1):
+        with self._lock:
+            counter.inc(labels, amount)
+
+    def snapshot(self):
+        """JSON으로 저장할 수 있는 현재 측정값을 반환합니다."""
+        result = {}
+        with self._lock:
+            for metric in self._metrics.values():
+                kind = 'histogram' if isinstance(metric, Histogram) else 'counter'
+                entry = {'type': kind, 'help': metric.help, 'labelnames': list(metric.labelnames),
+                         'values': [[list(labels), value if kind == 'counter' else list(value)]
+                                    for labels, value in metric.values.items()]}
+                if kind == 'histogram':
+                    entry['buckets'] = list(metric.buckets)
+                result[metric.name] = entry
+        pid = str(os.getpid())
+        for name, help_text, fn, labelnames, kind, aggregate in self._collectors:
+            try:
+                value = fn()
+            except Exception:
+                logger.exception("측정값 %s 를 읽지 못했습니다.", name)
+                continue
+            if labelnames:
+                values = [[list(labels), v] for labels, v in value.items()]
+            else:
+                values = [[[], value]]
+            if kind == 'gauge' and aggregate == 'pid':
+                labelnames = labelnames + ('pid',)
+                values = [[labels + [pid], v] for labels, v in values]
+            result[name] = {'type': kind, 'help': help_text, 'labelnames': list(labelnames), 'values': values}
+            if kind == 'gauge':
+                result[name]['aggregate'] = aggregate
+        return result
+
+
+def merge_snapshots(snapshots):
+    """
+    여러 프로세스의 스냅숏을 합칩니다. 카운터와 히스토그램은 더하고, 게이지는 aggregate에 따라
+    더하거나('sum', 'pid' - 라벨이 프로세스마다 다름) 최댓값/최솟값을 고릅니다.
+    """
+    merged = {}
+    for snapshot in snapshots:
+        for name, entry in snapshot.items():
+            target = merged.get(name)
+            if target is None:
+                target = merged[name] = {key: value for key, value in entry.items() if key != 'values'}
+                target['values'] = {}
+            for labels, value in entry['values']:
+                key = tuple(labels)
+                if entry['type'] == 'histogram':
+                    current = target['values'].get(key)
+                    target['values'][key] = [a + b for a, b in zip(current, value)] if current else list(value)
+                elif key in target['values'] and entry.get('aggregate') in ('max', 'min'):
+                    pick = max if entry['aggregate'] == 'max' else min
+                    target['values'][key] = pick(target['values'][key], value)
+                else:
+                    target['values'][key] = target['values'].get(key, 0) + value
+    return merged
+
+
+def _as_snapshot(merged):
+    """merge_snapshots()의 결과를 다시 스냅숏(JSON) 형식으로 바꿉니다."""
+    return {name: dict(entry, values=[[list(labels), value] for labels, value in entry['values'].items()])
+            for name, entry in merged.items()}
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [(n, v) for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = ','.join('{}="{}"'.format(n, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+                       for n, v in pairs)
+    return '{' + escaped + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return repr(value)
+    return str(value)
+
+
+def estimate_quantile(buckets, counts, q):
+    """히스토그램 버킷에서 q 분위수를 선형 보간으로 추정합니다. (Prometheus histogram_quantile과 같은 방식)"""
+    total = sum(counts)
+    if total == 0:
+        return math.nan
+    rank = q * total
+    cumulative = 0
+    lower = 0.0
+    for bound, count in zip(buckets, counts):
+        if cumulative + count >= rank and count:
+            return lower + (bound - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = bound
+    return buckets[-1] # 마지막 버킷보다 큰 값은 상한으로 표시합니다.
+
+
+def render_prometheus(merged):
+    """합친 측정값을 Prometheus 텍스트 형식으로 변환합니다."""
+    lines = []
+    for name in sorted(merged):
+        entry = merged[name]
+        names = entry['labelnames']
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for labels in sorted(entry['values']):
+            value = entry['values'][labels]
+            if entry['type'] != 'histogram':
+                lines.append(f"{name}{_format_labels(names, labels)} {_format_value(value)}")
+                continue
+            buckets = entry['buckets']
+            counts = value[:len(buckets)]
+            cumulative = 0
+            for bound, count in zip(buckets, counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(names, labels, ('le', _format_value(float(bound))))} {cumulative}")
+            lines.append(f"{name}_bucket{_format_labels(names, labels, ('le', '+Inf'))} {value[-1]}")
+            lines.append(f"{name}_sum{_format_labels(names, labels)} {value[-2]}")
+            lines.append(f"{name}_count{_format_labels(names, labels)} {value[-1]}")
+        # 대시보드에서 바로 볼 수 있도록 p50/p95/p99 추정치를 별도 게이지로 함께 내보냅니다.
+        if entry['type'] == 'histogram' and entry['values']:
+            qname = f"{name}_quantile"
+            lines.append(f"# HELP {qname} Estimated quantiles of {name} from histogram buckets")
+            lines.append(f"# TYPE {qname} gauge")
+            for labels in sorted(entry['values']):
+                value = entry['values'][labels]
+                counts = value[:len(entry['buckets'])]
+                # 마지막 버킷을 넘은 관측값도 분위수 계산의 전체 개수에 포함합니다.
+                counts_with_overflow = counts + [value[-1] - sum(counts)]
+                buckets_with_overflow = list(entry['buckets']) + [entry['buckets'][-1]]
+                for q in QUANTILES:
+                    estimate = estimate_quantile(buckets_with_overflow, counts_with_overflow, q)
+                    if not math.isnan(estimate):
+                        lines.append(f"{qname}{_format_labels(names, labels, ('quantile', q))} {estimate:.6f}")
+    return '\n'.join(lines) + '\n'
+
+
+class MultiprocessExporter:
+    """
+    프로세스 스냅숏을 공유 디렉터리에 주기적으로 기록하고, 모든 프로세스의 값을 합쳐 출력합니다.
+    """
+
+    ARCHIVE_FILE = '_archived.json'
+    LOCK_FILE = '_archived.lock'
+
+    def __init__(self, registry, directory=None, interval=5.0):
+        self.registry = registry
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'your_flask_app_metrics')
+        self.interval = interval
+        self._thread = None
+        self._pid = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"metrics-{pid}.json")
+
+    def write(self):
+        """현재 프로세스의 스냅숏을 원자적으로 기록합니다."""
+        pid = os.getpid()
+        tmp = f"{self._path(pid)}.{threading.get_ident()}.tmp" # 요청 스레드와 기록 스레드가 동시에 쓸 수 있습니다.
+        with open(tmp, 'w') as f:
+            json.dump(self.registry.snapshot(), f)
+        os.replace(tmp, self._path(pid))
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write()
+            except Exception:
+                logger.exception("측정값 스냅숏을 기록하지 못했습니다.")
+
+    def start(self):
+        """백그라운드 기록 스레드를 시작합니다. fork 이후 프로세스마다 한 번씩 시작됩니다."""
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._loop, name='metrics-exporter', daemon=True)
+        self._thread.start()
+        # 프로세스가 정상 종료할 때 마지막 기록 이후의 값도 남깁니다.
+        atexit.register(self.write)
+
+    @staticmethod
+    def _alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _read(self, path):
+        with open(path) as f:
+            return json.load(f)
+
+    def _archive(self, path, archived):
+        """끝난 프로세스의 카운터/히스토그램을 archived에 더해 기록하고 그 프로세스의 파일을 지웁니다."""
+        try:
+            snapshot = self._read(path)
+        except (OSError, ValueError):
+            snapshot = {}
+        totals = {name: entry for name, entry in snapshot.items() if entry['type'] != 'gauge'}
+        archived = _as_snapshot(merge_snapshots([archived, totals]))
+        tmp = os.path.join(self.directory, f"{self.ARCHIVE_FILE}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(archived, f)
+        os.replace(tmp, os.path.join(self.directory, self.ARCHIVE_FILE))
+        os.remove(path)
+        return archived
+
+    def collect(self):
+        """모든 프로세스의 스냅숏(끝난 프로세스의 누적값 포함)을 합쳐 Prometheus 텍스트로 반환합니다."""
+        self.write()
+        # 누적 파일로 옮기는 도중의 파일을 두 번 세지 않도록, 수집은 프로세스 사이에서 한 번에 하나씩 합니다.
+        with open(os.path.join(self.directory, self.LOCK_FILE), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    archived = self._read(os.path.join(self.directory, self.ARCHIVE_FILE))
+                except FileNotFoundError:
+                    archived = {}
+                snapshots = []
+                for filename in os.listdir(self.directory):
+                    if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                        continue
+                    path = os.path.join(self.directory, filename)
+                    try:
+                        pid = int(filename[len('metrics-'):-len('.json')])
+                    except ValueError:
+                        continue
+                    if not self._alive(pid):
+                        archived = self._archive(path, archived)
+                        continue
+                    try:
+                        snapshots.append(self._read(path))
+                    except (OSError, ValueError):
+                        continue # 다른 프로세스가 쓰는 중이면 다음 수집 때 반영됩니다.
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        return render_prometheus(merge_snapshots([archived] + snapshots))
@@ -0,0 +1,308 @@
+"""
+스키마 마이그레이션 도구
+
+migrations/NNNN_이름.sql 파일이 전체 스키마를 버전별로 관리합니다. 각 파일은 '-- migrate:up' 과
+'-- migrate:down' 구역으로 나뉘며, 적용된 버전은 schema_migrations 테이블에 기록됩니다.
+
+    python migrate.py status                 # 적용/미적용 버전 목록
+    python migrate.py apply [--to 0003]      # 미적용 마이그레이션 적용
+    python migrate.py rollback [--steps 1]   # 마지막 마이그레이션부터 되돌리기
+    python migrate.py rollback --to 0001     # 0001 이후의 마이그레이션을 모두 되돌리기
+    python migrate.py --shard s1 apply       # 샤드 DB(DB_SHARDS의 s1)에 migrations/shard/ 적용
+
+    python migrate.py check --sqlite         # 로컬 SQLite 대체 DB로 쿼리 실행 계획 점검
+    python migrate.py check --scratch        # DB_CONFIG의 (테스트용) DB에 데이터를 채워 EXPLAIN 점검
+
+check는 벤치마크 시나리오(bench.py)로 모든 라우트를 한 번씩 실행하면서 앱이 보낸 SELECT/UPDATE/DELETE를
+수집하고, 각각을 EXPLAIN 하여 풀 테이블 스캔이 있으면 실패(종료 코드 1)합니다.
+--scratch 모드는 대상 DB에 데이터를 쓰므로 운영 DB에서는 실행하지 마세요.
+"""
+import argparse
+import os
+import re
+import sys
+from collections import namedtuple
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+# 일기/To-Do 샤드 DB(db_shards.py)의 마이그레이션. 버전 번호는 주 DB와 따로 매깁니다.
+SHARD_MIGRATIONS_DIR = os.path.join(MIGRATIONS_DIR, 'shard')
+
+_FILENAME_RE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+_SECTION_RE = re.compile(r'^--\s*migrate:(up|down)\s*$', re.MULTILINE)
+
+Migration = namedtuple('Migration', 'version name up down')
+
+
+def split_statements(sql):
+    """주석 줄을 빼고, 줄 끝의 ';' 기준으로 SQL 문장을 나눕니다."""
+    statements, current = [], []
+    for line in sql.splitlines():
+        stripped = line.strip()
+        if not stripped or stripped.startswith('--'):
+            continue
+        current.append(line)
+        if stripped.endswith(';'):
+            statements.append('\n'.join(current).rstrip().rstrip(';'))
+            current = []
+    if current:
+        statements.append('\n'.join(current))
+    return statements
+
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """마이그레이션 파일을 버전 순서대로 읽어 옵니다."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = _FILENAME_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(directory, filename), encoding='utf-8') as f:
+            text = f.read()
+        sections = {'up': '', 'down': ''}
+        parts = _SECTION_RE.split(text)
+        for name, body in zip(parts[1::2], parts[2::2]):
+            sections[name] += body
+        if not sections['up'].strip():
+            raise ValueError(f"{filename}에 '-- migrate:up' 구역이 없습니다.")
+        migrations.append(Migration(match.group(1), match.group(2),
+                                    split_statements(sections['up']), split_statements(sections['down'])))
+    return migrations
+
+
+class MigrationRunner:
+    """schema_migrations 테이블로 적용 상태를 관리하며 마이그레이션을 적용/롤백합니다."""
+
+    def __init__(self, conn, migrations=None):
+        self.conn = conn
+        self.migrations = migrations if migrations is not None else load_migrations()
+        with conn.cursor() as cursor:
+            cursor.execute("CREATE TABLE IF NOT EXISTS schema_migrations ("
+                           "version VARCHAR(16) NOT NULL PRIMARY KEY, "
+                           "name VARCHAR(255) NOT NULL, "
+                           "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+        conn.commit()
+
+    def applied(self):
+        with self.conn.cursor() as cursor:
+            cursor.execute("SELECT version, applied_at FROM schema_migrations")
+            return {row['version']: row['applied_at'] for row in cursor.fetchall()}
+
+    def status(self):
+        """(Migration, 적용 시각 또는 None) 목록을 반환합니다."""
+        applied = self.applied()
+        return [(m, applied.get(m.version)) for m in self.migrations]
+
+    def _run(self, statements):
+        # MariaDB의 DDL은 문장마다 자동 커밋되므로, 파일 하나가 중간에 실패하면 수동 확인이 필요합니다.
+        # 그래서 각 문장은 IF [NOT] EXISTS로 다시 실행해도 안전하게 작성합니다.
+        with self.conn.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def apply(self, target=None):
+        """target 버전까지(없으면 끝까지) 미적용 마이그레이션을 적용하고, 적용한 목록을 반환합니다."""
+        applied = self.applied()
+        done = []
+        for migration in self.migrations:
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied:
+                continue
+            self._run(migration.up)
+            with self.conn.cursor() as cursor:
+                cursor.execute("INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                               (migration.version, migration.name))
+            self.conn.commit()
+            done.append(migration)
+        return done
+
+    def rollback(self, steps=1, target=None):
+        """
+        최근 적용한 마이그레이션부터 되돌립니다. target이 있으면 그 버전보다 뒤의 것을 모두,
+        없으면 steps개를 되돌립니다. 되돌린 목록을 반환합니다.
+        """
+        applied = self.applied()
+        candidates = [m for m in reversed(self.migrations) if m.version in applied]
+        if target is not None:
+            candidates = [m for m in candidates if m.version > target]
+        else:
+            candidates = candidates[:steps]
+        done = []
+        for migration in candidates:
+            self._run(migration.down)
+            with self.conn.cursor() as cursor:
+                cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (migration.version,))
+            self.conn.commit()
+            done.append(migration)
+        return done
+
+
+# --- 실행 계획 점검 ---
+
+_CHECKED_RE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT\s+INTO\s+\w+\s*\([^)]*\)\s*SELECT)\b', re.IGNORECASE)
+
+
+def explain_mariadb(cursor, query, args):
+    """EXPLAIN 결과에서 (심각도, 설명) 목록을 만듭니다. type=ALL은 풀 테이블 스캔입니다."""
+    cursor.execute("EXPLAIN " + query, args)
+    problems = []
+    for row in cursor.fetchall():
+        table = row.get('table') or ''
+        if table.startswith('<'): # <derived2> 등 임시 결과
+            continue
+        extra = row.get('Extra') or ''
+        if row.get('type') == 'ALL':
+            problems.append(('error', f"{table}: 풀 테이블 스캔 (rows={row.get('rows')}, {extra})"))
+        elif 'Using filesort' in extra:
+            problems.append(('warning', f"{table}: filesort (key={row.get('key')}, rows={row.get('rows')})"))
+    return problems
+
+
+def explain_sqlite(cursor, query, args):
+    """EXPLAIN QUERY PLAN 결과에서 (심각도, 설명) 목록을 만듭니다. 인덱스 없는 SCAN은 풀 테이블 스캔입니다."""
+    cursor.execute("EXPLAIN QUERY PLAN " + query, args)
+    problems = []
+    derived = set() # FROM (SELECT ...) 별칭. MariaDB의 <derived2>처럼 임시 결과 스캔은 제외합니다.
+    for row in cursor.fetchall():
+        detail = row['detail']
+        for prefix in ('CO-ROUTINE ', 'MATERIALIZE '):
+            if detail.startswith(prefix):
+                derived.add(detail[len(prefix):].split(' ')[0])
+        if detail.startswith('SCAN ') and detail[5:].split(' ')[0] in derived:
+            continue
+        if detail.startswith('SCAN ') and ' USING ' not in detail:
+            problems.append(('error', f"풀 테이블 스캔: {detail}"))
+        elif 'TEMP B-TREE FOR ORDER BY' in detail:
+            problems.append(('warning', detail))
+    return problems
+
+
+def check_query_plans(app_module, data, explain, connect, out=sys.stdout):
+    """
+    모든 벤치마크 시나리오를 한 번씩 실행하며 앱 쿼리를 수집하고 실행 계획을 점검합니다.
+    풀 테이블 스캔을 하는 쿼리 수를 반환합니다.
+    """
+    from bench import SCENARIOS, run_scenario
+
+    captured = {}
+    record_query = app_module.db_pool.on_query
+
+    def capture(seconds, query, args):
+        executemany = isinstance(args, list) and args and isinstance(args[0], (list, tuple))
+        if query not in captured and not executemany and _CHECKED_RE.match(query):
+            captured[query] = args
+        record_query(seconds, query, args)
+
+    app_module.db_pool.on_query = capture
+    try:
+        for name, fn in SCENARIOS:
+            run_scenario(app_module.app, data, name, fn, requests=2, threads=1)
+    finally:
+        app_module.db_pool.on_query = record_query
+
+    failures = 0
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            for query, args in captured.items():
+                problems = explain(cursor, query, args)
+                errors = [p for p in problems if p[0] == 'error']
+                failures += bool(errors)
+                label = 'FULL SCAN' if errors else ('WARN' if problems else 'OK')
+                print(f"[{label}] {' '.join(query.split())}", file=out)
+                for severity, message in problems:
+                    print(f"    {severity}: {message}", file=out)
+        conn.rollback()
+    finally:
+        conn.close()
+    print(f"{len(captured)}개 쿼리 점검, 풀 테이블 스캔 {failures}개", file=out)
+    return failures
+
+
+def run_check(args):
+    import bench
+    import bench_db
+
+    if args.sqlite:
+        app_module, path = bench.prepare_app(threads=1)
+        bench_db.create_schema(path)
+        connect = lambda: bench_db.connect(path)
+        explain = explain_sqlite
+    else:
+        if not args.scratch:
+            sys.exit("check는 대상 DB에 데이터를 씁니다. 테스트용 DB라면 --scratch를 붙여 실행하세요.")
+        os.environ.setdefault('LOG_LEVEL', 'ERROR')
+        import app as app_module
+        conn = app_module.db_pool.acquire()
+        try:
+            MigrationRunner(conn).apply()
+        finally:
+            conn.close()
+        connect = app_module.db_pool.acquire
+        explain = explain_mariadb
+
+    data = bench.Dataset(app_module, connect, args)
+    data.seed()
+    failures = check_query_plans(app_module, data, explain, connect)
+    app_module.password_hasher.shutdown()
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shard', help='주 DB 대신 이 샤드 DB에 migrations/shard/를 적용 (status/apply/rollback)')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='적용 상태 출력')
+    apply_parser = sub.add_parser('apply', help='미적용 마이그레이션 적용')
+    apply_parser.add_argument('--to', help='이 버전까지만 적용')
+    rollback_parser = sub.add_parser('rollback', help='마이그레이션 되돌리기')
+    rollback_parser.add_argument('--steps', type=int, default=1)
+    rollback_parser.add_argument('--to', help='이 버전 이후를 모두 되돌림')
+    check_parser = sub.add_parser('check', help='EXPLAIN으로 앱 쿼리의 풀 테이블 스캔 점검')
+    check_parser.add_argument('--sqlite', action='store_true', help='로컬 SQLite 대체 DB 사용')
+    check_parser.add_argument('--scratch', action='store_true', help='DB_CONFIG의 DB가 테스트용임을 확인')
+    check_parser.add_argument('--users', type=int, default=20)
+    check_parser.add_argument('--posts', type=int, default=2000)
+    check_parser.add_argument('--comments', type=int, default=5)
+    check_parser.add_argument('--diaries', type=int, default=60)
+    check_parser.add_argument('--todos', type=int, default=100)
+    check_parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    if args.command == 'check':
+        args.requests = 2 # 삭제 시나리오용으로 미리 만들 행 수
+        return run_check(args)
+
+    from app import db_pool, shard_map
+
+    if args.shard:
+        conn = shard_map.pool(args.shard).acquire()
+        migrations = load_migrations(SHARD_MIGRATIONS_DIR)
+    else:
+        conn = db_pool.acquire()
+        migrations = load_migrations()
+    try:
+        runner = MigrationRunner(conn, migrations)
+        if args.command == 'status':
+            for migration, applied_at in runner.status():
+                state = f"적용됨 {applied_at}" if applied_at else "미적용"
+                print(f"{migration.version} {migration.name:<32} {state}")
+        elif args.command == 'apply':
+            done = runner.apply(args.to)
+            for migration in done:
+                print(f"적용: {migration.version} {migration.name}")
+            if not done:
+                print("적용할 마이그레이션이 없습니다.")
+        elif args.command == 'rollback':
+            done = runner.rollback(args.steps, args.to)
+            for migration in done:
+                print(f"롤백: {migration.version} {migration.name}")
+            if not done:
+                print("되돌릴 마이그레이션이 없습니다.")
+    finally:
+        conn.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+-- 게시글 검색용 n-gram 역색인 (search.py 참고)
+-- 기존 게시글은 적용 후 `python search.py` 로 한 번 색인합니다.
+
+-- migrate:up
+CREATE TABLE IF NOT EXISTS board_ngrams (
+    gram VARCHAR(2) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+    board_id INT NOT NULL,
+    weight SMALLINT UNSIGNED NOT NULL,
+    PRIMARY KEY (gram, board_id),
+    KEY idx_board_ngrams_board (board_id),
+    FOREIGN KEY (board_id) REFERENCES board(id) ON DELETE CASCADE
+);
+
+-- migrate:down
+DROP TABLE IF EXISTS board_ngrams;
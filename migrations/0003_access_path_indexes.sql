@@ -0,0 +1,28 @@
+-- app.py가 실제로 실행하는 쿼리 형태에 맞춘 복합 인덱스
+--
+--   board_list     : ORDER BY created_at DESC, id DESC LIMIT n (+ 키셋 조건)   -> board (created_at, id)
+--   view_post 댓글 : WHERE board_id = ? ORDER BY created_at, id LIMIT n        -> comments (board_id, created_at, id)
+--   todos_list     : WHERE user_id = ? [AND status = ?] ORDER BY created_at DESC
+--                    -> todos (user_id, status, created_at), todos (user_id, created_at)
+--   diary          : WHERE user_id = ? AND entry_date (= 또는 범위) -> 기존 UNIQUE (user_id, entry_date)로 충분
+--
+-- comments (board_id, ...) 인덱스가 외래 키용 board_id 인덱스 역할도 하므로,
+-- 외래 키가 자동으로 만든 인덱스는 그대로 두어도 되고 나중에 지워도 됩니다.
+
+-- migrate:up
+CREATE INDEX IF NOT EXISTS idx_board_created ON board (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_comments_board_created ON comments (board_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_todos_user_status_created ON todos (user_id, status, created_at);
+CREATE INDEX IF NOT EXISTS idx_todos_user_created ON todos (user_id, created_at);
+
+-- migrate:down
+-- InnoDB는 외래 키를 받칠 수 있는 인덱스가 새로 생기면 외래 키가 자동으로 만든 인덱스를 지우므로,
+-- 위의 복합 인덱스가 todos.user_id / comments.board_id 외래 키의 유일한 인덱스일 수 있습니다.
+-- 그대로 지우면 ER 1553(needed in a foreign key constraint)으로 실패하므로, 0001의 외래 키가 처음 만든
+-- 것과 같은 단일 컬럼 인덱스를 먼저 다시 만듭니다. (idx_board_created는 외래 키와 관계없습니다.)
+CREATE INDEX IF NOT EXISTS user_id ON todos (user_id);
+CREATE INDEX IF NOT EXISTS board_id ON comments (board_id);
+DROP INDEX IF EXISTS idx_todos_user_created ON todos;
+DROP INDEX IF EXISTS idx_todos_user_status_created ON todos;
+DROP INDEX IF EXISTS idx_comments_board_created ON comments;
+DROP INDEX IF EXISTS idx_board_created ON board;
@@ -0,0 +1,13 @@
+-- 내보내기(/export/posts.*) : WHERE user_id = ? ORDER BY id -> board (user_id, id)
+--
+-- MariaDB에서는 외래 키가 자동으로 만든 user_id 인덱스(기본 키 id 포함)로도 같은 순서로 읽을 수 있지만,
+-- 이름을 붙인 인덱스로 접근 경로를 명시합니다. 이 인덱스가 생기면 외래 키용 자동 인덱스는 대체됩니다.
+
+-- migrate:up
+CREATE INDEX IF NOT EXISTS idx_board_user ON board (user_id, id);
+
+-- migrate:down
+-- idx_board_user가 board.user_id 외래 키의 유일한 인덱스일 수 있으므로(ER 1553),
+-- 외래 키가 처음 만든 것과 같은 단일 컬럼 인덱스를 먼저 다시 만듭니다.
+CREATE INDEX IF NOT EXISTS user_id ON board (user_id);
+DROP INDEX IF EXISTS idx_board_user ON board;
@@ -0,0 +1,25 @@
+-- 게시판 목록용 요약 테이블 (board_summary.py 참고)
+--
+-- board_list는 이 테이블만 읽습니다: ORDER BY created_at DESC, id DESC LIMIT n -> (created_at, id)
+-- excerpt 길이는 app.py의 BOARD_EXCERPT_CHARS(120)와 같아야 합니다.
+-- 기존 게시글은 아래 INSERT ... SELECT로 채워지며, 이후 어긋나면 `python board_summary.py verify --fix`로 복구합니다.
+
+-- migrate:up
+CREATE TABLE IF NOT EXISTS board_summary (
+    id INT NOT NULL PRIMARY KEY,
+    title VARCHAR(255) NOT NULL,
+    username VARCHAR(255) NOT NULL,
+    excerpt VARCHAR(120) NOT NULL,
+    comment_count INT UNSIGNED NOT NULL DEFAULT 0,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_board_summary_created (created_at, id),
+    FOREIGN KEY (id) REFERENCES board(id) ON DELETE CASCADE
+);
+INSERT IGNORE INTO board_summary (id, title, username, excerpt, comment_count, created_at, updated_at)
+SELECT b.id, b.title, u.username, LEFT(b.content, 120),
+       (SELECT COUNT(*) FROM comments c WHERE c.board_id = b.id), b.created_at, b.updated_at
+FROM board b JOIN users u ON u.id = b.user_id;
+
+-- migrate:down
+DROP TABLE IF EXISTS board_summary;
@@ -0,0 +1,15 @@
+-- 사용자별 일기/To-Do 샤드 (db_shards.py 참고)
+--
+-- shard          : 사용자의 diaries/todos 행이 있는 샤드 이름. 'main'은 이 DB(주 DB)입니다.
+-- shard_moving_to: 다른 샤드로 옮기는 중이면 대상 샤드 이름. 그동안 일기/To-Do 요청은 503을 받습니다.
+-- 샤드 DB의 스키마는 migrations/shard/ 에 있으며 `python migrate.py --shard 이름 apply`로 적용합니다.
+
+-- migrate:up
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS shard VARCHAR(32) NOT NULL DEFAULT 'main',
+    ADD COLUMN IF NOT EXISTS shard_moving_to VARCHAR(32) NULL;
+
+-- migrate:down
+ALTER TABLE users
+    DROP COLUMN IF EXISTS shard_moving_to,
+    DROP COLUMN IF EXISTS shard;
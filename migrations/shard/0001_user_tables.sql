@@ -0,0 +1,30 @@
+-- 샤드 DB의 스키마: 주 DB의 diaries/todos(0001)와 인덱스(0003)를 그대로 두되, users 테이블이 주 DB에만
+-- 있으므로 외래 키는 없습니다. 따라서 사용자를 지워도 샤드의 행은 남습니다.
+-- (`python db_shards.py status`는 users.shard와 맞지 않는 행을 세지 않습니다.)
+
+-- migrate:up
+CREATE TABLE IF NOT EXISTS diaries (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    entry_date DATE NOT NULL,
+    title VARCHAR(255),
+    content TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    UNIQUE (user_id, entry_date)
+);
+
+CREATE TABLE IF NOT EXISTS todos (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    task VARCHAR(500) NOT NULL,
+    due_date DATE NULL,
+    status ENUM('미완료', '진행중', '완료', '기간연장') NOT NULL DEFAULT '미완료',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_todos_user_status_created (user_id, status, created_at),
+    KEY idx_todos_user_created (user_id, created_at)
+);
+
+-- migrate:down
+DROP TABLE IF EXISTS todos;
+DROP TABLE IF EXISTS diaries;
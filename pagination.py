@@ -0,0 +1,156 @@
+from collections import namedtuple
+from datetime import datetime
+
+import pymysql.cursors
+
+# 키셋(커서) 페이지네이션 결과
+# rows: 화면에 표시할 순서대로 정렬된 행 목록
+# next_cursor / prev_cursor: 다음/이전 페이지로 이동할 때 URL에 넣을 커서 문자열 (없으면 None)
+Page = namedtuple('Page', ['rows', 'next_cursor', 'prev_cursor'])
+
+
+def encode_cursor(created_at, row_id):
+    """(created_at, id) 쌍을 URL에 넣을 수 있는 커서 문자열로 변환합니다."""
+    return f"{created_at.isoformat()}_{row_id}"
+
+
+def decode_cursor(value):
+    """커서 문자열을 (created_at, id)로 되돌립니다. 형식이 잘못되면 None을 반환합니다."""
+    if not value:
+        return None
+    try:
+        ts, row_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(ts), int(row_id)
+    except ValueError:
+        return None
+
+
+def clamp_page_size(value, default, maximum=100):
+    """쿼리 문자열로 받은 페이지 크기를 1..maximum 범위로 제한합니다."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def _keyset_sql(select_sql, where, params, ts_col, id_col, page_size, descending, anchor):
+    """키셋 조건과 정렬/LIMIT을 붙인 SQL과 파라미터를 만듭니다."""
+    conditions = list(where)
+    params = list(params)
+    if anchor:
+        # (ts, id) < (%s, %s) 를 인덱스가 범위 검색할 수 있는 형태로 풀어 씁니다.
+        op = '<' if descending else '>'
+        conditions.append(f"({ts_col} {op} %s OR ({ts_col} = %s AND {id_col} {op} %s))")
+        params.extend([anchor[0], anchor[0], anchor[1]])
+
+    order = 'DESC' if descending else 'ASC'
+    sql = select_sql
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += f" ORDER BY {ts_col} {order}, {id_col} {order} LIMIT %s"
+    params.append(page_size + 1) # 한 행을 더 읽어 다음 페이지 존재 여부를 판단합니다.
+    return sql, params
+
+
+def fetch_keyset_page(cursor, select_sql, where, params, ts_col, id_col,
+                      page_size, descending=True, after=None, before=None,
+                      ts_key='created_at', id_key='id'):
+    """
+    (ts_col, id_col) 기준 키셋 페이지네이션으로 한 페이지를 조회합니다.
+    select_sql은 WHERE/ORDER BY 없이 SELECT ... FROM ... JOIN ... 까지만 포함해야 하고,
+    where는 추가 조건 목록입니다. after는 다음 페이지, before는 이전 페이지 커서입니다.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before) if after is None else None
+
+    backwards = before is not None
+    anchor = before or after
+    # 이전 페이지는 반대 방향으로 읽은 뒤 뒤집습니다.
+    sql, params = _keyset_sql(select_sql, where, params, ts_col, id_col, page_size,
+                              descending != backwards, anchor)
+
+    cursor.execute(sql, params)
+    rows = list(cursor.fetchall())
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    if backwards:
+        rows.reverse()
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, anchor is not None
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1][ts_key], rows[-1][id_key])
+    if rows and has_prev:
+        prev_cursor = encode_cursor(rows[0][ts_key], rows[0][id_key])
+    return Page(rows, next_cursor, prev_cursor)
+
+
+class StreamedPage:
+    """
+    fetch_keyset_page와 같은 페이지를 서버 측(unbuffered) 커서로 조금씩 읽어 오는 객체입니다.
+    템플릿을 스트리밍으로 렌더링할 때 rows를 순회하는 동안 DB에서 행을 가져오며,
+    순회가 끝나면 next_cursor/prev_cursor를 사용할 수 있습니다. 앞으로 넘기는 방향(after)만 지원합니다.
+    """
+
+    def __init__(self, conn, select_sql, where, params, ts_col, id_col, page_size,
+                 descending=False, after=None, ts_key='created_at', id_key='id',
+                 batch_size=100, on_close=None):
+        self._conn = conn
+        self._page_size = page_size
+        self._ts_key = ts_key
+        self._id_key = id_key
+        self._batch_size = batch_size
+        self._on_close = on_close
+        self.next_cursor = None
+        self.prev_cursor = None
+        self.error = None
+
+        anchor = decode_cursor(after)
+        self._has_prev = anchor is not None
+        self._sql, self._params = _keyset_sql(select_sql, where, params, ts_col, id_col,
+                                              page_size, descending, anchor)
+
+    @property
+    def rows(self):
+        return self._iter_rows()
+
+    def _cursor_for(self, row):
+        return encode_cursor(row[self._ts_key], row[self._id_key])
+
+    def _iter_rows(self):
+        count = 0
+        last = None
+        cursor = None
+        try:
+            cursor = self._conn.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(self._sql, self._params)
+            while True:
+                batch = cursor.fetchmany(self._batch_size)
+                if not batch:
+                    break
+                for row in batch:
+                    if count == self._page_size:
+                        # page_size + 1 번째 행이 있으면 다음 페이지가 존재합니다.
+                        self.next_cursor = self._cursor_for(last)
+                        return
+                    if count == 0 and self._has_prev:
+                        self.prev_cursor = self._cursor_for(row)
+                    count += 1
+                    last = row
+                    yield row
+        except Exception as e:
+            # 이미 응답을 보내기 시작했으므로 예외를 올리지 않고 기록만 합니다.
+            self.error = e
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close() # 남은 행을 비워야 연결을 다시 사용할 수 있습니다.
+                except Exception:
+                    pass
+            if self._on_close is not None:
+                self._on_close()
@@ -0,0 +1,146 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+# 비밀번호 해싱 실행기
+#
+# scrypt/pbkdf2 해시는 일부러 CPU를 많이 쓰도록 만든 연산이라 요청 스레드에서 직접 돌리면
+# 로그인이 몰릴 때 mod_wsgi 스레드 5개가 모두 해싱에 묶여 다른 페이지까지 멈춥니다.
+# 해싱은 별도 프로세스 풀에서 실행하고, 동시에 처리 중인 작업 수를 workers + max_queue 로
+# 제한하여 넘치는 요청은 기다리지 않고 바로 HasherBusy 로 거절합니다.
+#
+# 해시 문자열은 werkzeug 형식("method$salt$hash")이므로, 설정한 method나 salt 길이가 저장된 해시와
+# 다르면 로그인 성공 시 needs_rehash()로 확인해 새 설정으로 다시 해시합니다.
+
+
+class HasherBusy(Exception):
+    """해싱 작업 대기열이 가득 차서 요청을 거절했을 때 발생합니다."""
+
+
+def _hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _verify(stored_hash, password):
+    return check_password_hash(stored_hash, password)
+
+
+# werkzeug가 생략된 파라미터에 채우는 기본값 (werkzeug.security._hash_internal과 같음)
+SCRYPT_DEFAULTS = ('32768', '8', '1')
+
+
+def canonical_method(method):
+    """
+    'scrypt'처럼 생략된 파라미터를 werkzeug 기본값으로 채운 method 문자열을 반환합니다 (예: 'scrypt:32768:8:1').
+    해시를 실제로 만들지 않고 계산하므로 요청 스레드에서 호출해도 됩니다.
+    """
+    name, *args = method.split(':')
+    if name == 'scrypt':
+        if args and len(args) != 3:
+            raise ValueError("'scrypt' takes 3 arguments.")
+        return ':'.join([name] + [str(int(arg)) for arg in (args or SCRYPT_DEFAULTS)])
+    if name == 'pbkdf2':
+        if len(args) > 2:
+            raise ValueError("'pbkdf2' takes 2 arguments.")
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Invalid hash method '{method}'.")
+
+
+class PasswordHasher:
+    """
+    크기 제한이 있는 프로세스 풀에서 비밀번호를 해시/검증합니다.
+    workers=0이면 프로세스 풀 없이 호출한 스레드에서 실행합니다(동시 실행 수 제한은 그대로 적용).
+    """
+
+    def __init__(self, method='scrypt', salt_length=16, workers=2, max_queue=8, timeout=10.0,
+                 mp_context='forkserver', python_executable=None):
+        self.method = method
+        self.salt_length = salt_length
+        self.workers = workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.mp_context = mp_context
+        self.python_executable = python_executable # mod_wsgi에서는 sys.executable이 httpd일 수 있습니다.
+
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_queue)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self.canonical_method = canonical_method(method) # 생략된 파라미터를 채운 실제 method (needs_rehash용)
+        self._rejected = 0
+
+    def _get_executor(self):
+        # mod_wsgi 데몬 프로세스가 fork된 뒤 처음 사용할 때 프로세스마다 풀을 만듭니다.
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                ctx = multiprocessing.get_context(self.mp_context)
+                if self.python_executable:
+                    ctx.set_executable(self.python_executable)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HasherBusy("비밀번호 해싱 작업이 너무 많습니다.")
+        if self.workers <= 0:
+            try:
+                return fn(*args)
+            finally:
+                self._slots.release()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # 제한 시간이 지나도 이미 시작한 작업은 작업 프로세스에서 계속 실행되므로,
+        # 자리는 기다림을 멈출 때가 아니라 작업이 실제로 끝나거나 취소될 때 돌려줍니다.
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            future.cancel() # 아직 시작하지 않은 작업이면 바로 취소되어 자리를 돌려줍니다.
+            raise HasherBusy(f"{self.timeout}초 안에 비밀번호 해싱이 끝나지 않았습니다.")
+        except BrokenProcessPool:
+            # 작업 프로세스가 죽었으면 다음 호출에서 풀을 새로 만듭니다.
+            logger.error("비밀번호 해싱 프로세스 풀이 비정상 종료되어 다시 만듭니다.")
+            with self._lock:
+                self._executor = None
+            raise
+
+    def hash(self, password):
+        """설정한 method로 비밀번호를 해시합니다. 포화 상태이면 HasherBusy를 발생시킵니다."""
+        return self._run(_hash, password, self.method, self.salt_length)
+
+    def verify(self, stored_hash, password):
+        """저장된 해시와 비밀번호가 일치하는지 확인합니다. 포화 상태이면 HasherBusy를 발생시킵니다."""
+        return self._run(_verify, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        """저장된 해시의 method/cost나 salt 길이("method$salt$hash"의 두 번째 필드)가 현재 설정과 다르면 True"""
+        parts = stored_hash.split('$')
+        if len(parts) != 3:
+            return True
+        method, salt, _ = parts
+        return method != self.canonical_method or len(salt) != self.salt_length
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers, 'max_queue': self.max_queue, 'rejected': self._rejected}
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
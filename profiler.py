@@ -0,0 +1,325 @@
+"""
+운영 요청 프로파일링
+
+특정 라우트가 운영 환경에서만 느릴 때, 선택한 요청에 한해 cProfile과 스택 샘플러를 켜고
+결과를 PROFILE_DIR에 파일로 남깁니다. 요청마다 세 파일이 만들어집니다.
+
+    profile-<시각>-<엔드포인트>-<pid>-<번호>.pstats     cProfile 결과 (python -m pstats, snakeviz 등)
+    profile-<...>.collapsed                               샘플링한 호출 스택 (flamegraph.pl, speedscope)
+    profile-<...>.json                                    전체/DB/템플릿 시간과 느린 쿼리, 상위 함수 요약
+
+프로파일링할 요청은 다음 중 하나로 고릅니다. 모두 분당 최대 횟수와 디렉터리 크기 한도가 적용되고,
+프로세스마다 한 번에 한 요청만 프로파일링합니다.
+
+Python 3.12부터 cProfile은 sys.monitoring을 사용하므로 켜져 있는 동안 프로세스의 모든 스레드를 기록합니다.
+그래서 .pstats에는 같은 시간에 다른 스레드가 처리한 요청의 호출도 섞여 들어가고(요약의 cprofile_threads가
+'all'), 그동안 다른 요청도 함께 느려집니다. 요청 스레드만 보려면 .collapsed를 보세요. 디버거나 coverage 같은
+다른 프로파일링 도구가 이미 켜져 있으면 cProfile 없이 스택 샘플러 결과만 남깁니다.
+
+    X-Profile 헤더      : PROFILE_SECRET으로 서명한 토큰 (python profiler.py token 으로 발급, 만료 시각 포함)
+    켜기 파일(toggle)   : python profiler.py on todos_list  /  python profiler.py off
+    표본 비율           : PROFILE_SAMPLE_RATE (PROFILE_ENDPOINTS로 엔드포인트 제한 가능)
+
+    python profiler.py token --ttl 600       # curl -H "X-Profile: <토큰>" ...
+    python profiler.py on [엔드포인트 ...]    # 엔드포인트를 주지 않으면 모든 요청
+    python profiler.py off
+    python profiler.py list                  # 최근 결과 요약
+"""
+import argparse
+import cProfile
+import hashlib
+import hmac
+import json
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from admission import TokenBucketLimiter
+
+FILE_PREFIX = 'profile-'
+# 요약(.json)에 남길 느린 쿼리 수와 상위 함수 수
+TOP_QUERIES = 20
+TOP_FUNCTIONS = 30
+# cProfile이 요청 스레드만이 아니라 프로세스의 모든 스레드를 기록하는지 여부 (sys.monitoring 기반)
+CPROFILE_ALL_THREADS = sys.version_info >= (3, 12)
+
+
+def _short_path(filename):
+    """'.../site-packages/flask/app.py' -> 'flask/app.py' (같은 이름의 파일을 구분할 만큼만 남깁니다)"""
+    return os.path.join(os.path.basename(os.path.dirname(filename)), os.path.basename(filename))
+
+
+class StackSampler:
+    """
+    지정한 스레드의 호출 스택을 interval초마다 읽어 collapsed 형식('a;b;c 횟수')으로 셉니다.
+    cProfile과 달리 함수 호출마다 비용이 들지 않고, 전체 호출 경로가 남아 flamegraph를 그릴 수 있습니다.
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{_short_path(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ActiveProfile:
+    """
+    프로파일링 중인 요청 하나의 상태입니다. 쿼리는 record_query()가 queries에 추가합니다.
+    다른 프로파일링 도구 때문에 cProfile을 켜지 못하면 profile은 None이고 profile_error에 이유가 남습니다.
+    """
+
+    def __init__(self, name, trigger, sample_interval):
+        self.name = name
+        self.trigger = trigger
+        self.queries = [] # (실행 시간, SQL)
+        self.started = time.perf_counter()
+        self.profile = cProfile.Profile()
+        self.profile_error = None
+        self.sampler = StackSampler(threading.get_ident(), sample_interval)
+
+    def start(self):
+        self.sampler.start()
+        try:
+            self.profile.enable()
+        except ValueError as e: # 3.12+: "Another profiling tool is already active"
+            self.profile = None
+            self.profile_error = str(e)
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        self.sampler.stop()
+        return time.perf_counter() - self.started
+
+
+def make_token(secret, ttl):
+    """ttl초 동안 쓸 수 있는 X-Profile 헤더 값('만료시각.서명')을 만듭니다."""
+    expires = str(int(time.time() + ttl))
+    signature = hmac.new(secret.encode('utf-8'), expires.encode('ascii'), hashlib.sha256).hexdigest()
+    return f"{expires}.{signature}"
+
+
+def verify_token(secret, token):
+    """서명이 맞고 만료되지 않은 토큰이면 True를 반환합니다."""
+    if not secret or not token:
+        return False
+    expires, _, signature = token.partition('.')
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode('utf-8'), expires.encode('ascii'), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+class RequestProfiler:
+    """
+    어떤 요청을 프로파일링할지 정하고 결과 파일을 기록합니다.
+    max_per_minute=0이면 프로파일링하지 않습니다. 디렉터리가 max_bytes를 넘으면 오래된 결과부터 지웁니다.
+    """
+
+    def __init__(self, directory, secret=None, sample_rate=0.0, endpoints=(), max_per_minute=6,
+                 max_bytes=100 * 1024 * 1024, toggle_path=None, sample_interval=0.002):
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.endpoints = frozenset(endpoints)
+        self.max_per_minute = max_per_minute
+        self.max_bytes = max_bytes
+        self.toggle_path = toggle_path or os.path.join(directory, 'enabled')
+        self.sample_interval = sample_interval
+        # 분당 횟수 제한. 한도를 다 쓰더라도 max_per_minute개까지는 몰아서 허용합니다.
+        self._limiter = TokenBucketLimiter(max_per_minute / 60.0, max_per_minute, max_keys=1)
+        self._busy = threading.Lock() # 프로세스마다 한 번에 한 요청만 프로파일링합니다.
+        self._lock = threading.Lock()
+        self._toggle = (0.0, None) # (다시 확인할 시각, 켜진 엔드포인트 집합 또는 None)
+        self._seq = 0
+        self._written = 0
+        self._skipped = 0
+
+    def _toggled(self, endpoint):
+        """켜기 파일이 있고 엔드포인트가 목록에 있으면(목록이 비었으면 모두) True. 파일은 1초마다 다시 읽습니다."""
+        now = time.monotonic()
+        recheck_at, endpoints = self._toggle
+        if now >= recheck_at:
+            try:
+                with open(self.toggle_path, encoding='utf-8') as f:
+                    endpoints = frozenset(line.strip() for line in f if line.strip())
+            except FileNotFoundError:
+                endpoints = None
+            self._toggle = (now + 1.0, endpoints)
+        return endpoints is not None and (not endpoints or endpoint in endpoints)
+
+    def _trigger(self, endpoint, token):
+        if verify_token(self.secret, token):
+            return 'header'
+        if self._toggled(endpoint):
+            return 'toggle'
+        if self.sample_rate > 0 and (not self.endpoints or endpoint in self.endpoints) \
+                and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def start(self, endpoint, token=None):
+        """이 요청을 프로파일링해야 하면 시작한 ActiveProfile을, 아니면 None을 반환합니다."""
+        if self.max_per_minute <= 0:
+            return None
+        trigger = self._trigger(endpoint, token)
+        if trigger is None:
+            return None
+        if not self._busy.acquire(blocking=False):
+            with self._lock:
+                self._skipped += 1
+            return None
+        if self._limiter.take('profile'):
+            self._busy.release()
+            with self._lock:
+                self._skipped += 1
+            return None
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        name = f"{FILE_PREFIX}{datetime.now():%Y%m%d-%H%M%S}-{endpoint}-{os.getpid()}-{seq}"
+        active = ActiveProfile(name, trigger, self.sample_interval)
+        try:
+            active.start()
+        except Exception:
+            self._busy.release()
+            raise
+        return active
+
+    def finish(self, active, summary):
+        """
+        프로파일링을 끝내고 결과 파일 세 개를 기록합니다. (cProfile을 켜지 못했으면 .pstats는 없습니다.)
+        summary(dict)에는 요청 정보와 DB/템플릿 시간을 담아 전달하며, 전체 시간과 느린 쿼리, 상위 함수가
+        더해져 .json으로 저장됩니다.
+        """
+        try:
+            total = active.stop()
+        finally:
+            self._busy.release()
+        os.makedirs(self.directory, exist_ok=True)
+        base = os.path.join(self.directory, active.name)
+
+        functions = []
+        if active.profile is not None:
+            stats = pstats.Stats(active.profile)
+            stats.dump_stats(base + '.pstats')
+            functions = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:TOP_FUNCTIONS]
+        with open(base + '.collapsed', 'w', encoding='utf-8') as f:
+            f.write(active.sampler.collapsed())
+
+        queries = {}
+        for seconds, sql in active.queries:
+            count, total_seconds = queries.get(sql, (0, 0.0))
+            queries[sql] = (count + 1, total_seconds + seconds)
+        summary = dict(summary, trigger=active.trigger, total_seconds=total,
+                       other_seconds=total - summary.get('db_seconds', 0) - summary.get('template_seconds', 0),
+                       cprofile_threads='all' if CPROFILE_ALL_THREADS else 'request')
+        if active.profile_error is not None:
+            summary['cprofile_error'] = active.profile_error
+        summary['queries'] = [{'sql': sql, 'count': count, 'seconds': seconds} for sql, (count, seconds)
+                              in sorted(queries.items(), key=lambda item: item[1][1], reverse=True)[:TOP_QUERIES]]
+        summary['functions'] = [{'function': f"{_short_path(filename)}:{line}({func})", 'calls': calls,
+                                 'tottime': tottime, 'cumtime': cumtime}
+                                for (filename, line, func), (_, calls, tottime, cumtime, _) in functions]
+        with open(base + '.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=1, default=str)
+        with self._lock:
+            self._written += 1
+        self.enforce_disk_limit()
+
+    def enforce_disk_limit(self):
+        """결과 파일 크기의 합이 max_bytes 이하가 될 때까지 오래된 파일부터 지웁니다."""
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(FILE_PREFIX) and entry.is_file():
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.path, stat.st_size))
+        total = sum(size for _, _, size in files)
+        for _, path, size in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # 다른 프로세스가 먼저 지웠습니다.
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            return {'written': self._written, 'skipped': self._skipped}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    token_parser = sub.add_parser('token', help='X-Profile 헤더 토큰 발급')
+    token_parser.add_argument('--ttl', type=int, default=600, help='유효 시간(초)')
+    on_parser = sub.add_parser('on', help='켜기 파일 만들기')
+    on_parser.add_argument('endpoints', nargs='*', help='프로파일링할 엔드포인트 (없으면 모든 요청)')
+    sub.add_parser('off', help='켜기 파일 지우기')
+    list_parser = sub.add_parser('list', help='최근 결과 요약')
+    list_parser.add_argument('-n', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    from app import request_profiler
+
+    if args.command == 'token':
+        if not request_profiler.secret:
+            print("PROFILE_SECRET이 설정되어 있지 않습니다.", file=sys.stderr)
+            return 1
+        print(make_token(request_profiler.secret, args.ttl))
+    elif args.command == 'on':
+        os.makedirs(request_profiler.directory, exist_ok=True)
+        with open(request_profiler.toggle_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(f"{endpoint}\n" for endpoint in args.endpoints))
+        print(f"프로파일링을 켰습니다: {', '.join(args.endpoints) or '모든 요청'} ({request_profiler.toggle_path})")
+    elif args.command == 'off':
+        try:
+            os.remove(request_profiler.toggle_path)
+        except FileNotFoundError:
+            pass
+        print("프로파일링을 껐습니다.")
+    else:
+        if not os.path.isdir(request_profiler.directory):
+            print("아직 기록된 결과가 없습니다.")
+            return 0
+        names = sorted((name for name in os.listdir(request_profiler.directory)
+                        if name.startswith(FILE_PREFIX) and name.endswith('.json')), reverse=True)
+        for name in names[:args.n]:
+            with open(os.path.join(request_profiler.directory, name), encoding='utf-8') as f:
+                summary = json.load(f)
+            print(f"{name[:-5]}  {summary['method']} {summary['path']} {summary['status']}  "
+                  f"전체 {summary['total_seconds'] * 1000:.1f}ms  DB {summary['db_seconds'] * 1000:.1f}ms "
+                  f"({summary['db_queries']}회)  템플릿 {summary['template_seconds'] * 1000:.1f}ms  [{summary['trigger']}]")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,286 @@
+import abc
+import re
+import threading
+from collections import defaultdict
+
+# 게시글 검색용 n-gram 역색인
+#
+# 한국어 게시글은 공백 단위 토큰화로는 부분 검색이 되지 않으므로, 제목과 본문을
+# 2-gram(바이그램)으로 잘라 역색인을 만듭니다. 한 글자짜리 단어는 1-gram으로 저장합니다.
+# 바이그램만으로는 단어의 마지막 글자가 어떤 gram의 첫 글자도 되지 않으므로, 단어마다
+# '마지막 글자 + $' 끝 gram을 하나 더 저장해 한 글자 검색이 단어 끝 글자와도 일치하게 합니다.
+# (끝 gram을 추가하기 전에 만든 색인은 `python search.py`로 다시 만드세요.)
+# 검색어도 같은 방식으로 잘라 모든 gram을 포함하는 게시글만 찾고, 출현 빈도(제목 가중치 포함)로
+# 순위를 매깁니다. LIKE '%q%' 와 달리 (gram, board_id) 기본 키를 그대로 사용하므로
+# 게시글 수가 늘어나도 검색 비용이 거의 일정합니다.
+#
+# MariaDB의 FULLTEXT 인덱스는 ngram 파서를 지원하지 않기 때문에, 기본 백엔드는
+# 아래 board_ngrams 테이블을 직접 관리합니다.
+#
+# CREATE TABLE board_ngrams (
+#     gram VARCHAR(2) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+#     board_id INT NOT NULL,
+#     weight SMALLINT UNSIGNED NOT NULL,
+#     PRIMARY KEY (gram, board_id),
+#     KEY idx_board_ngrams_board (board_id),
+#     FOREIGN KEY (board_id) REFERENCES board(id) ON DELETE CASCADE
+# );
+
+TITLE_WEIGHT = 3 # 제목에 나온 gram은 본문보다 3배 가중치를 줍니다.
+MAX_QUERY_GRAMS = 16 # 지나치게 긴 검색어로 쿼리가 커지지 않도록 gram 수를 제한합니다.
+MAX_WEIGHT = 65535 # SMALLINT UNSIGNED 상한
+END_MARK = '$' # 끝 gram 표시. \w에 속하지 않으므로 단어의 gram과 겹치지 않습니다.
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    """텍스트를 소문자 단어 목록으로 나눕니다."""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def ngrams(text):
+    """
+    텍스트의 gram별 출현 횟수를 반환합니다. 한 글자 단어는 그대로 1-gram이 되고,
+    두 글자 이상인 단어는 바이그램과 끝 gram(마지막 글자 + END_MARK)을 만듭니다.
+    """
+    counts = defaultdict(int)
+    for token in tokenize(text):
+        if len(token) == 1:
+            counts[token] += 1
+            continue
+        for i in range(len(token) - 1):
+            counts[token[i:i + 2]] += 1
+        counts[token[-1] + END_MARK] += 1
+    return counts
+
+
+def document_grams(title, content):
+    """제목/본문을 합쳐 gram별 가중치를 계산합니다."""
+    weights = defaultdict(int)
+    for gram, count in ngrams(title).items():
+        weights[gram] += count * TITLE_WEIGHT
+    for gram, count in ngrams(content).items():
+        weights[gram] += count
+    return {gram: min(weight, MAX_WEIGHT) for gram, weight in weights.items()}
+
+
+def query_terms(query):
+    """
+    검색어를 (gram, is_prefix) 목록으로 변환합니다.
+    한 글자 단어는 그 글자로 시작하는 모든 gram(바이그램, 끝 gram, 1-gram)과 일치해야 하므로
+    접두사 검색으로 처리합니다.
+    """
+    terms = []
+    seen = set()
+    for token in tokenize(query):
+        if len(token) == 1:
+            candidates = [(token, True)]
+        else:
+            candidates = [(token[i:i + 2], False) for i in range(len(token) - 1)]
+        for term in candidates:
+            if term not in seen:
+                seen.add(term)
+                terms.append(term)
+    return terms[:MAX_QUERY_GRAMS]
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class SearchBackend(abc.ABC):
+    """
+    게시글 검색 백엔드의 공통 인터페이스입니다.
+    cursor 인자는 게시글 쓰기와 같은 트랜잭션 안에서 색인을 갱신할 수 있도록 전달됩니다.
+    DB 밖에 색인을 두는 백엔드를 위해, 쓰기 경로는 커밋한 뒤 commit()을, 요청을 마칠 때 rollback()을 호출합니다.
+    """
+
+    @abc.abstractmethod
+    def index_post(self, cursor, post_id, title, content):
+        """게시글 하나의 색인을 새로 만듭니다."""
+
+    @abc.abstractmethod
+    def remove_post(self, cursor, post_id):
+        """게시글 하나를 색인에서 지웁니다."""
+
+    @abc.abstractmethod
+    def search(self, cursor, query, limit, offset=0):
+        """(post_id, score) 목록을 점수 내림차순으로 반환합니다."""
+
+    @abc.abstractmethod
+    def rebuild(self, cursor):
+        """board 테이블 전체로부터 색인을 다시 만듭니다."""
+
+    def commit(self):
+        """이 스레드의 쓰기 트랜잭션이 커밋된 뒤 호출합니다. 색인이 같은 트랜잭션에 있으면 할 일이 없습니다."""
+
+    def rollback(self):
+        """커밋하지 않은 이 스레드의 색인 변경을 버립니다. commit() 뒤에 호출해도 됩니다."""
+
+
+class NgramTableBackend(SearchBackend):
+    """board_ngrams 테이블에 역색인을 저장하는 기본 백엔드입니다."""
+
+    def index_post(self, cursor, post_id, title, content):
+        cursor.execute("DELETE FROM board_ngrams WHERE board_id = %s", (post_id,))
+        rows = [(gram, post_id, weight) for gram, weight in document_grams(title, content).items()]
+        if rows:
+            cursor.executemany("INSERT INTO board_ngrams (gram, board_id, weight) VALUES (%s, %s, %s)", rows)
+
+    def remove_post(self, cursor, post_id):
+        # board 삭제 시 ON DELETE CASCADE로도 지워지지만, 명시적으로 정리합니다.
+        cursor.execute("DELETE FROM board_ngrams WHERE board_id = %s", (post_id,))
+
+    def search(self, cursor, query, limit, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return []
+
+        where, having, params, having_params = [], [], [], []
+        for gram, is_prefix in terms:
+            if is_prefix:
+                where.append("gram LIKE %s")
+                having.append("SUM(gram LIKE %s) > 0")
+                pattern = _escape_like(gram) + '%'
+                params.append(pattern)
+                having_params.append(pattern)
+            else:
+                where.append("gram = %s")
+                having.append("SUM(gram = %s) > 0")
+                params.append(gram)
+                having_params.append(gram)
+
+        sql = "SELECT board_id, SUM(weight) AS score FROM board_ngrams " \
+              "WHERE " + " OR ".join(where) + \
+              " GROUP BY board_id HAVING " + " AND ".join(having) + \
+              " ORDER BY score DESC, board_id DESC LIMIT %s OFFSET %s"
+        cursor.execute(sql, params + having_params + [limit, offset])
+        return [(row['board_id'], int(row['score'])) for row in cursor.fetchall()]
+
+    def rebuild(self, cursor):
+        cursor.execute("DELETE FROM board_ngrams")
+        cursor.execute("SELECT id, title, content FROM board")
+        for post in cursor.fetchall():
+            self.index_post(cursor, post['id'], post['title'], post['content'])
+
+
+class InMemoryNgramBackend(SearchBackend):
+    """
+    프로세스 메모리에 역색인을 두는 로컬 테스트용 백엔드입니다.
+    프로세스마다 따로 색인을 가지므로 여러 데몬 프로세스 환경에서는 사용하지 마세요.
+    index_post()/remove_post()는 변경을 스레드별로 모아 두었다가 commit()에서 색인에 반영하므로,
+    롤백된 쓰기는 색인에 남지 않습니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict) # gram -> {post_id: weight}
+        self._doc_grams = {} # post_id -> set(gram)
+        self._loaded = False
+        self._local = threading.local() # pending: [(post_id, grams 또는 삭제면 None), ...]
+
+    def _ensure_loaded(self, cursor):
+        if not self._loaded:
+            self.rebuild(cursor)
+
+    def _pending(self):
+        if not hasattr(self._local, 'pending'):
+            self._local.pending = []
+        return self._local.pending
+
+    def index_post(self, cursor, post_id, title, content):
+        self._pending().append((post_id, document_grams(title, content)))
+
+    def _index(self, post_id, grams):
+        self._remove(post_id)
+        for gram, weight in grams.items():
+            self._postings[gram][post_id] = weight
+        self._doc_grams[post_id] = set(grams)
+
+    def _remove(self, post_id):
+        for gram in self._doc_grams.pop(post_id, ()):
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.pop(post_id, None)
+                if not postings:
+                    del self._postings[gram]
+
+    def remove_post(self, cursor, post_id):
+        self._pending().append((post_id, None))
+
+    def commit(self):
+        pending, self._local.pending = self._pending(), []
+        with self._lock:
+            for post_id, grams in pending:
+                if grams is None:
+                    self._remove(post_id)
+                else:
+                    self._index(post_id, grams)
+
+    def rollback(self):
+        self._local.pending = []
+
+    def search(self, cursor, query, limit, offset=0):
+        terms = query_terms(query)
+        if not terms:
+            return []
+        with self._lock:
+            self._ensure_loaded(cursor)
+            scores = None
+            for gram, is_prefix in terms:
+                if is_prefix:
+                    matched = defaultdict(int)
+                    for key, postings in self._postings.items():
+                        if key.startswith(gram):
+                            for post_id, weight in postings.items():
+                                matched[post_id] += weight
+                else:
+                    matched = self._postings.get(gram, {})
+                if scores is None:
+                    scores = dict(matched)
+                else:
+                    scores = {post_id: score + matched[post_id]
+                              for post_id, score in scores.items() if post_id in matched}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (item[1], item[0]), reverse=True)
+        return ranked[offset:offset + limit]
+
+    def rebuild(self, cursor):
+        cursor.execute("SELECT id, title, content FROM board")
+        posts = cursor.fetchall()
+        with self._lock:
+            self._postings.clear()
+            self._doc_grams.clear()
+            for post in posts:
+                self._index(post['id'], document_grams(post['title'], post['content']))
+            self._loaded = True
+
+
+BACKENDS = {
+    'ngram': NgramTableBackend,
+    'memory': InMemoryNgramBackend,
+}
+
+
+def create_backend(name):
+    """SEARCH_BACKEND 이름으로 검색 백엔드를 생성합니다."""
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"알 수 없는 검색 백엔드입니다: {name} (사용 가능: {', '.join(BACKENDS)})")
+
+
+if __name__ == '__main__':
+    # 기존 게시글로 색인을 다시 만듭니다: python search.py
+    from app import db_pool, search_index
+
+    conn = db_pool.acquire()
+    try:
+        with conn.cursor() as cursor:
+            search_index.rebuild(cursor)
+        conn.commit()
+        print("검색 색인을 다시 만들었습니다.")
+    finally:
+        conn.close()
@@ -0,0 +1,31 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+import bench
+import bench_db
+
+
+@pytest.fixture(scope='session')
+def seeded():
+    """
+    bench.py와 같은 방식으로 SQLite 대체 DB에 작은 데이터를 채운 app입니다. 쿼리 예산을 넘으면
+    QueryBudgetExceeded가 테스트 클라이언트까지 전달됩니다. (app은 프로세스마다 한 번만 import됩니다)
+    """
+    os.environ.setdefault('HASH_WORKERS', '0')
+    app_module, path = bench.prepare_app(threads=2, enforce_query_budgets=True)
+    app_module.QUERY_BUDGET_ENFORCE = True
+    app_module.app.testing = True
+    bench_db.create_schema(path)
+    args = SimpleNamespace(users=3, posts=30, comments=3, diaries=20, todos=15, requests=5, seed=1)
+    data = bench.Dataset(app_module, lambda: bench_db.connect(path), args)
+    data.seed()
+    yield SimpleNamespace(app=app_module, data=data, path=path, connect=lambda: bench_db.connect(path))
+    app_module.password_hasher.shutdown()
+
+
+@pytest.fixture
+def worker(seeded):
+    """첫 번째 사용자로 로그인한 bench.Worker"""
+    return bench.Worker(seeded.app.app, seeded.data, 0)
@@ -0,0 +1,99 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import admission
+from admission import AdmissionController, TokenBucketLimiter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """admission 모듈이 보는 time.monotonic()을 손으로 움직이는 시계"""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(admission, 'time', SimpleNamespace(monotonic=lambda: now.value))
+    return now
+
+
+def test_admission_rejects_beyond_max_concurrent():
+    controller = AdmissionController(max_concurrent=2)
+    assert controller.try_acquire() and controller.try_acquire()
+    assert not controller.try_acquire()
+    controller.release()
+    assert controller.try_acquire()
+    assert controller.stats() == {'max_concurrent': 2, 'in_flight': 2, 'admitted': 3, 'rejected': 1}
+
+
+def test_admission_waits_for_a_slot():
+    controller = AdmissionController(max_concurrent=1, wait=2)
+    controller.try_acquire()
+    threading.Timer(0.05, controller.release).start()
+    assert controller.try_acquire()
+
+
+def test_admission_zero_is_unlimited():
+    controller = AdmissionController(max_concurrent=0)
+    assert all(controller.try_acquire() for _ in range(100))
+    controller.release()
+    assert controller.stats()['in_flight'] == 99
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    limiter = TokenBucketLimiter(rate=2, burst=3)
+    assert [limiter.take('u') for _ in range(4)] == [0, 0, 0, 1]
+    clock.value += 0.5 # 토큰 1개가 찹니다.
+    assert (limiter.take('u'), limiter.take('u')) == (0, 1)
+    clock.value += 100 # 오래 쉬어도 burst개까지만 쌓입니다.
+    assert [limiter.take('u') for _ in range(4)] == [0, 0, 0, 1]
+    assert limiter.stats() == {'keys': 1, 'limited': 3}
+
+
+def test_retry_after_covers_the_missing_tokens(clock):
+    limiter = TokenBucketLimiter(rate=0.5, burst=4)
+    assert limiter.take('u', cost=4) == 0
+    assert limiter.take('u', cost=3) == 6 # 3개가 차려면 6초
+    clock.value += 5.9
+    assert limiter.take('u', cost=3) == 1 # 거절된 요청은 토큰을 쓰지 않습니다.
+    clock.value += 0.1
+    assert limiter.take('u', cost=3) == 0
+
+
+def test_cost_above_burst_is_capped(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=5)
+    assert limiter.take('u', cost=10) == 0 # 가득 찬 버킷이면 burst보다 비싼 요청도 받아들입니다.
+    assert limiter.take('u') == 1
+    clock.value += 4
+    assert limiter.take('u', cost=10) == 1
+
+
+def test_least_recently_used_keys_are_forgotten(clock):
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_keys=2)
+    limiter.take('a')
+    limiter.take('b')
+    limiter.take('a') # a를 최근에 사용했으므로 c가 들어오면 b가 밀려납니다.
+    limiter.take('c')
+    assert limiter.stats()['keys'] == 2
+    assert limiter.take('b') == 0 # 잊힌 키는 가득 찬 버킷으로 다시 시작합니다.
+    assert limiter.take('c') == 1
+
+
+def test_rate_zero_is_unlimited():
+    limiter = TokenBucketLimiter(rate=0, burst=1)
+    assert all(limiter.take('u') == 0 for _ in range(10))
+    assert limiter.stats()['keys'] == 0
+
+
+def test_routes_answer_503_and_429_with_retry_after(seeded, worker, monkeypatch):
+    app_module = seeded.app
+    full = AdmissionController(max_concurrent=1)
+    full.try_acquire()
+    monkeypatch.setattr(app_module, 'db_admission', full)
+    response = worker.client.get('/todos')
+    assert (response.status_code, response.headers['Retry-After']) == (503, str(app_module.ADMISSION_RETRY_AFTER))
+
+    monkeypatch.setattr(app_module, 'db_admission', AdmissionController(max_concurrent=1))
+    monkeypatch.setattr(app_module, 'user_limiter', TokenBucketLimiter(rate=0.1, burst=1))
+    assert worker.client.get('/todos').status_code == 200
+    response = worker.client.get('/todos')
+    assert (response.status_code, response.headers['Retry-After']) == (429, '10')
+    assert worker.client.get('/logout').status_code == 302 # DB를 쓰지 않는 요청은 제한하지 않습니다.
@@ -0,0 +1,57 @@
+def todo_rows(seeded, ids):
+    conn = seeded.connect()
+    with conn.cursor() as cursor:
+        cursor.execute(f"SELECT id, user_id, status, due_date FROM todos WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                       ids)
+        rows = {row['id']: row for row in cursor.fetchall()}
+    conn.close()
+    return rows
+
+
+def other_users_todos(seeded, worker):
+    return [todo_id for user_id, ids in seeded.data.todos_by_user.items() if user_id != worker.user_id
+            for todo_id in ids[:2]]
+
+
+def test_only_own_todos_are_changed(seeded, worker):
+    own = seeded.data.todos_by_user[worker.user_id][:2]
+    others = other_users_todos(seeded, worker)
+    before = todo_rows(seeded, others)
+    missing = max(own + others) + 1000
+    response = worker.client.post('/todos/bulk', json={'ids': own + others + [missing], 'action': 'status',
+                                                        'new_status': '완료'})
+    body = response.get_json()
+    assert response.status_code == 200
+    assert (body['succeeded'], body['not_found']) == (2, len(others) + 1)
+    assert body['results'] == {**{str(todo_id): 'updated' for todo_id in own},
+                               **{str(todo_id): 'not_found' for todo_id in others + [missing]}}
+    assert {row['status'] for row in todo_rows(seeded, own).values()} == {'완료'}
+    assert todo_rows(seeded, others) == before
+
+
+def test_delete_of_other_users_todos_deletes_nothing(seeded, worker):
+    others = other_users_todos(seeded, worker)
+    response = worker.client.post('/todos/bulk', json={'ids': others, 'action': 'delete'})
+    assert response.get_json()['succeeded'] == 0
+    assert sorted(todo_rows(seeded, others)) == sorted(others)
+
+
+def test_reschedule_form_post(seeded, worker):
+    own = seeded.data.todos_by_user[worker.user_id][:3]
+    rescheduled = {'완료': '미완료', '기간연장': '기간연장', '미완료': '진행중', '진행중': '진행중'}
+    expected = {todo_id: rescheduled[row['status']] for todo_id, row in todo_rows(seeded, own).items()}
+    response = worker.client.post('/todos/bulk', data={'todo_ids': [str(todo_id) for todo_id in own],
+                                                       'action': 'reschedule', 'new_due_date': '2030-01-02'})
+    assert response.status_code == 302
+    rows = todo_rows(seeded, own)
+    assert {str(row['due_date']) for row in rows.values()} == {'2030-01-02'}
+    assert {todo_id: row['status'] for todo_id, row in rows.items()} == expected
+
+
+def test_invalid_requests_are_rejected(seeded, worker):
+    post = lambda payload: worker.client.post('/todos/bulk', json=payload)
+    assert post({'ids': ['x'], 'action': 'delete'}).status_code == 400
+    assert post({'ids': [], 'action': 'delete'}).status_code == 400
+    assert post({'ids': list(range(1, seeded.app.TODO_BULK_MAX + 2)), 'action': 'delete'}).status_code == 400
+    assert post({'ids': [1], 'action': 'archive'}).status_code == 400
+    assert post({'ids': [1], 'action': 'status', 'new_status': '보류'}).status_code == 400
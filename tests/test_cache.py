@@ -0,0 +1,40 @@
+import user_summary
+from cache import ReadThroughCache, VersionCounter
+
+
+def make_cache(tmp_path):
+    return ReadThroughCache(VersionCounter(str(tmp_path / 'test.versions')))
+
+
+def summary(posts):
+    return {'todos': {}, 'overdue': 0, 'diary_today': False, 'recent_posts': posts}
+
+
+def test_update_after_concurrent_load_applies_write_once(tmp_path):
+    cache = make_cache(tmp_path)
+    db = {'posts': []}
+
+    def write_post():
+        db['posts'] = [{'id': 1, 'title': '새 글'}] + db['posts']
+
+    def load_after_commit():
+        # get_or_load()가 버전을 읽은 뒤, 다른 요청의 쓰기가 커밋되고 나서 DB를 읽는 경우입니다.
+        write_post()
+        return summary(list(db['posts']))
+
+    cache.get_or_load('dashboard:1', 'dashboard:1', load_after_commit)
+    cache.update('dashboard:1', 'dashboard:1', lambda value: user_summary.post_written(value, 1, '새 글'))
+    assert cache.get('dashboard:1', 'dashboard:1') == (True, summary([{'id': 1, 'title': '새 글'}]))
+
+
+def test_invalidate_after_concurrent_load_reloads(tmp_path):
+    cache = make_cache(tmp_path)
+    db = {'todos': 0}
+
+    def load_after_commit():
+        db['todos'] += 1 # 읽기 도중 다른 요청이 To-Do를 추가해 커밋했습니다.
+        return {'todos': db['todos']}
+
+    cache.get_or_load('dashboard:1', 'dashboard:1', load_after_commit)
+    cache.invalidate('dashboard:1')
+    assert cache.get_or_load('dashboard:1', 'dashboard:1', lambda: {'todos': db['todos']}) == {'todos': 1}
@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+
+import bench_db
+from db_pool import ConnectionPool, PoolTimeout
+
+
+def make_pool(tmp_path, **options):
+    path = str(tmp_path / 'pool.sqlite3')
+    bench_db.create_schema(path)
+    return ConnectionPool({}, connector=lambda **config: bench_db.connect(path), **options)
+
+
+def test_acquire_times_out_when_pool_is_exhausted(tmp_path):
+    pool = make_pool(tmp_path, max_size=1, timeout=0.02)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    conn.close()
+    conn.close() # 두 번 반납해도 자리가 한 번만 돌아옵니다.
+    pool.acquire().close()
+    stats = pool.stats()
+    assert (stats['size'], stats['in_use'], stats['idle'], stats['timeouts'], stats['connects']) == (1, 0, 1, 1, 1)
+
+
+def test_waiting_acquire_gets_released_connection(tmp_path):
+    pool = make_pool(tmp_path, max_size=1, timeout=2)
+    conn = pool.acquire()
+    threading.Timer(0.05, conn.close).start()
+    pool.acquire().close()
+    assert pool.stats()['waits'] == 1
+
+
+def test_release_rolls_back_uncommitted_work(tmp_path):
+    pool = make_pool(tmp_path, max_size=1)
+    conn = pool.acquire()
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (username, password) VALUES ('leak', 'p')")
+    conn.close()
+    conn = pool.acquire()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM users")
+        assert cursor.fetchone()['n'] == 0
+    conn.close()
+    assert pool.stats()['connects'] == 1 # 롤백한 연결은 다시 사용합니다.
+
+
+def test_dead_idle_connection_is_replaced(tmp_path):
+    pool = make_pool(tmp_path, max_size=1, ping_interval=0)
+    conn = pool.acquire()
+    conn._raw.close() # 쉬는 동안 서버가 연결을 끊은 경우
+    conn.close() # 끊긴 연결은 풀에 돌려놓지 않습니다.
+    assert pool.stats()['size'] == 0
+    pool.acquire().close()
+    idle = pool._idle[0][0]
+    idle.close()
+    conn = pool.acquire() # ping이 실패하면 새 연결을 맺습니다.
+    assert conn._raw is not idle and conn._raw.open
+    conn.close()
+    assert pool.stats()['connects'] == 3
+
+
+def test_old_connection_is_recycled(tmp_path):
+    pool = make_pool(tmp_path, max_size=1, recycle=0.01)
+    conn = pool.acquire()
+    first = conn._raw
+    conn.close()
+    time.sleep(0.02)
+    conn = pool.acquire()
+    assert conn._raw is not first and not first.open
+    conn.close()
+
+
+def test_failed_connect_frees_the_slot(tmp_path):
+    def refuse(**config):
+        raise OSError('connection refused')
+    pool = ConnectionPool({}, max_size=1, timeout=0.02, connector=refuse)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.acquire()
+    assert pool.stats()['size'] == 0
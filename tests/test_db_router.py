@@ -0,0 +1,126 @@
+import time
+
+import pymysql
+import pytest
+from pymysql.constants import CR, ER
+
+import bench_db
+from db_pool import ConnectionPool, PoolTimeout
+from db_router import ReplicaRouter
+
+
+class FakeCursor:
+    """execute()가 항상 error를 던지는 커서"""
+
+    def __init__(self, error):
+        self.error = error
+
+    def execute(self, query, args=None):
+        raise self.error
+
+    def close(self):
+        pass
+
+
+class FakeRaw:
+    """풀이 반납 시 확인하는 만큼만 흉내 낸 pymysql 연결"""
+    server_status = 0
+
+    def __init__(self, error):
+        self.error = error
+        self.open = True
+
+    def cursor(self, cursor=None):
+        return FakeCursor(self.error)
+
+    def close(self):
+        self.open = False
+
+
+def failing_pool(error=None, acquire_error=None):
+    def connect(**config):
+        if acquire_error is not None:
+            raise acquire_error
+        return FakeRaw(error)
+    return ConnectionPool({}, max_size=2, timeout=0.05, connector=connect)
+
+
+def test_replicas_are_used_round_robin():
+    router = ReplicaRouter(None, [('r1', failing_pool()), ('r2', failing_pool())])
+    conns = [router.acquire_read() for _ in range(2)]
+    assert [conn._pool for conn in conns] == [replica.pool for replica in router.replicas]
+
+
+def test_connect_failure_ejects_until_eject_seconds_pass():
+    lost = pymysql.err.OperationalError(CR.CR_CONN_HOST_ERROR, "Can't connect")
+    router = ReplicaRouter(None, [('r1', failing_pool(acquire_error=lost))], eject_seconds=0.05)
+    assert router.acquire_read() is None
+    replica = router.replicas[0]
+    assert (replica.healthy, replica.ejections) == (False, 1)
+    assert router.acquire_read() is None
+    assert replica.ejections == 1 # 빠져 있는 동안에는 연결을 시도하지 않습니다.
+    time.sleep(0.06)
+    assert replica.healthy
+
+
+def test_busy_replica_is_not_ejected():
+    router = ReplicaRouter(None, [('r1', failing_pool())], acquire_timeout=0.01)
+    held = [router.acquire_read() for _ in range(2)]
+    assert router.acquire_read() is None
+    assert router.replicas[0].healthy
+    assert router.stats()['fallbacks'] == 1
+    for conn in held:
+        conn.close()
+
+
+@pytest.mark.parametrize('error, ejected', [
+    (pymysql.err.OperationalError(CR.CR_SERVER_LOST, 'Lost connection'), True),
+    (pymysql.err.OperationalError(CR.CR_SERVER_GONE_ERROR, 'MySQL server has gone away'), True),
+    (pymysql.err.InterfaceError(0, ''), True),
+    (pymysql.err.OperationalError(ER.LOCK_DEADLOCK, 'Deadlock found'), False),
+    (pymysql.err.OperationalError(ER.LOCK_WAIT_TIMEOUT, 'Lock wait timeout'), False),
+    (pymysql.err.ProgrammingError(ER.PARSE_ERROR, 'syntax'), False),
+    (PoolTimeout('busy'), False),
+])
+def test_query_connection_error_ejects_replica(error, ejected):
+    router = ReplicaRouter(None, [('r1', failing_pool(error))])
+    conn = router.acquire_read()
+    with pytest.raises(type(error)):
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    conn.close()
+    assert router.replicas[0].healthy is not ejected
+    assert router.replicas[0].ejections == int(ejected)
+
+
+def test_repeated_query_failures_eject_once():
+    lost = pymysql.err.OperationalError(CR.CR_SERVER_LOST, 'Lost connection')
+    router = ReplicaRouter(None, [('r1', failing_pool(lost))])
+    conns = [router.acquire_read() for _ in range(2)]
+    for conn in conns:
+        with pytest.raises(pymysql.err.OperationalError):
+            conn.cursor().execute("SELECT 1")
+        conn.close()
+    assert router.replicas[0].ejections == 1
+
+
+def test_write_keeps_session_reads_on_primary(seeded, worker, monkeypatch):
+    app_module = seeded.app
+    replica = ConnectionPool({}, max_size=2, connector=lambda **config: bench_db.connect(seeded.path))
+    monkeypatch.setattr(app_module, 'db_router', ReplicaRouter(app_module.db_pool, [('r1', replica)]))
+
+    def read_pool(primary_until):
+        with app_module.app.test_request_context():
+            app_module.session['primary_until'] = primary_until
+            conn = app_module.get_read_connection()
+            app_module.release_connections()
+        return conn._pool
+
+    with worker.client.session_transaction() as sess:
+        sess.pop('primary_until', None)
+    worker.client.post('/todos/add', data={'task': '복제 지연 확인'})
+    with worker.client.session_transaction() as sess:
+        until = sess['primary_until']
+    assert until > time.time()
+    assert read_pool(until) is app_module.db_pool
+    assert read_pool(time.time() - 1) is replica
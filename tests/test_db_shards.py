@@ -0,0 +1,146 @@
+import pytest
+
+import bench_db
+import db_shards
+from cache import VersionCounter
+from db_pool import ConnectionPool
+from db_shards import MAIN_SHARD, ShardMap, ShardMoving, move_user, plan_rebalance, shard_version_key
+
+
+def sqlite_pool(path):
+    return ConnectionPool({}, max_size=2, connector=lambda **config: bench_db.connect(path))
+
+
+@pytest.fixture
+def shards(tmp_path):
+    """주 DB(사용자 1: 일기 3개, To-Do 4개)와 빈 샤드 s1로 이루어진 ShardMap"""
+    main_path, s1_path = str(tmp_path / 'main.sqlite3'), str(tmp_path / 's1.sqlite3')
+    bench_db.create_schema(main_path)
+    bench_db.create_schema(s1_path, bench_db.SHARD_SCHEMA)
+    conn = bench_db.connect(main_path)
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p'), (2, 'v', 'p')")
+        cursor.executemany("INSERT INTO diaries (user_id, entry_date, content) VALUES (%s, %s, %s)",
+                           [(1, f'2024-01-0{day}', f'일기 {day}') for day in range(1, 4)] + [(2, '2024-01-01', '남')])
+        cursor.executemany("INSERT INTO todos (user_id, task) VALUES (%s, %s)", [(1, f'할 일 {n}') for n in range(4)])
+    conn.commit()
+    conn.close()
+    shard_map = ShardMap(sqlite_pool(main_path), [('s1', sqlite_pool(s1_path))])
+    return shard_map, VersionCounter(str(tmp_path / 'test.versions'))
+
+
+def query(shard_map, name, sql, params=()):
+    conn = shard_map.pool(name).acquire()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def count(shard_map, name, table, user_id=1):
+    return query(shard_map, name, f"SELECT COUNT(*) AS n FROM {table} WHERE user_id = %s", (user_id,))[0]['n']
+
+
+def test_move_copies_verifies_and_cleans_up_source(shards):
+    shard_map, versions = shards
+    version = versions.get(shard_version_key(1))
+    moved = []
+    assert move_user(shard_map, versions, 1, 's1', batch_size=2, on_moved=moved.append, log=lambda line: None) \
+        == {'diaries': 3, 'todos': 4}
+    assert query(shard_map, MAIN_SHARD, "SELECT shard, shard_moving_to FROM users WHERE id = 1") \
+        == [{'shard': 's1', 'shard_moving_to': None}]
+    assert (count(shard_map, 's1', 'diaries'), count(shard_map, 's1', 'todos')) == (3, 4)
+    assert (count(shard_map, MAIN_SHARD, 'diaries'), count(shard_map, MAIN_SHARD, 'todos')) == (0, 0)
+    assert count(shard_map, MAIN_SHARD, 'diaries', user_id=2) == 1 # 다른 사용자의 행은 그대로입니다.
+    assert moved == [1]
+    assert versions.get(shard_version_key(1)) != version # 웹 프로세스가 세션의 샤드를 다시 읽습니다.
+
+
+def test_count_mismatch_rolls_back_and_keeps_source(shards, monkeypatch):
+    shard_map, versions = shards
+    copy_rows = db_shards._copy_rows
+
+    def lossy(source, target, table, columns, user_id, batch_size):
+        return copy_rows(source, target, table, columns, user_id, batch_size) - (table == 'todos')
+    monkeypatch.setattr(db_shards, '_copy_rows', lossy)
+    with pytest.raises(RuntimeError):
+        move_user(shard_map, versions, 1, 's1', log=lambda line: None)
+    assert query(shard_map, MAIN_SHARD, "SELECT shard, shard_moving_to FROM users WHERE id = 1") \
+        == [{'shard': MAIN_SHARD, 'shard_moving_to': None}]
+    assert (count(shard_map, 's1', 'diaries'), count(shard_map, 's1', 'todos')) == (0, 0)
+    assert (count(shard_map, MAIN_SHARD, 'diaries'), count(shard_map, MAIN_SHARD, 'todos')) == (3, 4)
+    assert all(pool.stats()['in_use'] == 0 for pool in shard_map.pools.values())
+
+
+def test_interrupted_move_is_not_restarted_over_the_fence(shards):
+    shard_map, versions = shards
+    conn = shard_map.pool(MAIN_SHARD).acquire()
+    with conn.cursor() as cursor:
+        cursor.execute("UPDATE users SET shard_moving_to = 's1' WHERE id = 1")
+    conn.commit()
+    conn.close()
+    with pytest.raises(ValueError):
+        move_user(shard_map, versions, 1, 's1', log=lambda line: None)
+    assert count(shard_map, 's1', 'todos') == 0
+
+
+def test_move_to_current_shard_does_nothing(shards):
+    shard_map, versions = shards
+    assert move_user(shard_map, versions, 1, MAIN_SHARD, log=lambda line: None) == {}
+    assert count(shard_map, MAIN_SHARD, 'todos') == 4
+
+
+def test_write_is_fenced_while_user_is_moving(seeded, monkeypatch, tmp_path):
+    app_module = seeded.app
+    shard_path = str(tmp_path / 's1.sqlite3')
+    bench_db.create_schema(shard_path, bench_db.SHARD_SCHEMA)
+    monkeypatch.setattr(app_module, 'shard_map', ShardMap(app_module.db_pool, [('s1', sqlite_pool(shard_path))]))
+    user_id = seeded.data.user_ids[0]
+
+    def set_shard(shard, moving_to):
+        conn = seeded.connect()
+        with conn.cursor() as cursor:
+            cursor.execute("UPDATE users SET shard = %s, shard_moving_to = %s WHERE id = %s", (shard, moving_to, user_id))
+        conn.commit()
+        conn.close()
+
+    try:
+        set_shard(MAIN_SHARD, 's1')
+        with app_module.app.test_request_context():
+            app_module.session.update(id=user_id, shard=[user_id, 0, MAIN_SHARD])
+            app_module.g.user_shard = MAIN_SHARD
+            with pytest.raises(ShardMoving):
+                app_module.lock_user_shard()
+            assert 'shard' not in app_module.session
+            app_module.release_connections()
+
+        # 다른 샤드에 있는 사용자의 잠금은 샤드 쓰기와 별개이므로 바로 풉니다.
+        set_shard('s1', None)
+        with app_module.app.test_request_context():
+            app_module.session['id'] = user_id
+            app_module.g.user_shard = 's1'
+            app_module.lock_user_shard()
+            main = app_module.g.db_conn
+            rollbacks = []
+            main.rollback = lambda: rollbacks.append(True)
+            app_module.release_user_shard_lock()
+            app_module.release_user_shard_lock()
+            assert rollbacks == [True]
+            app_module.release_connections()
+    finally:
+        set_shard(MAIN_SHARD, None)
+
+
+def test_rebalance_moves_largest_user_that_narrows_the_gap():
+    loads = {MAIN_SHARD: {1: 50, 2: 40, 3: 30}, 's1': {}, 's2': {}}
+    # 주 DB는 대상이 아니므로 s1(50)과 s2(40)의 차이를 줄일 사용자가 없으면 멈춥니다.
+    assert plan_rebalance(loads, ['s1', 's2'], max_users=10) == [(1, MAIN_SHARD, 's1', 50), (2, MAIN_SHARD, 's2', 40)]
+    assert loads[MAIN_SHARD] == {1: 50, 2: 40, 3: 30} # 입력은 바꾸지 않습니다.
+
+
+def test_rebalance_respects_max_users_and_stops_when_balanced():
+    loads = {MAIN_SHARD: {1: 30, 2: 30}, 's1': {3: 30}}
+    assert plan_rebalance(loads, [MAIN_SHARD, 's1'], max_users=10) == []
+    assert plan_rebalance({MAIN_SHARD: {1: 50, 2: 50}, 's1': {}}, ['s1'], max_users=1) == [(2, MAIN_SHARD, 's1', 50)]
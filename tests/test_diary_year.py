@@ -0,0 +1,64 @@
+from datetime import date, timedelta
+
+import diary_year
+from diary_year import bitmap, current_streak, longest_streak, monthly_counts, summarize, week_grid
+
+
+def days(year, *spans):
+    """(시작 'MM-DD', 일수) 구간들의 날짜 목록"""
+    result = []
+    for start, count in spans:
+        first = date.fromisoformat(f'{year}-{start}')
+        result.extend(first + timedelta(days=n) for n in range(count))
+    return result
+
+
+def test_leap_year_bits_and_monthly_counts():
+    assert diary_year.days_in_year(2024) == 366 and diary_year.days_in_year(2023) == 365
+    bits = bitmap(days(2024, ('01-01', 1), ('02-28', 2), ('12-31', 1)))
+    assert bits >> 365 & 1 # 윤년의 12월 31일은 366번째 날입니다.
+    assert monthly_counts(bits, 2024) == [1, 2, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1]
+    assert monthly_counts(bitmap(days(2023, ('02-28', 2))), 2023) == [0, 1, 1] + [0] * 9
+
+
+def test_streaks():
+    bits = bitmap(days(2024, ('03-01', 5), ('03-10', 3), ('12-30', 2)))
+    assert longest_streak(bits) == 5
+    assert longest_streak(0) == 0
+    assert current_streak(bits, 2024, date(2024, 3, 12)) == 3
+    assert current_streak(bits, 2024, date(2024, 3, 13)) == 3 # 오늘 아직 쓰지 않았으면 어제까지 셉니다.
+    assert current_streak(bits, 2024, date(2024, 3, 14)) == 0
+    assert current_streak(bits, 2024, date(2025, 6, 1)) == 2 # 지난 연도는 12월 31일까지
+    assert current_streak(bits, 2024, date(2023, 6, 1)) == 0
+    assert current_streak(bitmap([date(2024, 1, 1)]), 2024, date(2024, 1, 1)) == 1
+    assert current_streak(0, 2024, date(2024, 1, 1)) == 0
+
+
+def test_summary_and_week_grid():
+    summary = summarize(bitmap(days(2023, ('07-01', 4))), 2023, date(2023, 7, 4))
+    assert len(summary['bitmap']) == 92
+    assert (summary['total'], summary['current_streak'], summary['longest_streak']) == (4, 4, 4)
+    for year in (2023, 2024):
+        weeks = week_grid(year)
+        cells = [cell for week in weeks for cell in week if cell is not None]
+        assert all(len(week) == 7 for week in weeks)
+        assert [index for index, _ in cells] == list(range(diary_year.days_in_year(year)))
+        first_week = weeks[0]
+        # 첫 주는 일요일부터 시작하므로 1월 1일 앞의 칸은 비어 있습니다.
+        assert first_week.index(cells[0]) == (date(year, 1, 1).weekday() + 1) % 7
+
+
+def test_year_json_matches_db_and_revalidates(seeded, worker):
+    year = date.today().year
+    conn = seeded.connect()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT entry_date FROM diaries WHERE user_id = %s AND entry_date >= %s AND entry_date < %s",
+                       (worker.user_id,) + diary_year.year_range(year))
+        expected = bitmap(row['entry_date'] for row in cursor.fetchall())
+    conn.close()
+    response = worker.client.get(f'/diary/year/{year}.json')
+    body = response.get_json()
+    assert int(body['bitmap'], 16) == expected
+    assert body['total'] == bin(expected).count('1')
+    again = worker.client.get(f'/diary/year/{year}.json', headers={'If-None-Match': response.headers['ETag']})
+    assert again.status_code == 304
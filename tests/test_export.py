@@ -0,0 +1,83 @@
+import json
+
+import bench_db
+from export import EXPORTS, read_batches
+
+
+class TrackingConnect:
+    """read_batches에 넘길 connect(). 빌려 간 연결 수와 동시에 열려 있는 연결 수를 셉니다."""
+
+    def __init__(self, path):
+        self.path = path
+        self.borrowed = 0
+        self.open = 0
+
+    def __call__(self):
+        tracker = self
+        conn = bench_db.connect(self.path)
+        close = conn.close
+
+        def closed():
+            tracker.open -= 1
+            close()
+        conn.close = closed
+        self.borrowed += 1
+        self.open += 1
+        return conn
+
+
+def seed_todos(tmp_path, count):
+    path = str(tmp_path / 'export.sqlite3')
+    bench_db.create_schema(path)
+    conn = bench_db.connect(path)
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p'), (2, 'v', 'p')")
+        # 같은 created_at이 배치 경계에 걸치도록 세 개씩 같은 시각으로 넣습니다.
+        cursor.executemany("INSERT INTO todos (user_id, task, status, created_at) VALUES (%s, %s, '미완료', %s)",
+                           [(1, f'할 일 {n}', f'2024-01-01 00:00:0{n // 3}') for n in range(count)]
+                           + [(2, '다른 사용자', '2024-01-01 00:00:00')])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_batches_cover_every_row_once_and_return_connections(tmp_path):
+    path = seed_todos(tmp_path, 10)
+    connect = TrackingConnect(path)
+    _, _, sql, keys = EXPORTS['todos']
+    tasks = []
+    for row in read_batches(connect, sql, keys, 1, batch_size=4):
+        # 행을 받는 동안에는 연결을 붙잡고 있지 않습니다.
+        assert connect.open == 0
+        tasks.append(row['task'])
+    assert tasks == [f'할 일 {n}' for n in range(10)]
+    assert connect.borrowed == 3
+
+
+def test_exact_multiple_of_batch_size_reads_one_empty_batch(tmp_path):
+    path = seed_todos(tmp_path, 8)
+    connect = TrackingConnect(path)
+    _, _, sql, keys = EXPORTS['todos']
+    assert len(list(read_batches(connect, sql, keys, 1, batch_size=4))) == 8
+    assert (connect.borrowed, connect.open) == (3, 0)
+
+
+def test_export_route_releases_admission_slot_while_streaming(seeded, worker, monkeypatch):
+    app_module = seeded.app
+    in_flight = []
+
+    def watched(*args):
+        for row in read_batches(*args):
+            in_flight.append(app_module.db_admission.stats()['in_flight'])
+            yield row
+    monkeypatch.setattr(app_module, 'read_batches', watched)
+    monkeypatch.setattr(app_module, 'EXPORT_BATCH_SIZE', 2)
+    lines = worker.client.get('/export/todos.jsonl').get_data(as_text=True).splitlines()
+    # 첫 행은 응답을 시작하기 전에 읽고, 그 뒤로는 동시 실행 자리를 붙잡지 않고 보냅니다.
+    print(in_flight); assert in_flight[0] == 1 and set(in_flight[1:]) == {0}
+    conn = seeded.connect()
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT task FROM todos WHERE user_id = %s ORDER BY created_at, id", (worker.user_id,))
+        expected = [row['task'] for row in cursor.fetchall()]
+    conn.close()
+    assert [json.loads(line)['task'] for line in lines] == expected
@@ -0,0 +1,72 @@
+from flask import Flask, flash, redirect, render_template_string
+
+from http_cache import is_not_modified, set_validators
+
+PAGE = "{% for message in get_flashed_messages() %}<p>{{ message }}</p>{% endfor %}<h1>page</h1>"
+ETAG = 'v1'
+
+
+def make_app():
+    app = Flask(__name__)
+    app.secret_key = 'test'
+
+    @app.route('/page')
+    def page():
+        if is_not_modified(ETAG):
+            return set_validators(app.response_class(status=304), ETAG)
+        return set_validators(app.make_response(render_template_string(PAGE)), ETAG)
+
+    @app.route('/save')
+    def save():
+        flash('saved')
+        return redirect('/page')
+
+    return app
+
+
+def test_page_without_flash_is_revalidated():
+    client = make_app().test_client()
+    first = client.get('/page')
+    assert first.headers['ETag'] == f'"{ETAG}"'
+    assert client.get('/page', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+
+def test_flashed_page_gets_no_etag():
+    client = make_app().test_client()
+    shown = client.get('/save', follow_redirects=True)
+    assert b'saved' in shown.data
+    assert 'ETag' not in shown.headers
+    assert 'no-store' in shown.headers['Cache-Control']
+
+    # 브라우저는 메시지가 담긴 페이지를 저장하지 않았으므로 다음 새로고침은 새 페이지를 받습니다.
+    reload = client.get('/page')
+    assert reload.status_code == 200
+    assert b'saved' not in reload.data
+
+
+class Browser:
+    """ETag로 페이지를 저장하고 재검증하는 브라우저 캐시를 흉내 냅니다."""
+
+    def __init__(self, client):
+        self.client = client
+        self.etag = self.body = None
+
+    def get(self, path):
+        headers = {'If-None-Match': self.etag} if self.etag else {}
+        response = self.client.get(path, headers=headers, follow_redirects=True)
+        if response.status_code == 304:
+            return self.body
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            self.etag = self.body = None
+        elif 'ETag' in response.headers:
+            self.etag, self.body = response.headers['ETag'], response.data
+        return response.data
+
+
+def test_conditional_get_after_flash_never_returns_stale_message():
+    browser = Browser(make_app().test_client())
+    assert b'saved' not in browser.get('/page')
+    assert b'saved' in browser.get('/save')
+    # 다음 새로고침(조건부 GET)이 304로 메시지가 담긴 페이지를 다시 보여주면 안 됩니다.
+    assert b'saved' not in browser.get('/page')
+    assert b'saved' not in browser.get('/page')
@@ -0,0 +1,72 @@
+import bench_db
+import importer
+
+
+class CountingConnection:
+    """executemany 호출 수를 세는 bench_db 연결 래퍼"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.queries = 0
+
+    def cursor(self):
+        cursor = self.conn.cursor()
+        executemany = cursor.executemany
+
+        def counted(sql, args):
+            self.queries += 1
+            return executemany(sql, args)
+        cursor.executemany = counted
+        return cursor
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+
+def todo_records(bad_lines, count):
+    # 검증을 거치지 않은 잘못된 status는 todos의 CHECK 제약으로 DB가 거절합니다.
+    return [(line_no, {'task': f'할 일 {line_no}', 'status': 'bad' if line_no in bad_lines else '미완료'})
+            for line_no in range(1, count + 1)]
+
+
+def passthrough(record):
+    return record['task'], None, record['status']
+
+
+def connect(tmp_path):
+    path = str(tmp_path / 'import.sqlite3')
+    bench_db.create_schema(path)
+    conn = bench_db.connect(path)
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p')")
+    conn.commit()
+    return conn
+
+
+def test_rejected_rows_are_skipped_within_budget(tmp_path):
+    conn = connect(tmp_path)
+    counting = CountingConnection(conn)
+    result = importer.import_records(counting, 'todos', 1, iter(todo_records({4, 18, 19, 41}, 50)), passthrough,
+                                     batch_size=16, max_rows=100, max_db_errors=10)
+    assert (result.imported, result.failed, result.aborted) == (46, 4, False)
+    assert [line_no for line_no, _ in result.errors] == [4, 18, 19, 41]
+    # 사용자에게는 드라이버 메시지(테이블/제약 이름) 대신 일반 메시지만 보여줍니다.
+    assert all('CHECK' not in message and 'todos' not in message for _, message in result.errors)
+    assert counting.queries <= importer.query_budget(100, 16, 10)
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS n FROM todos")
+        assert cursor.fetchone()['n'] == 46
+    conn.close()
+
+
+def test_too_many_rejected_rows_abort_within_budget(tmp_path):
+    conn = connect(tmp_path)
+    counting = CountingConnection(conn)
+    result = importer.import_records(counting, 'todos', 1, iter(todo_records(set(range(1, 51)), 50)), passthrough,
+                                     batch_size=16, max_rows=100, max_db_errors=3)
+    assert (result.imported, result.failed, result.aborted) == (0, 3, True)
+    assert counting.queries <= importer.query_budget(100, 16, 3)
+    conn.close()
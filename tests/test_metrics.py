@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from metrics import MetricsRegistry, merge_snapshots, render_prometheus
+
+
+def process_snapshot(pid, healthy, in_flight, requests):
+    """pid 프로세스에서 만든 것처럼 pid 라벨을 바꾼 스냅숏"""
+    registry = MetricsRegistry()
+    registry.collector('healthy', 'Replica healthy', lambda: {('r1',): healthy}, ('replica',), aggregate='min')
+    registry.collector('in_flight', 'Requests in flight', lambda: in_flight)
+    registry.collector('requests_total', 'Requests', lambda: requests, kind='counter')
+    snapshot = registry.snapshot()
+    for labels, _ in snapshot['in_flight']['values']:
+        labels[-1] = str(pid)
+    return snapshot
+
+
+def test_gauges_are_not_summed_across_processes():
+    merged = merge_snapshots([process_snapshot(101, 1, 2, 5), process_snapshot(102, 1, 3, 7)])
+    assert merged['healthy']['values'] == {('r1',): 1}
+    assert merged['in_flight']['labelnames'] == ['pid']
+    assert merged['in_flight']['values'] == {('101',): 2, ('102',): 3}
+    assert merged['requests_total']['values'] == {(): 12}
+    assert 'in_flight{pid="101"} 2' in render_prometheus(merged)
+
+
+def test_min_gauge_reports_replica_ejected_by_any_process():
+    merged = merge_snapshots([process_snapshot(101, 1, 0, 0), process_snapshot(102, 0, 0, 0)])
+    assert merged['healthy']['values'] == {('r1',): 0}
+
+
+def test_pid_label_is_current_process():
+    registry = MetricsRegistry()
+    registry.collector('entries', 'Entries', lambda: 4)
+    assert registry.snapshot()['entries']['values'] == [[[str(os.getpid())], 4]]
+
+
+def test_unknown_aggregate_is_rejected():
+    with pytest.raises(ValueError):
+        MetricsRegistry().collector('x', 'x', lambda: 0, aggregate='avg')
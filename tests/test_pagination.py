@@ -0,0 +1,79 @@
+import pytest
+
+import bench_db
+from pagination import StreamedPage, clamp_page_size, decode_cursor, fetch_keyset_page
+
+SELECT = "SELECT id, title, created_at FROM board"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    """게시글 8개. 2~4번과 6~7번은 created_at이 같아 id로만 순서가 정해집니다."""
+    path = str(tmp_path / 'pages.sqlite3')
+    bench_db.create_schema(path)
+    conn = bench_db.connect(path)
+    times = ['01', '02', '02', '02', '03', '04', '04', '05']
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p')")
+        cursor.executemany("INSERT INTO board (id, user_id, title, content, created_at) VALUES (%s, 1, %s, '', %s)",
+                           [(n, f'글 {n}', f'2024-01-01 00:00:{ts}') for n, ts in enumerate(times, start=1)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def page(conn, **options):
+    with conn.cursor() as cursor:
+        return fetch_keyset_page(cursor, SELECT, [], [], 'created_at', 'id', 3, **options)
+
+
+def ids(result):
+    return [row['id'] for row in result.rows]
+
+
+def test_walk_forward_and_back_over_ties(conn):
+    pages = [page(conn)]
+    while pages[-1].next_cursor:
+        pages.append(page(conn, after=pages[-1].next_cursor))
+    assert [ids(p) for p in pages] == [[8, 7, 6], [5, 4, 3], [2, 1]]
+    assert pages[0].prev_cursor is None and pages[-1].next_cursor is None
+
+    back = [pages[-1]]
+    while back[-1].prev_cursor:
+        back.append(page(conn, before=back[-1].prev_cursor))
+    assert [ids(p) for p in back] == [[2, 1], [5, 4, 3], [8, 7, 6]]
+    assert back[-1].prev_cursor is None # 처음 페이지로 돌아오면 이전 페이지가 없습니다.
+    assert back[-1].next_cursor == pages[0].next_cursor
+
+
+def test_ascending_pages(conn):
+    first = page(conn, descending=False)
+    second = page(conn, descending=False, after=first.next_cursor)
+    assert (ids(first), ids(second)) == ([1, 2, 3], [4, 5, 6])
+    assert ids(page(conn, descending=False, before=second.prev_cursor)) == [1, 2, 3]
+
+
+def test_exact_page_boundary_has_no_empty_next_page(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM board WHERE id <= 2")
+    conn.commit()
+    second = page(conn, after=page(conn).next_cursor)
+    assert ids(second) == [5, 4, 3]
+    assert second.next_cursor is None
+
+
+def test_bad_cursor_falls_back_to_first_page(conn):
+    assert decode_cursor('not-a-cursor') is None
+    assert ids(page(conn, after='not-a-cursor')) == [8, 7, 6]
+    assert (clamp_page_size('x', 20), clamp_page_size('0', 20), clamp_page_size('500', 20)) == (20, 1, 100)
+
+
+def test_streamed_page_matches_buffered_page(conn):
+    first = page(conn)
+    closed = []
+    streamed = StreamedPage(conn, SELECT, [], [], 'created_at', 'id', 3, descending=True,
+                            after=first.next_cursor, batch_size=2, on_close=lambda: closed.append(True))
+    assert [row['id'] for row in streamed.rows] == [5, 4, 3]
+    buffered = page(conn, after=first.next_cursor)
+    assert (streamed.next_cursor, streamed.prev_cursor) == (buffered.next_cursor, buffered.prev_cursor)
+    assert closed == [True] and streamed.error is None
@@ -0,0 +1,28 @@
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from passwords import PasswordHasher, canonical_method
+
+
+@pytest.mark.parametrize('method', ['pbkdf2:sha256:1000', 'pbkdf2:sha512:1000', 'scrypt:1024:8:1'])
+def test_canonical_method_matches_werkzeug(method):
+    assert canonical_method(method) == generate_password_hash('pw', method=method).split('$', 1)[0]
+
+
+def test_canonical_method_fills_werkzeug_defaults():
+    assert canonical_method('scrypt') == 'scrypt:32768:8:1'
+    assert canonical_method('pbkdf2') == f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+    assert canonical_method('pbkdf2:sha512') == f'pbkdf2:sha512:{DEFAULT_PBKDF2_ITERATIONS}'
+
+
+def test_invalid_method_is_rejected_at_construction():
+    with pytest.raises(ValueError):
+        PasswordHasher(method='md5', workers=0)
+
+
+def test_needs_rehash_without_hashing():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', salt_length=16, workers=0)
+    current = generate_password_hash('pw', method='pbkdf2:sha256:1000', salt_length=16)
+    assert not hasher.needs_rehash(current)
+    assert hasher.needs_rehash(generate_password_hash('pw', method='pbkdf2:sha256:1000', salt_length=8))
+    assert hasher.needs_rehash(generate_password_hash('pw', method='pbkdf2:sha256:2000', salt_length=16))
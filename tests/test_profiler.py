@@ -0,0 +1,48 @@
+import json
+import os
+
+import profiler
+from profiler import RequestProfiler
+
+
+class BusyProfile:
+    """다른 프로파일링 도구가 이미 켜져 있을 때의 cProfile.Profile (3.12+)"""
+
+    def enable(self):
+        raise ValueError('Another profiling tool is already active')
+
+
+def make_profiler(tmp_path):
+    requests = RequestProfiler(str(tmp_path), max_per_minute=6, sample_interval=0.001)
+    with open(requests.toggle_path, 'w', encoding='utf-8') as f:
+        f.write('')
+    return requests
+
+
+def written(tmp_path, active):
+    return sorted(name[len(active.name):] for name in os.listdir(tmp_path) if name.startswith(active.name))
+
+
+def test_only_one_request_per_process_is_profiled(tmp_path):
+    requests = make_profiler(tmp_path)
+    active = requests.start('todos_list')
+    assert requests.start('todos_list') is None
+    requests.finish(active, {'db_seconds': 0.0, 'template_seconds': 0.0})
+    assert written(tmp_path, active) == ['.collapsed', '.json', '.pstats']
+    with open(os.path.join(tmp_path, active.name + '.json'), encoding='utf-8') as f:
+        summary = json.load(f)
+    assert summary['cprofile_threads'] == ('all' if profiler.CPROFILE_ALL_THREADS else 'request')
+    assert requests.stats() == {'written': 1, 'skipped': 1}
+    assert requests.start('todos_list') is not None
+
+
+def test_other_profiling_tool_keeps_sampler_results(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler.cProfile, 'Profile', BusyProfile)
+    requests = make_profiler(tmp_path)
+    active = requests.start('todos_list')
+    requests.finish(active, {'db_seconds': 0.0, 'template_seconds': 0.0})
+    assert written(tmp_path, active) == ['.collapsed', '.json']
+    with open(os.path.join(tmp_path, active.name + '.json'), encoding='utf-8') as f:
+        summary = json.load(f)
+    assert summary['cprofile_error'] == 'Another profiling tool is already active'
+    assert summary['functions'] == []
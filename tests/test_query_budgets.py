@@ -0,0 +1,21 @@
+import pytest
+
+import bench
+
+SCENARIOS = dict(bench.SCENARIOS)
+
+
+@pytest.mark.parametrize('name', ['board_list', 'board_list_search', 'view_post', 'todos_list', 'bulk_todos',
+                                  'import_data_todos', 'import_data_diaries'])
+def test_route_stays_within_query_budget(worker, name):
+    # 예산을 넘으면 after_request의 QueryBudgetExceeded가 여기까지 올라옵니다.
+    response = SCENARIOS[name](worker)
+    response.get_data()
+    assert response.status_code < 500
+
+
+def test_route_over_budget_raises(seeded, worker, monkeypatch):
+    app_module = seeded.app
+    monkeypatch.setitem(app_module.QUERY_BUDGETS, 'todos_list', 0)
+    with pytest.raises(app_module.QueryBudgetExceeded):
+        worker.client.get('/todos', query_string={'status': '완료'})
@@ -0,0 +1,74 @@
+import pytest
+
+import bench_db
+from search import InMemoryNgramBackend, NgramTableBackend, SearchBackend, ngrams
+
+
+POSTS = [
+    {'id': 1, 'title': '공지', 'content': '반갑습니다'},
+    {'id': 2, 'title': '질문', 'content': '다음 주 일정'},
+    {'id': 3, 'title': '잡담', 'content': '고양이 사진'},
+]
+
+
+class FakeCursor:
+    """InMemoryNgramBackend.rebuild()가 읽을 board 행만 돌려주는 커서"""
+
+    def execute(self, sql, args=None):
+        pass
+
+    def fetchall(self):
+        return POSTS
+
+
+def test_ngrams_add_end_gram():
+    assert ngrams('반갑습니다') == {'반갑': 1, '갑습': 1, '습니': 1, '니다': 1, '다$': 1}
+    assert ngrams('a') == {'a': 1}
+
+
+def test_single_character_matches_last_character_in_memory():
+    backend = InMemoryNgramBackend()
+    # '다'는 1번 글의 마지막 글자이고, 2번 글의 첫 글자입니다.
+    assert sorted(post_id for post_id, _ in backend.search(FakeCursor(), '다', 10)) == [1, 2]
+    assert [post_id for post_id, _ in backend.search(FakeCursor(), '이', 10)] == [3]
+
+
+def test_single_character_matches_last_character_in_table(tmp_path):
+    path = str(tmp_path / 'search.sqlite3')
+    bench_db.create_schema(path)
+    conn = bench_db.connect(path)
+    backend = NgramTableBackend()
+    with conn.cursor() as cursor:
+        cursor.execute("INSERT INTO users (id, username, password) VALUES (1, 'u', 'p')")
+        for post in POSTS:
+            cursor.execute("INSERT INTO board (id, user_id, title, content) VALUES (%s, 1, %s, %s)",
+                           (post['id'], post['title'], post['content']))
+            backend.index_post(cursor, post['id'], post['title'], post['content'])
+        conn.commit()
+        assert sorted(post_id for post_id, _ in backend.search(cursor, '다', 10)) == [1, 2]
+        assert [post_id for post_id, _ in backend.search(cursor, '지', 10)] == [1]
+    conn.close()
+
+
+def test_memory_index_changes_apply_only_after_commit():
+    backend = InMemoryNgramBackend()
+    cursor = FakeCursor()
+    backend.search(cursor, '공지', 10) # 색인을 처음 만듭니다.
+    backend.index_post(cursor, 4, '롤백', '취소된 글')
+    backend.remove_post(cursor, 1)
+    assert backend.search(cursor, '롤백', 10) == []
+    backend.rollback()
+    backend.commit()
+    assert backend.search(cursor, '롤백', 10) == []
+    assert [post_id for post_id, _ in backend.search(cursor, '공지', 10)] == [1]
+
+    backend.index_post(cursor, 4, '커밋', '저장된 글')
+    backend.remove_post(cursor, 1)
+    backend.commit()
+    assert [post_id for post_id, _ in backend.search(cursor, '커밋', 10)] == [4]
+    assert backend.search(cursor, '공지', 10) == []
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        SearchBackend()
@@ -0,0 +1,77 @@
+# 메인 페이지 요약 (대시보드)
+#
+# 로그인한 사용자의 메인 페이지에 상태별 To-Do 수, 마감일이 지난 To-Do 수, 오늘 일기 작성 여부,
+# 최근에 쓴 게시글을 보여줍니다. 패널마다 쿼리를 보내지 않도록 UNION ALL 한 문장으로 모두 읽어
+# 사용자/날짜별로 캐시하고, 쓰기 경로는 캐시된 요약을 아래 diary_written() 등으로 직접 고쳐
+# 메인 페이지가 DB 없이 캐시만 읽고 응답하게 합니다. 캐시 갱신이 이미 쓰기를 반영해 읽은 요약에
+# 다시 적용될 수 있으므로(ReadThroughCache.update) 이 함수들은 두 번 적용해도 결과가 같아야 합니다.
+# 그렇게 만들 수 없는 쓰기(To-Do 추가의 개수 증가)와 요약을 고칠 정보가 없는 쓰기(상태 변경, 삭제 등)는
+# 캐시를 무효화하며, 다음 메인 페이지 요청이 한 번 다시 읽습니다.
+#
+# 요약 값은 여러 스레드가 함께 읽으므로 고치지 않고, 항상 바뀐 복사본을 새로 만들어 반환합니다.
+
+# 최근 게시글 패널에 보여줄 글 수
+RECENT_POSTS = 5
+
+# kind별 행: ('todo', 상태, 개수, 마감 지난 개수) / ('diary', NULL, 오늘 일기 수, 0) / ('post', 제목, 게시글 id, 0)
+# 파라미터: (오늘, user_id, user_id, 오늘)
+USER_TABLES_SQL = (
+    "SELECT 'todo' AS kind, status AS name, COUNT(*) AS n, "
+    "SUM(CASE WHEN due_date < %s THEN 1 ELSE 0 END) AS overdue "
+    "FROM todos WHERE user_id = %s GROUP BY status "
+    "UNION ALL "
+    "SELECT 'diary', NULL, COUNT(*), 0 FROM diaries WHERE user_id = %s AND entry_date = %s"
+)
+# 파라미터: (user_id, RECENT_POSTS)
+POSTS_SQL = (
+    "SELECT * FROM (SELECT 'post' AS kind, title AS name, id AS n, 0 AS overdue FROM board "
+    "WHERE user_id = %s ORDER BY id DESC LIMIT %s) recent"
+)
+SUMMARY_SQL = USER_TABLES_SQL + " UNION ALL " + POSTS_SQL
+
+
+def load(cursor, user_id, today, statuses, done_status, posts_cursor=None):
+    """
+    한 번의 쿼리로 사용자의 요약 dict를 만듭니다.
+    todos: {상태: 개수}, overdue: done_status가 아니면서 마감일이 지난 수, diary_today, recent_posts
+    사용자의 일기/To-Do가 다른 샤드(db_shards.py)에 있으면 cursor는 그 샤드, posts_cursor는 주 DB의
+    커서이며 두 번에 나누어 읽습니다.
+    """
+    if posts_cursor is None:
+        cursor.execute(SUMMARY_SQL, (today, user_id, user_id, today, user_id, RECENT_POSTS))
+        rows = cursor.fetchall()
+    else:
+        cursor.execute(USER_TABLES_SQL, (today, user_id, user_id, today))
+        rows = list(cursor.fetchall())
+        posts_cursor.execute(POSTS_SQL, (user_id, RECENT_POSTS))
+        rows.extend(posts_cursor.fetchall())
+    summary = {'todos': dict.fromkeys(statuses, 0), 'overdue': 0, 'diary_today': False, 'recent_posts': []}
+    for row in rows:
+        if row['kind'] == 'todo':
+            summary['todos'][row['name']] = int(row['n'])
+            if row['name'] != done_status:
+                summary['overdue'] += int(row['overdue'] or 0)
+        elif row['kind'] == 'diary':
+            summary['diary_today'] = row['n'] > 0
+        else:
+            summary['recent_posts'].append({'id': row['n'], 'title': row['name']})
+    return summary
+
+
+def diary_written(summary, entry_date, today):
+    """새로 쓴 일기를 반영한 요약을 반환합니다. 오늘 일기가 아니면 그대로입니다."""
+    if entry_date != today:
+        return summary
+    return dict(summary, diary_today=True)
+
+
+def post_written(summary, post_id, title):
+    """새 게시글을 최근 게시글 맨 앞에 넣은 요약을 반환합니다. 이미 들어 있는 글이면 한 번만 보여줍니다."""
+    posts = [post for post in summary['recent_posts'] if post['id'] != post_id]
+    return dict(summary, recent_posts=([{'id': post_id, 'title': title}] + posts)[:RECENT_POSTS])
+
+
+def post_edited(summary, post_id, title):
+    """최근 게시글 중 수정된 글의 제목을 바꾼 요약을 반환합니다."""
+    posts = [dict(post, title=title) if post['id'] == post_id else post for post in summary['recent_posts']]
+    return dict(summary, recent_posts=posts)
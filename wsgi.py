@@ -8,6 +8,9 @@ project_home = '/var/www/html/your_flask_app'
 if project_home not in sys.path:
     sys.path.insert(0, project_home) # 리스트의 맨 앞에 추가
 
-# Flask 애플리케이션 인스턴스 임포트
+# Flask 애플리케이션 인스턴스 생성
 # 'application'은 mod_wsgi가 기대하는 기본 이름입니다.
-from app import app as application
\ No newline at end of file
+# app은 app.py를 import할 때 만들어집니다. create_app()은 그 app의 정적 파일 지문 계산과
+# 템플릿 컴파일을 미리 끝내고 시작 시간을 로그에 남긴 뒤 같은 app을 반환합니다.
+from app import create_app
+application = create_app()